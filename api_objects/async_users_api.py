@@ -0,0 +1,98 @@
+from urllib.parse import urlsplit
+
+import anyio
+import httpx
+from httpx import Response
+
+from api_objects import latency
+from api_objects.cassette import AsyncCassetteTransport
+from api_objects.rate_limit import limiter_for
+from api_objects.users_api import UsersAPI
+
+
+class AsyncUsersAPI:
+    """
+    asyncio/anyio counterpart of UsersAPI with the same endpoints.
+
+    One pooled keep-alive httpx.AsyncClient is shared by all calls, and at most
+    `per_host_limit` requests are in flight per host at any time. Rate limits
+    go through the same per-host RateLimiter as UsersAPI: its adaptive window
+    narrows the in-flight limit and 429/5xx are retried with backoff. Each
+    attempt's connect/TLS/TTFB/total time is recorded via httpx's trace hook.
+    """
+
+    USERS = UsersAPI.USERS
+    USER_BY_ID = UsersAPI.USER_BY_ID
+
+    def __init__(self, base_url: str, token: str, per_host_limit: int = 8, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.per_host_limit = per_host_limit
+        self.client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            },
+            transport=AsyncCassetteTransport(httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=per_host_limit, max_keepalive_connections=per_host_limit),
+            )),
+            timeout=timeout,
+        )
+        self._limiters: dict[str, anyio.CapacityLimiter] = {}
+
+    async def __aenter__(self) -> "AsyncUsersAPI":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def _url(self, path: str, **kwargs) -> str:
+        return self.base_url + path.format(**kwargs)
+
+    def _limiter(self, url: str) -> anyio.CapacityLimiter:
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = anyio.CapacityLimiter(self.per_host_limit)
+        return self._limiters[host]
+
+    async def _request(self, method: str, template: str, path: dict | None = None, **kwargs) -> Response:
+        url = self._url(template, **(path or {}))
+        rate = limiter_for(url)
+        capacity = self._limiter(url)
+        attempt = 0
+        while True:
+            wait = rate.reserve()
+            if wait > 0:
+                rate.add_throttled(wait)
+                await anyio.sleep(wait)
+            capacity.total_tokens = min(self.per_host_limit, rate.window_size)
+            async with capacity:
+                resp = await latency.timed_async(method, template, lambda trace: self.client.request(
+                    method, url, extensions={"trace": trace}, **kwargs))
+            retry_after = rate.observe(resp.status_code, resp.headers)
+            if not rate.should_retry(resp.status_code, method, attempt):
+                return resp
+            rate.stats["retries"] += 1
+            delay = rate.backoff(attempt, retry_after)
+            rate.add_throttled(delay)
+            await anyio.sleep(delay)
+            attempt += 1
+
+    async def get_all(self, params: dict | None = None) -> Response:
+        return await self._request("GET", self.USERS, params=params)
+
+    async def get_by_id(self, user_id: int) -> Response:
+        return await self._request("GET", self.USER_BY_ID, {"user_id": user_id})
+
+    async def create(self, name: str, email: str, gender: str, status: str) -> Response:
+        payload = {"name": name, "email": email, "gender": gender, "status": status}
+        return await self._request("POST", self.USERS, json=payload)
+
+    async def update(self, user_id: int, **fields) -> Response:
+        return await self._request("PUT", self.USER_BY_ID, {"user_id": user_id}, json=fields)
+
+    async def delete(self, user_id: int) -> Response:
+        return await self._request("DELETE", self.USER_BY_ID, {"user_id": user_id})
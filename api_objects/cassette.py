@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Only headers tests (or UsersAPI) actually read are kept; rate-limit headers
+# are dropped on purpose so replay never throttles.
+_KEPT_HEADERS = ("content-type", "location", "x-pagination-total", "x-pagination-pages",
+                 "x-pagination-page", "x-pagination-limit")
+_MASK = "<ignored>"
+
+_STATE: Dict[str, Any] = {
+    "mode": "live",                              # live | record | replay
+    "dir": None,
+    "match_on": ("method", "path", "query", "body"),
+    "ignore": ("email",),
+}
+_local = threading.local()
+_session: Optional["Cassette"] = None
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Replay found no recorded interaction for a request."""
+
+
+def configure(mode: Optional[str] = None, cassette_dir: Optional[str] = None,
+              match_on: Optional[Iterable[str]] = None, ignore: Optional[Iterable[str]] = None) -> None:
+    if mode:
+        _STATE["mode"] = mode
+    if cassette_dir:
+        _STATE["dir"] = cassette_dir
+    if match_on:
+        _STATE["match_on"] = tuple(match_on)
+    if ignore is not None:
+        _STATE["ignore"] = tuple(ignore)
+
+
+def mode() -> str:
+    return _STATE["mode"]
+
+
+def path_for(name: str) -> Path:
+    safe = "".join(c if c.isalnum() or c in "._-[]" else "_" for c in name)
+    return Path(_STATE["dir"] or ".") / f"{safe}.jsonl"
+
+
+def _mask(value: Any, ignore: Tuple[str, ...]) -> Any:
+    if isinstance(value, dict):
+        return {k: _MASK if k in ignore else _mask(v, ignore) for k, v in sorted(value.items())}
+    if isinstance(value, list):
+        return [_mask(v, ignore) for v in value]
+    return value
+
+
+def _request_key(method: str, url: str, body: Optional[bytes], match_on: Tuple[str, ...],
+                 ignore: Tuple[str, ...]) -> str:
+    parts = urlsplit(url)
+    key: Dict[str, Any] = {}
+    if "method" in match_on:
+        key["method"] = method.upper()
+    if "path" in match_on:
+        key["path"] = parts.path.rstrip("/")  # host-independent: recordings replay against any base URL
+    if "query" in match_on:
+        key["query"] = _mask(dict(parse_qsl(parts.query)), ignore)
+    if "body" in match_on and body:
+        try:
+            key["body"] = _mask(json.loads(body), ignore)
+        except (ValueError, UnicodeDecodeError):
+            key["body"] = body.decode("utf-8", "replace")
+    return json.dumps(key, sort_keys=True, separators=(",", ":"))
+
+
+class Cassette:
+    """
+    One test's API traffic as JSONL, one interaction per line.
+
+    Replay hands out recorded interactions in order: a request gets the first
+    not-yet-used interaction with the same key (method/path/query/body by
+    default, with `ignore` fields such as random emails masked), so repeated
+    identical requests like GET-before and GET-after an update stay distinct.
+    """
+
+    def __init__(self, path: Path, mode: str, match_on: Tuple[str, ...], ignore: Tuple[str, ...]):
+        self.path = Path(path)
+        self.mode = mode
+        self.match_on = match_on
+        self.ignore = ignore
+        self.interactions: List[Dict[str, Any]] = []
+        self._used: set[int] = set()
+        self._lock = threading.Lock()
+        if mode == "replay" and self.path.exists():
+            with self.path.open(encoding="utf-8") as fh:
+                self.interactions = [json.loads(line) for line in fh if line.strip()]
+
+    def key(self, method: str, url: str, body: Optional[bytes]) -> str:
+        return _request_key(method, url, body, self.match_on, self.ignore)
+
+    def play(self, method: str, url: str, body: Optional[bytes]) -> Dict[str, Any]:
+        key = self.key(method, url, body)
+        with self._lock:
+            for index, interaction in enumerate(self.interactions):
+                if index not in self._used and interaction["key"] == key:
+                    self._used.add(index)
+                    return interaction["response"]
+        raise CassetteMiss(f"No recorded interaction in {self.path.name} for {method} {url} ({key})")
+
+    def record(self, method: str, url: str, body: Optional[bytes], status: int,
+               headers: Dict[str, str], content: bytes) -> None:
+        lowered = {k.lower(): v for k, v in headers.items()}
+        response = {
+            "status": status,
+            "headers": {k: lowered[k] for k in _KEPT_HEADERS if k in lowered},
+            "body": content.decode("utf-8", "replace"),
+        }
+        with self._lock:
+            self.interactions.append({"key": self.key(method, url, body), "response": response})
+
+    def save(self) -> None:
+        if self.mode != "record" or not self.interactions:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            for interaction in self.interactions:
+                fh.write(json.dumps(interaction, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.path)
+
+
+def _new(name: str) -> Cassette:
+    return Cassette(path_for(name), _STATE["mode"], _STATE["match_on"], _STATE["ignore"])
+
+
+def current() -> Optional[Cassette]:
+    """The calling thread's test cassette, else the session cassette (pool set-up, background refills)."""
+    return getattr(_local, "cassette", None) or _session
+
+
+@contextmanager
+def use_cassette(name: str) -> Iterator[Optional[Cassette]]:
+    """Route this thread's API traffic through the cassette `name` for the duration of the block."""
+    if _STATE["mode"] == "live":
+        yield None
+        return
+    cassette = _new(name)
+    previous = getattr(_local, "cassette", None)
+    _local.cassette = cassette
+    try:
+        yield cassette
+    finally:
+        _local.cassette = previous
+        cassette.save()
+
+
+def open_session(name: str = "_session") -> None:
+    global _session
+    if _STATE["mode"] != "live":
+        _session = _new(name)
+
+
+def close_session() -> None:
+    global _session
+    if _session is not None:
+        _session.save()
+        _session = None
+
+
+# ---------------------------------------------------------------------------
+# requests
+# ---------------------------------------------------------------------------
+class CassetteAdapter(HTTPAdapter):
+    """Transport adapter for requests.Session: passthrough, record or replay."""
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        cassette = current()
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        if cassette is None:
+            return super().send(request, **kwargs)
+        if cassette.mode == "replay":
+            return self._build(request, cassette.play(request.method, request.url, body))
+        response = super().send(request, **kwargs)
+        cassette.record(request.method, request.url, body, response.status_code,
+                        dict(response.headers), response.content)
+        return response
+
+    @staticmethod
+    def _build(request: requests.PreparedRequest, recorded: Dict[str, Any]) -> requests.Response:
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.reason = http.client.responses.get(recorded["status"], "")
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response._content = recorded["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def mount(session: requests.Session) -> requests.Session:
+    adapter = CassetteAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# ---------------------------------------------------------------------------
+# httpx
+# ---------------------------------------------------------------------------
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """httpx counterpart of CassetteAdapter, wrapping a real AsyncHTTPTransport."""
+
+    def __init__(self, wrapped: httpx.AsyncBaseTransport):
+        self.wrapped = wrapped
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cassette = current()
+        if cassette is None:
+            return await self.wrapped.handle_async_request(request)
+        body = await request.aread()
+        if cassette.mode == "replay":
+            recorded = cassette.play(request.method, str(request.url), body)
+            return httpx.Response(recorded["status"], headers=recorded["headers"],
+                                  content=recorded["body"].encode("utf-8"), request=request)
+        response = await self.wrapped.handle_async_request(request)
+        content = await response.aread()
+        cassette.record(request.method, str(request.url), body, response.status_code,
+                        dict(response.headers), content)
+        return response  # already read; the client serves the buffered content
+
+    async def aclose(self) -> None:
+        await self.wrapped.aclose()
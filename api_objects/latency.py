@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Phase fields a sample may carry; connect/tls only exist for new connections
+# and only where the client exposes them (httpx trace, not requests).
+PHASES = ("total_ms", "ttfb_ms", "connect_ms", "tls_ms")
+
+_lock = threading.Lock()
+_samples: Dict[str, Dict[str, List[float]]] = {}
+_local = threading.local()
+
+
+def endpoint_key(method: str, template: str) -> str:
+    return f"{method.upper()} {template}"
+
+
+def record(method: str, template: str, total: float, ttfb: Optional[float] = None,
+           connect: Optional[float] = None, tls: Optional[float] = None) -> None:
+    """Add one request/response exchange (seconds) to the run and to the calling thread's test."""
+    values = {"total_ms": total, "ttfb_ms": ttfb, "connect_ms": connect, "tls_ms": tls}
+    sample = {k: round(v * 1000, 2) for k, v in values.items() if v is not None}
+    key = endpoint_key(method, template)
+    with _lock:
+        bucket = _samples.setdefault(key, {})
+        for phase, value in sample.items():
+            bucket.setdefault(phase, []).append(value)
+    per_test = getattr(_local, "test", None)
+    if per_test is not None:
+        entry = per_test.setdefault(key, {"count": 0, "total_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] = round(entry["total_ms"] + sample["total_ms"], 2)
+
+
+def begin_test() -> None:
+    _local.test = {}
+
+
+def end_test() -> Dict[str, Dict[str, float]]:
+    """Per-endpoint count and summed time of the calling thread's requests since begin_test()."""
+    result = getattr(_local, "test", None) or {}
+    _local.test = None
+    return result
+
+
+def samples() -> Dict[str, Dict[str, List[float]]]:
+    """Raw per-endpoint samples in ms (exported to the JSON report, merged across workers)."""
+    with _lock:
+        return {key: {phase: list(values) for phase, values in bucket.items()} for key, bucket in _samples.items()}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class HttpxTrace:
+    """
+    httpx/httpcore trace callback (request extensions={"trace": ...}) that
+    captures connect, TLS and time-to-first-byte for one request.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self._marks: Dict[str, float] = {}
+
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        self._marks[event] = time.perf_counter()
+
+    def _span(self, prefix: str) -> Optional[float]:
+        started, done = self._marks.get(f"{prefix}.started"), self._marks.get(f"{prefix}.complete")
+        return done - started if started is not None and done is not None else None
+
+    def phases(self) -> Dict[str, Optional[float]]:
+        headers = (self._marks.get("http11.receive_response_headers.complete")
+                   or self._marks.get("http2.receive_response_headers.complete"))
+        return {
+            "ttfb": headers - self.start if headers is not None else None,
+            "connect": self._span("connection.connect_tcp"),
+            "tls": self._span("connection.start_tls"),
+        }
+
+
+async def timed_async(method: str, template: str, send: Callable[[HttpxTrace], Awaitable[Any]]) -> Any:
+    """Run send(trace) and record its timing; `send` must pass trace as extensions={"trace": trace}."""
+    trace = HttpxTrace()
+    response = await send(trace)
+    phases = trace.phases()
+    record(method, template, time.perf_counter() - trace.start, phases["ttfb"], phases["connect"], phases["tls"])
+    return response
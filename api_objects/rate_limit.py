@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+# Statuses worth another attempt. 5xx is only retried for idempotent methods:
+# a POST that died server-side may still have created the user.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+_DEFAULTS: Dict[str, Any] = {"per_minute": 0, "max_retries": 4, "max_window": 8,
+                             "backoff_base": 0.5, "backoff_cap": 30.0}
+_LIMITERS: Dict[str, "RateLimiter"] = {}
+_REGISTRY_LOCK = threading.Lock()
+_local = threading.local()
+
+
+def configure(**settings: Any) -> None:
+    """Defaults for limiters created from now on (conftest feeds <api><rateLimit*> here)."""
+    _DEFAULTS.update({k: v for k, v in settings.items() if v is not None})
+
+
+def limiter_for(url: str) -> "RateLimiter":
+    """The process-wide limiter for url's host, shared by every UsersAPI / AsyncUsersAPI."""
+    host = urlsplit(url).netloc or url
+    with _REGISTRY_LOCK:
+        if host not in _LIMITERS:
+            _LIMITERS[host] = RateLimiter(**_DEFAULTS)
+        return _LIMITERS[host]
+
+
+def all_stats() -> Dict[str, float]:
+    """Counters summed over every host (exported to the JSON report)."""
+    total: Dict[str, float] = {}
+    with _REGISTRY_LOCK:
+        limiters = list(_LIMITERS.values())
+    for limiter in limiters:
+        for key, value in limiter.stats.items():
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def throttled_time() -> float:
+    """Seconds the current thread has spent waiting on rate limits so far."""
+    return getattr(_local, "throttled", 0.0)
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Client-side throttle for one API host.
+
+    - Token bucket: disabled until a limit is known, either from `per_minute`
+      or from the X-RateLimit-Limit header. Each worker process gets
+      1/TEST_WORKER_COUNT of the budget, and X-RateLimit-Remaining (which the
+      server counts across all workers) caps the local tokens.
+    - A 429 blocks every caller until Retry-After / X-RateLimit-Reset.
+    - Concurrency window (AIMD): +1/window per success, halved on 429/5xx.
+    - call() retries 429 (and 5xx for idempotent methods) with jittered backoff.
+    """
+
+    def __init__(self, per_minute: float = 0, max_retries: int = 4, max_window: int = 8,
+                 backoff_base: float = 0.5, backoff_cap: float = 30.0, workers: Optional[int] = None):
+        self.workers = max(1, workers or int(os.getenv("TEST_WORKER_COUNT") or 1))
+        self.max_retries = max_retries
+        self.max_window = max(1, max_window)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.window = float(self.max_window)
+        self.rate: Optional[float] = None  # tokens per second for this worker
+        self.capacity = 0.0
+        self.tokens = 0.0
+        self._limit: Optional[float] = None
+        self._stamp = time.monotonic()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self.stats: Dict[str, float] = {"requests": 0, "retries": 0, "rate_limited": 0, "server_errors": 0,
+                                        "throttled_s": 0.0}
+        if per_minute:
+            self._set_limit(float(per_minute))
+
+    # -- bucket ------------------------------------------------------------
+    def _set_limit(self, per_minute: float) -> None:
+        share = per_minute / self.workers
+        first = self.rate is None
+        self._limit = per_minute
+        self.rate = share / 60.0
+        self.capacity = max(1.0, share)
+        if first:
+            self.tokens = self.capacity
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self) -> float:
+        """Take one token; returns how long the caller must sleep before sending."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self._blocked_until - now)
+            if self.rate is not None:
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            self.stats["requests"] += 1
+            return wait
+
+    # -- feedback ----------------------------------------------------------
+    def observe(self, status: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Update bucket and window from a response; returns the server's requested delay, if any."""
+        limit = _header_float(headers, "X-RateLimit-Limit")
+        remaining = _header_float(headers, "X-RateLimit-Remaining")
+        reset = _header_float(headers, "X-RateLimit-Reset")
+        if reset is not None and reset > 1e9:  # epoch seconds rather than a delta
+            reset = max(0.0, reset - time.time())
+        delay = _retry_after(headers)
+        if delay is None and status == 429:
+            delay = reset
+
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            if limit and limit != self._limit:
+                self._set_limit(limit)
+            if remaining is not None and self.rate is not None:
+                self.tokens = min(self.tokens, remaining / self.workers)
+            if remaining == 0 and reset:
+                self._blocked_until = max(self._blocked_until, now + reset)
+
+            if status == 429:
+                self.stats["rate_limited"] += 1
+                self.window = max(1.0, self.window / 2)
+                if delay:
+                    self._blocked_until = max(self._blocked_until, now + delay)
+            elif status >= 500:
+                self.stats["server_errors"] += 1
+                self.window = max(1.0, self.window / 2)
+            else:
+                self.window = min(float(self.max_window), self.window + 1.0 / self.window)
+            self._cond.notify_all()
+        return delay
+
+    @property
+    def window_size(self) -> int:
+        return max(1, int(self.window))
+
+    def should_retry(self, status: int, method: str, attempt: int) -> bool:
+        if attempt >= self.max_retries or status not in RETRY_STATUSES:
+            return False
+        return status == 429 or method.upper() in IDEMPOTENT
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(self.backoff_cap, retry_after) + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))  # full jitter
+
+    def add_throttled(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        _local.throttled = throttled_time() + seconds
+        with self._cond:
+            self.stats["throttled_s"] += seconds
+
+    # -- sync driver -------------------------------------------------------
+    def _sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            self.add_throttled(seconds)
+            time.sleep(seconds)
+
+    def _enter_window(self) -> None:
+        start = time.monotonic()
+        with self._cond:
+            self._cond.wait_for(lambda: self._in_flight < self.window_size)
+            self._in_flight += 1
+        self.add_throttled(time.monotonic() - start)
+
+    def _leave_window(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def call(self, method: str, send: Callable[[], Any]) -> Any:
+        """Run send() (returning a requests.Response) under the bucket, window and retry policy."""
+        attempt = 0
+        while True:
+            self._sleep(self.reserve())
+            self._enter_window()
+            try:
+                resp = send()
+            finally:
+                self._leave_window()
+            retry_after = self.observe(resp.status_code, resp.headers)
+            if not self.should_retry(resp.status_code, method, attempt):
+                return resp
+            with self._cond:
+                self.stats["retries"] += 1
+            self._sleep(self.backoff(attempt, retry_after))
+            attempt += 1
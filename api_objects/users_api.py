@@ -1,15 +1,22 @@
+import time
+
 import requests
 from requests import Response
 
+from api_objects import cassette, latency
+from api_objects.rate_limit import RateLimiter, limiter_for
+
 
 class UsersAPI:
 
     USERS = "/users"
     USER_BY_ID = "/users/{user_id}"
 
-    def __init__(self, base_url: str, token: str):
+    def __init__(self, base_url: str, token: str, limiter: RateLimiter | None = None):
         self.base_url = base_url.rstrip("/")
-        self.session = requests.Session()
+        # shared per host across threads; 429/5xx are retried before the caller sees them
+        self.limiter = limiter or limiter_for(self.base_url)
+        self.session = cassette.mount(requests.Session())  # passthrough unless cassettes record/replay
         self.session.headers.update({
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
@@ -19,18 +26,31 @@ class UsersAPI:
     def _url(self, path: str, **kwargs) -> str:
         return self.base_url + path.format(**kwargs)
 
+    def _request(self, method: str, template: str, path: dict | None = None, **kwargs) -> Response:
+        """Send through the rate limiter; every attempt is timed under its endpoint template."""
+        url = self._url(template, **(path or {}))
+
+        def _send() -> Response:
+            start = time.perf_counter()
+            resp = self.session.request(method, url, **kwargs)
+            # requests only exposes elapsed (send → headers parsed); no DNS/connect/TLS split
+            latency.record(method, template, time.perf_counter() - start, ttfb=resp.elapsed.total_seconds())
+            return resp
+
+        return self.limiter.call(method, _send)
+
     def get_all(self, params: dict | None = None) -> Response:
-        return self.session.get(self._url(self.USERS), params=params)
+        return self._request("GET", self.USERS, params=params)
 
     def get_by_id(self, user_id: int) -> Response:
-        return self.session.get(self._url(self.USER_BY_ID, user_id=user_id))
+        return self._request("GET", self.USER_BY_ID, {"user_id": user_id})
 
     def create(self, name: str, email: str, gender: str, status: str) -> Response:
         payload = {"name": name, "email": email, "gender": gender, "status": status}
-        return self.session.post(self._url(self.USERS), json=payload)
+        return self._request("POST", self.USERS, json=payload)
 
     def update(self, user_id: int, **fields) -> Response:
-        return self.session.put(self._url(self.USER_BY_ID, user_id=user_id), json=fields)
+        return self._request("PUT", self.USER_BY_ID, {"user_id": user_id}, json=fields)
 
     def delete(self, user_id: int) -> Response:
-        return self.session.delete(self._url(self.USER_BY_ID, user_id=user_id))
+        return self._request("DELETE", self.USER_BY_ID, {"user_id": user_id})
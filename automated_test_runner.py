@@ -22,23 +22,55 @@ Usage:
 
   # Custom interval (e.g. every 6 hours):
   python automated_test_runner.py --schedule --interval-hours 6
+
+  # Shard tests across 4 worker processes (overrides <workers> in data.xml):
+  python automated_test_runner.py --workers 4
+
+  # Start fixing early failures while the rest of the suite still runs:
+  python automated_test_runner.py --ai-fix --pipeline
+
+  # Only tests affected by the changes since a git ref (plus the smoke set):
+  python automated_test_runner.py --changed-since origin/main
 """
 
 from __future__ import annotations
 
 import anyio
+import anyio.abc
 import argparse
 import json
+import math
 import os
+import re
+import sqlite3
 import subprocess
 import sys
+import threading
 import time
+import xml.etree.ElementTree as ET
+from collections import Counter, deque
+from collections.abc import Iterator
 from datetime import datetime
 from pathlib import Path
 
 import requests
+from anyio.from_thread import BlockingPortal
 from dotenv import load_dotenv
-from claude_agent_sdk import query, ClaudeAgentOptions, ResultMessage
+from claude_agent_sdk import query, AssistantMessage, ClaudeAgentOptions, ResultMessage, ToolUseBlock
+
+from utilities.analysis_cache import AnalysisCache, fingerprint
+from utilities.config_loader import load_config
+from utilities.duration_history import DurationHistory
+from utilities.failure_clusters import FailureCluster, cluster_failures, failure_scope, partition_failures
+from utilities.fix_cache import FixCache, git
+from utilities.flakiness import FlakinessEngine
+from utilities.impact_analysis import ImpactAnalyzer
+from utilities.json_report import compact_test, iter_report_tests, load_report
+from utilities.preflight import Preflight
+from utilities.report_writer import ReportWriter
+from utilities.reportlog_stream import ReportLogStream, ResultCallback
+from utilities.run_history import RunHistory
+from utilities.telegram_notifier import TelegramNotifier
 
 # Load .env file for local runs (no-op in CI where vars are injected directly)
 load_dotenv()
@@ -47,7 +79,7 @@ load_dotenv()
 def check_dependencies() -> None:
     """Warn about missing optional packages without crashing."""
     missing = []
-    for pkg in ("allure", "pytest_jsonreport", "playwright"):
+    for pkg in ("allure", "pytest_jsonreport", "pytest_reportlog", "playwright"):
         try:
             __import__(pkg if pkg != "pytest_jsonreport" else "pytest_jsonreport.plugin")
         except ImportError:
@@ -103,15 +135,9 @@ FIXES_SUMMARY:
 # Step 1 — Run pytest
 # ---------------------------------------------------------------------------
 
-def run_pytest(output_dir: Path, nodeids: list[str] | None = None, marker: str | None = None) -> dict:
-    """
-    Run pytest and return the parsed JSON report dict.
-    Extra keys injected: _stdout, _stderr, _returncode.
-    """
-    output_dir.mkdir(parents=True, exist_ok=True)
-    json_report = output_dir / "report.json"
-    junit_xml = output_dir / "junit.xml"
-
+def _pytest_cmd(json_report: Path, junit_xml: Path, nodeids: list[str] | None, marker: str | None,
+                report_log: Path | None = None, deselect: list[str] | None = None) -> list[str]:
+    """Build the pytest command line shared by serial runs and parallel workers."""
     cmd = [
         sys.executable, "-m", "pytest",
         "--json-report", f"--json-report-file={json_report}",
@@ -121,36 +147,370 @@ def run_pytest(output_dir: Path, nodeids: list[str] | None = None, marker: str |
         "-q",
     ]
 
+    if report_log is not None:
+        cmd.append(f"--report-log={report_log}")
+
     if marker:
         cmd.extend(["-m", marker])
 
+    for nodeid in deselect or []:
+        cmd.append(f"--deselect={nodeid}")
+
     if nodeids:
         cmd.extend(nodeids)
 
+    return cmd
+
+
+def _load_json_report(json_report: Path) -> dict:
+    """
+    Read a pytest-json-report file, returning an empty dict if missing or corrupt.
+    Tests are parsed one at a time and passing tests lose their captured
+    output on the way in (utilities/json_report); the file keeps everything.
+    """
+    return load_report(json_report, compact_test)
+
+
+def _write_merged_report(path: Path, report: dict, sources: list[Path]) -> None:
+    """
+    Write `report` with the tests of the `sources` report files streamed in
+    one at a time, so the merged file keeps their full captured output.
+    """
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("{\n")
+        for key, value in report.items():
+            if key != "tests":
+                fh.write(f"{json.dumps(key)}: {json.dumps(value)},\n")
+        fh.write('"tests": [')
+        separator = "\n"
+        for source in sources:
+            for test in iter_report_tests(source):
+                fh.write(separator + json.dumps(test))
+                separator = ",\n"
+        fh.write("\n]\n}\n")
+
+
+# Lines of pytest stdout/stderr kept in memory (the full output is in stdout.txt / stderr.txt)
+STDOUT_TAIL_LINES = 400
+
+_PROGRESS_ICONS = {"passed": "✅", "failed": "❌", "error": "💥", "skipped": "⏭️", "xfailed": "➖", "xpassed": "❗"}
+
+
+def _has_reportlog() -> bool:
+    try:
+        __import__("pytest_reportlog")
+    except ImportError:
+        return False
+    return True
+
+
+def _tail(path: Path, lines: int = STDOUT_TAIL_LINES) -> str:
+    """Last `lines` lines of a text file without loading all of it at once."""
+    if not path.exists():
+        return ""
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        return "".join(deque(fh, maxlen=lines))
+
+
+class _Progress:
+    """on_result callback printing one live line per finished test, then forwarding it."""
+
+    def __init__(self, total: int | None = None, forward: ResultCallback | None = None):
+        self.total = total
+        self.forward = forward
+        self.done = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, result: dict) -> None:
+        with self._lock:
+            self.done += 1
+            count = f"{self.done}/{self.total}" if self.total else str(self.done)
+            duration = sum((result.get(p) or {}).get("duration", 0) for p in ("setup", "call", "teardown"))
+            icon = _PROGRESS_ICONS.get(result["outcome"], "•")
+            print(f"    {icon} [{count}] {result['nodeid']} ({duration:.1f}s)", flush=True)
+        if self.forward is not None:
+            self.forward(result)
+
+
+def _stream_pytest(cmd: list[str], env: dict, output_dir: Path, on_result: ResultCallback | None) -> tuple[int, str]:
+    """
+    Run one pytest process while following its reportlog. stdout is written
+    to <output_dir>/stdout.txt and only its last STDOUT_TAIL_LINES lines are
+    kept in memory. Returns (returncode, stdout_tail).
+    """
+    report_log = output_dir / "reportlog.jsonl"
+    stream = ReportLogStream(report_log, on_result).start() if _has_reportlog() else None
+    tail: deque[str] = deque(maxlen=STDOUT_TAIL_LINES)
+    with open(output_dir / "stdout.txt", "w", encoding="utf-8") as out, \
+            open(output_dir / "stderr.txt", "w", encoding="utf-8") as err:
+        proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT, stdout=subprocess.PIPE, stderr=err, text=True,
+                                env=env, bufsize=1)
+        for line in proc.stdout:
+            out.write(line)
+            tail.append(line)
+        returncode = proc.wait()
+    if stream is not None:
+        stream.stop()
+    return returncode, "".join(tail)
+
+
+def run_pytest(
+    output_dir: Path,
+    nodeids: list[str] | None = None,
+    marker: str | None = None,
+    workers: int = 1,
+    on_result: ResultCallback | None = None,
+    deselect: list[str] | None = None,
+    worker_id: str | None = None,
+    peers: int = 0,
+) -> dict:
+    """
+    Run pytest and return the parsed JSON report dict.
+    Extra keys injected: _stdout, _stderr (bounded tails), _returncode.
+    `deselect` nodeids are left out of the run (e.g. quarantined tests).
+
+    `worker_id` names the pytest process (TEST_WORKER_ID, default "main"; it
+    keys cassette sessions and auth-state files; sharded workers become
+    "<worker_id>-w<N>"). `peers` counts the pytest processes running alongside
+    this one (the quarantine lane, pipelined batch re-runs) so they are
+    included in TEST_WORKER_COUNT and the rate-limit budget is split over all.
+
+    While pytest runs, its reportlog (pytest-reportlog) is followed: a live
+    progress line is printed per finished test and `on_result` receives each
+    result (a pytest-json-report "tests" entry) as soon as the test is done.
+
+    With workers > 1 the selected tests are sharded across that many pytest
+    processes (see _run_parallel) and their reports are merged into one.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if workers > 1:
+        return _run_parallel(output_dir, nodeids, marker, workers, on_result, deselect, peers, worker_id)
+
+    json_report = output_dir / "report.json"
+    junit_xml = output_dir / "junit.xml"
+    report_log = output_dir / "reportlog.jsonl"
+    report_log.unlink(missing_ok=True)  # never follow a previous run's log
+    cmd = _pytest_cmd(json_report, junit_xml, nodeids, marker, report_log if _has_reportlog() else None, deselect)
+
     env = os.environ.copy()
     env["TEST_OUTPUT_DIR"] = str(output_dir)
+    if worker_id:
+        env["TEST_WORKER_ID"] = worker_id
+    if peers:
+        env["TEST_WORKER_COUNT"] = str(1 + peers)
 
     print(f"  $ {' '.join(cmd)}")
-    result = subprocess.run(
-        cmd,
-        cwd=PROJECT_ROOT,
-        capture_output=True,
-        text=True,
-        env=env,
-    )
+    returncode, stdout = _stream_pytest(cmd, env, output_dir, _Progress(forward=on_result))
 
-    report: dict = {}
-    if json_report.exists():
-        try:
-            with open(json_report, encoding="utf-8") as fh:
-                report = json.load(fh)
-        except json.JSONDecodeError as exc:
-            print(f"  ⚠️  Could not parse JSON report: {exc}")
+    report = _load_json_report(json_report)
+    report["_stdout"] = stdout
+    report["_stderr"] = _tail(output_dir / "stderr.txt")
+    report["_returncode"] = returncode
 
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Parallel execution — shard tests across N pytest worker processes
+# ---------------------------------------------------------------------------
+
+def _collect_nodeids(output_dir: Path, nodeids: list[str] | None, marker: str | None) -> tuple[list[str], dict]:
+    """
+    Run a collect-only pass and return (test nodeids, collection report).
+    The JSON collectors tree is used instead of parsing terminal output, so the
+    result does not depend on -q/-v levels from pytest.ini. Items removed by
+    -m or by the <tags> filter are flagged "deselected" and skipped here.
+    """
+    json_report = output_dir / "collect.json"
+    cmd = [
+        sys.executable, "-m", "pytest", "--collect-only", "-q",
+        "--json-report", f"--json-report-file={json_report}",
+    ]
+    if marker:
+        cmd.extend(["-m", marker])
+    if nodeids:
+        cmd.extend(nodeids)
+
+    env = os.environ.copy()
+    env["TEST_OUTPUT_DIR"] = str(output_dir)
+    result = subprocess.run(cmd, cwd=PROJECT_ROOT, capture_output=True, text=True, env=env)
+
+    report = _load_json_report(json_report)
     report["_stdout"] = result.stdout
     report["_stderr"] = result.stderr
     report["_returncode"] = result.returncode
 
+    collectors = report.get("collectors", [])
+    parents = {c.get("nodeid") for c in collectors}
+    items: list[str] = []
+    seen: set[str] = set()
+    for collector in collectors:
+        for child in collector.get("result", []):
+            nid = child.get("nodeid")
+            if child.get("deselected"):
+                continue
+            if nid and nid not in parents and nid not in seen:
+                seen.add(nid)
+                items.append(nid)
+    return items, report
+
+
+def _merge_junit(junit_files: list[Path], target: Path, wall_time: float) -> None:
+    """Merge per-worker JUnit XML files into a single <testsuite>."""
+    merged = ET.Element("testsuite", name="pytest")
+    totals = {"tests": 0, "errors": 0, "failures": 0, "skipped": 0}
+    for path in junit_files:
+        if not path.exists():
+            continue
+        try:
+            root = ET.parse(path).getroot()
+        except ET.ParseError as exc:
+            print(f"  ⚠️  Could not parse JUnit XML {path}: {exc}")
+            continue
+        suites = [root] if root.tag == "testsuite" else root.findall("testsuite")
+        for suite in suites:
+            for key in totals:
+                totals[key] += int(suite.get(key, 0) or 0)
+            merged.extend(list(suite))
+    for key, value in totals.items():
+        merged.set(key, str(value))
+    merged.set("time", f"{wall_time:.3f}")
+    merged.set("timestamp", datetime.now().isoformat(timespec="seconds"))
+    tree = ET.ElementTree(ET.Element("testsuites"))
+    tree.getroot().append(merged)
+    tree.write(target, encoding="utf-8", xml_declaration=True)
+
+
+# Session-level counter sections added by conftest (pytest_json_modifyreport);
+# summed key-by-key when worker reports are merged.
+_SUMMED_EXTRAS = ("network_cache", "api_throttle", "retries")
+# Sections of {key: {field: [samples]}}; lists are concatenated so percentiles stay exact.
+_SAMPLED_EXTRAS = ("api_latency",)
+
+
+def _merge_reports(reports: list[dict], wall_time: float) -> dict:
+    """
+    Merge per-worker pytest JSON reports into one report with the same shape
+    generate_report() expects. Duration is the wall-clock time of the whole
+    parallel phase, not the sum of worker durations.
+    """
+    merged: dict = {
+        "created": time.time(),
+        "duration": wall_time,
+        "exitcode": 0,
+        "root": str(PROJECT_ROOT),
+        "summary": {},
+        "collectors": [],
+        "tests": [],
+        "warnings": [],
+    }
+    for rep in reports:
+        merged["tests"].extend(rep.get("tests", []))
+        merged["collectors"].extend(rep.get("collectors", []))
+        merged["warnings"].extend(rep.get("warnings", []))
+        if rep.get("errors"):
+            merged.setdefault("errors", []).extend(rep["errors"])
+        for key, value in (rep.get("summary") or {}).items():
+            if isinstance(value, (int, float)):
+                merged["summary"][key] = merged["summary"].get(key, 0) + value
+        if rep.get("environment") and "environment" not in merged:
+            merged["environment"] = rep["environment"]
+        merged["exitcode"] = max(merged["exitcode"], rep.get("exitcode", 0) or 0)
+        for section in _SUMMED_EXTRAS:
+            for key, value in (rep.get(section) or {}).items():
+                bucket = merged.setdefault(section, {})
+                bucket[key] = bucket.get(key, 0) + value
+        for section in _SAMPLED_EXTRAS:
+            for key, fields in (rep.get(section) or {}).items():
+                bucket = merged.setdefault(section, {}).setdefault(key, {})
+                for field, values in fields.items():
+                    bucket.setdefault(field, []).extend(values)
+    return merged
+
+
+def _run_parallel(output_dir: Path, nodeids: list[str] | None, marker: str | None, workers: int,
+                  on_result: ResultCallback | None = None, deselect: list[str] | None = None,
+                  peers: int = 0, worker_id: str | None = None) -> dict:
+    """
+    Shard the selected tests across `workers` pytest processes, packed
+    longest-first from the per-test duration history.
+
+    Each worker gets its own browser (its own pytest-playwright session) and its
+    own artifact directory under <output_dir>/workers/w<N>/. Per-worker JSON and
+    JUnit reports are merged into <output_dir>/report.json and junit.xml so the
+    rest of the pipeline sees a single run.
+    """
+    selected, collect_report = _collect_nodeids(output_dir, nodeids, marker)
+    if deselect:
+        excluded = set(deselect)
+        selected = [n for n in selected if n not in excluded]
+    if len(selected) < 2:
+        print(f"  ℹ️  {len(selected)} test(s) collected — running serially")
+        return run_pytest(output_dir, nodeids=nodeids, marker=marker, workers=1, on_result=on_result,
+                          deselect=deselect, worker_id=worker_id, peers=peers)
+
+    # Longest-first packing from the duration history of previous runs
+    history = DurationHistory.load()
+    shards = history.plan(selected, workers)
+    loads = ", ".join(f"{load:.0f}s" for load in history.expected_load(shards))
+    print(f"  ⚡ Parallel run: {len(selected)} tests across {len(shards)} workers (expected: {loads})")
+
+    started = time.monotonic()
+    progress = _Progress(total=len(selected), forward=on_result)
+    streaming = _has_reportlog()
+    procs: list[tuple[Path, subprocess.Popen]] = []
+    streams: list[ReportLogStream] = []
+    for index, shard in enumerate(shards):
+        worker_dir = output_dir / "workers" / f"w{index}"
+        worker_dir.mkdir(parents=True, exist_ok=True)
+        # Nodeids go through an @argsfile (pytest>=8.2) so large shards never
+        # hit the OS command-line length limit.
+        args_file = worker_dir / "nodeids.txt"
+        args_file.write_text("\n".join(shard) + "\n", encoding="utf-8")
+
+        # The marker was already applied during collection
+        report_log = worker_dir / "reportlog.jsonl"
+        report_log.unlink(missing_ok=True)
+        cmd = _pytest_cmd(worker_dir / "report.json", worker_dir / "junit.xml", [f"@{args_file}"], None,
+                          report_log if streaming else None)
+        env = os.environ.copy()
+        env["TEST_OUTPUT_DIR"] = str(worker_dir)
+        env["TEST_WORKER_ID"] = f"{worker_id}-w{index}" if worker_id else f"w{index}"
+        env["TEST_WORKER_COUNT"] = str(len(shards) + peers)
+
+        print(f"  $ [w{index}] {' '.join(cmd)}  ({len(shard)} tests)")
+        stdout = open(worker_dir / "stdout.txt", "w", encoding="utf-8")
+        stderr = open(worker_dir / "stderr.txt", "w", encoding="utf-8")
+        proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT, stdout=stdout, stderr=stderr, text=True, env=env)
+        stdout.close()
+        stderr.close()
+        procs.append((worker_dir, proc))
+        if streaming:
+            streams.append(ReportLogStream(report_log, progress).start())
+
+    returncodes = [proc.wait() for _, proc in procs]
+    for stream in streams:
+        stream.stop()
+    wall_time = time.monotonic() - started
+
+    worker_reports = [_load_json_report(worker_dir / "report.json") for worker_dir, _ in procs]
+    report = _merge_reports(worker_reports, wall_time)
+    if collect_report.get("errors"):
+        report.setdefault("errors", []).extend(collect_report["errors"])
+
+    _write_merged_report(output_dir / "report.json", report, [worker_dir / "report.json" for worker_dir, _ in procs])
+    _merge_junit([worker_dir / "junit.xml" for worker_dir, _ in procs], output_dir / "junit.xml", wall_time)
+
+    stdout_parts, stderr_parts = [], []
+    for worker_dir, _ in procs:
+        stdout_parts.append(f"===== {worker_dir.name} =====\n" + _tail(worker_dir / "stdout.txt"))
+        stderr_parts.append(_tail(worker_dir / "stderr.txt"))
+    report["_stdout"] = "\n".join(stdout_parts)
+    report["_stderr"] = "\n".join(p for p in stderr_parts if p)
+    report["_returncode"] = max(returncodes)
+    print(f"  ⏱️  Parallel phase finished in {wall_time:.1f}s")
+
     return report
 
 
@@ -169,16 +529,54 @@ def _format_failure(test: dict) -> str:
     return f"### `{node}`\n```\n{longrepr}\n```"
 
 
-async def run_fix_agent(failures: list[dict]) -> str:
+def _format_cluster(cluster: FailureCluster) -> str:
+    """One representative traceback per cluster plus every test that fails the same way."""
+    block = _format_failure(cluster.representative)
+    if len(cluster.tests) == 1:
+        return block
+    others = "\n".join(f"- `{nodeid}`" for nodeid in cluster.nodeids[1:])
+    return (f"{block}\n\nSame failure ({cluster.title()}) in {len(cluster.tests) - 1} more test(s):\n{others}")
+
+
+_EDIT_TOOLS = {"Write", "Edit", "MultiEdit", "NotebookEdit"}
+
+
+def _relpath(path: str) -> str:
+    try:
+        return Path(path).resolve().relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return path
+
+
+def _fixes_summary_lines(text: str) -> list[str]:
+    """Bullet lines of the FIXES_SUMMARY block at the end of an agent's answer."""
+    _, marker, tail = text.rpartition("FIXES_SUMMARY:")
+    if not marker:
+        return []
+    return [line.strip() for line in tail.splitlines() if line.strip().startswith("- ")]
+
+
+async def _run_agent(failures: list[dict], scope: set[str] | None = None,
+                     others: list[set[str]] | None = None) -> tuple[str, set[str]]:
     """
-    Spawn a Claude Agent SDK agent to analyse and fix the failing tests.
-    Returns the agent's final result text (includes FIXES_SUMMARY).
+    Run one fix agent on `failures`. Returns (result text, project files it
+    edited through Write/Edit tools — edits made via Bash are not visible).
     """
-    failure_blocks = "\n\n".join(_format_failure(t) for t in failures)
+    clusters = cluster_failures(failures)
+    failure_blocks = "\n\n".join(_format_cluster(c) for c in clusters)
+    scope_note = ""
+    if others:
+        busy = sorted(set().union(*others))
+        scope_note = (
+            f"\nOther agents are fixing other failures at the same time. Keep your edits to the files these "
+            f"failures involve ({', '.join(sorted(scope or []))}) and the code they need; do NOT edit files "
+            f"owned by the other agents: {', '.join(busy)}.\n"
+        )
 
-    prompt = f"""The following {len(failures)} test(s) are currently failing.
+    prompt = f"""The following {len(failures)} test(s) are currently failing, in {len(clusters)} distinct way(s).
+Tests that fail the same way are listed under one representative traceback.
 Analyse each failure, identify the root cause, and apply the minimal fix.
-
+{scope_note}
 ---
 
 {failure_blocks}
@@ -190,6 +588,7 @@ Then apply your fixes and finish with a FIXES_SUMMARY block.
 """
 
     result_text = ""
+    edited: set[str] = set()
     async for message in query(
         prompt=prompt,
         options=ClaudeAgentOptions(
@@ -201,24 +600,202 @@ Then apply your fixes and finish with a FIXES_SUMMARY block.
             max_turns=50,
         ),
     ):
-        if isinstance(message, ResultMessage):
-            result_text = message.result
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, ToolUseBlock) and block.name in _EDIT_TOOLS:
+                    path = block.input.get("file_path") or block.input.get("notebook_path")
+                    if path:
+                        edited.add(_relpath(path))
+        elif isinstance(message, ResultMessage):
+            result_text = message.result or ""
+
+    return result_text, edited
+
 
-    return result_text
+async def run_fix_agent(failures: list[dict], max_agents: int | None = None,
+                        edited_by_test: dict[str, set[str]] | None = None,
+                        failed_nodeids: set[str] | None = None) -> str:
+    """
+    Spawn Claude Agent SDK agents to analyse and fix the failing tests.
+
+    Failures are partitioned into independent groups (partition_failures) and
+    each group gets its own agent; up to `max_agents` (<fixAgents> in data.xml)
+    run concurrently. Files edited by more than one agent are flagged.
+    If `edited_by_test` is given it is filled with nodeid → files edited by the
+    agent that handled that test, and `failed_nodeids` with the tests whose
+    agent crashed (an SDK or network error says nothing about the failure).
+    Returns one merged result text ending in a single FIXES_SUMMARY block.
+    """
+    if max_agents is None:
+        max_agents = int(load_config(reload=True).get("fix_agents", 1) or 1)
+    if edited_by_test is None:
+        edited_by_test = {}
+    if failed_nodeids is None:
+        failed_nodeids = set()
+    groups = partition_failures(failures)
+    if len(groups) == 1 or max_agents <= 1:
+        text, edited = await _run_agent(failures)
+        edited_by_test.update({t["nodeid"]: edited for t in failures})
+        return text
+
+    print(f"   → {len(groups)} independent failure group(s), up to {max_agents} agent(s) at once")
+    limiter = anyio.CapacityLimiter(max_agents)
+    results: list[tuple[str, set[str]] | None] = [None] * len(groups)
+
+    async def _one(index: int) -> None:
+        members, scope = groups[index]
+        others = [files for i, (_, files) in enumerate(groups) if i != index]
+        async with limiter:
+            print(f"   🤖 Agent {index + 1}: {len(members)} failure(s) in {', '.join(sorted(scope))}")
+            try:
+                results[index] = await _run_agent(members, scope, others)
+            except Exception as exc:
+                print(f"   ⚠️  Agent {index + 1} error: {exc}")
+                results[index] = (f"⚠️ Agent failed: {exc}", set())
+                failed_nodeids.update(t["nodeid"] for t in members)
+
+    async with anyio.create_task_group() as tg:
+        for index in range(len(groups)):
+            tg.start_soon(_one, index)
+
+    editors: dict[str, list[int]] = {}
+    for index, (_, edited) in enumerate(results):
+        edited_by_test.update({t["nodeid"]: edited for t in groups[index][0]})
+        for path in edited:
+            editors.setdefault(path, []).append(index + 1)
+    overlaps = {path: agents for path, agents in editors.items() if len(agents) > 1}
+
+    sections, summary_lines = [], []
+    for index, (text, edited) in enumerate(results):
+        lines = _fixes_summary_lines(text)
+        summary_lines.extend(lines)
+        members, _ = groups[index]
+        edited_note = ", ".join(f"`{p}`" for p in sorted(edited)) or "none"
+        sections.append(f"**Agent {index + 1}** — {len(members)} failure(s), edited: {edited_note}")
+        if not lines:
+            sections.append(text.strip()[-1500:] or "(no output)")
+    if overlaps:
+        sections.append("⚠️ **Overlapping edits — review these files manually:**")
+        sections.extend(f"- `{path}` edited by agents {', '.join(map(str, agents))}"
+                        for path, agents in sorted(overlaps.items()))
+        print(f"   ⚠️  {len(overlaps)} file(s) edited by more than one agent: {', '.join(sorted(overlaps))}")
+
+    return "\n\n".join(sections) + "\n\nFIXES_SUMMARY:\n" + "\n".join(summary_lines)
+
+
+def _load_fix_cache() -> FixCache | None:
+    """The fix-outcome cache, or None when disabled (<fixCache>) or outside a git checkout."""
+    cfg = load_config(reload=True)
+    if not cfg.get("fix_cache", True):
+        return None
+    if git(PROJECT_ROOT, "rev-parse", "--is-inside-work-tree").returncode != 0:
+        print("   ℹ️  Not a git checkout — fix cache disabled")
+        return None
+    return FixCache.load(PROJECT_ROOT, ttl_days=cfg.get("fix_cache_ttl_days", 14))
+
+
+async def _fix_failures(failures: list[dict], fix_agents: int | None, cache: FixCache | None,
+                        run_id: str) -> tuple[str, list[dict]]:
+    """
+    Look every failure cluster up in the fix cache before launching agents:
+      - cached "fixed"   → reapply the verified patch (if it still applies)
+      - cached "unfixed" → skip, pointing to the run that already tried
+    Everything else goes to run_fix_agent.
+
+    Returns (fix summary, attempts); attempts are passed to
+    _record_fix_outcomes once the re-run has verified them.
+    """
+    attempts: list[dict] = []
+    to_agent: list[dict] = []
+    notes: list[str] = []
+    for cluster in cluster_failures(failures):
+        files = set().union(*(failure_scope(t) for t in cluster.tests))
+        key = cache.key(cluster.key, files) if cache else ""
+        entry = cache.get(key) if cache else None
+        attempt = {"key": key, "nodeids": cluster.nodeids, "source": "agent", "scope": files,
+                   "edited": set(), "diff": ""}
+        count = f"{len(cluster.tests)} test(s)"
+        if entry and entry["outcome"] == "fixed" and cache.apply(entry["diff"]):
+            attempt["source"] = "cache"
+            notes.append(f"- ♻️ {cluster.title()} ({count}): reapplied the fix verified in run {entry['run_id']}")
+        elif entry and entry["outcome"] == "unfixed":
+            attempt["source"] = "skipped"
+            notes.append(f"- ⏭️ {cluster.title()} ({count}): skipped — run {entry['run_id']} could not fix it "
+                         f"and the involved files are unchanged")
+        else:
+            to_agent.extend(cluster.tests)
+        attempts.append(attempt)
+    if notes:
+        print(f"   → Fix cache: {len(notes)} cluster(s) resolved without an agent")
+
+    summary = ""
+    if to_agent:
+        edited_by_test: dict[str, set[str]] = {}
+        crashed: set[str] = set()
+        base = cache.baseline() if cache else ""
+        try:
+            summary = await run_fix_agent(to_agent, fix_agents, edited_by_test, crashed)
+        except Exception as exc:
+            print(f"   ⚠️  Agent error: {exc} — continuing without fixes")
+            summary = f"⚠️ Agent failed: {exc}"
+            for attempt in attempts:  # an agent crash says nothing about the failure: do not cache it
+                if attempt["source"] == "agent":
+                    attempt["source"] = "error"
+        for attempt in attempts:  # same for one crashed agent among several
+            if attempt["source"] == "agent" and crashed.intersection(attempt["nodeids"]):
+                attempt["source"] = "error"
+        agent_attempts = [a for a in attempts if a["source"] == "agent"]
+        for attempt in agent_attempts:
+            edited = set().union(*(edited_by_test.get(n, set()) for n in attempt["nodeids"]))
+            attempt["edited"] = edited & attempt["scope"]
+        # Snapshot each cluster's patch now, before later batches touch the same
+        # files; a file edited for several clusters (one agent handling them all,
+        # or shared page objects) cannot be attributed, so its clusters get none.
+        claims = Counter(f for a in agent_attempts for f in a["edited"])
+        for attempt in agent_attempts:
+            if cache and attempt["edited"] and all(claims[f] == 1 for f in attempt["edited"]):
+                attempt["diff"] = cache.diff(attempt["edited"], base)
+    if notes:
+        summary = "Fix cache:\n" + "\n".join(notes) + (f"\n\n{summary}" if summary else "")
+    return summary, attempts
+
+
+def _record_fix_outcomes(cache: FixCache | None, attempts: list[dict], final_report: dict, run_id: str,
+                         summary: str) -> None:
+    """Store verified outcomes: a cluster counts as fixed when all of its tests passed the re-run."""
+    if cache is None or not attempts:
+        return
+    outcomes = {t["nodeid"]: t.get("outcome") for t in final_report.get("tests", [])}
+    stored = 0
+    for attempt in attempts:
+        fixed = all(outcomes.get(n) == "passed" for n in attempt["nodeids"])
+        if attempt["source"] == "cache" and not fixed:
+            cache.invalidate(attempt["key"])  # the patch no longer fixes it — let an agent retry next time
+        elif attempt["source"] == "agent":
+            diff = attempt["diff"] if fixed else ""
+            if fixed and diff:
+                cache.put(attempt["key"], "fixed", diff=diff, summary=summary, run_id=run_id,
+                          nodeids=attempt["nodeids"])
+                stored += 1
+            elif not fixed:
+                cache.put(attempt["key"], "unfixed", summary=summary, run_id=run_id, nodeids=attempt["nodeids"])
+                stored += 1
+    try:
+        cache.save()
+    except OSError as exc:
+        print(f"   ⚠️  Could not update fix cache: {exc}")
+        return
+    if stored:
+        print(f"   → Fix cache: stored {stored} outcome(s)")
 
 
 # ---------------------------------------------------------------------------
 # Step 3 — Generate Markdown report
 # ---------------------------------------------------------------------------
 
-def _outcomes(report: dict) -> tuple[int, int, int, int]:
-    """Return (passed, failed, error, skipped) counts from a pytest JSON report."""
-    tests = report.get("tests", [])
-    passed = sum(1 for t in tests if t.get("outcome") == "passed")
-    failed = sum(1 for t in tests if t.get("outcome") == "failed")
-    error = sum(1 for t in tests if t.get("outcome") == "error")
-    skipped = sum(1 for t in tests if t.get("outcome") == "skipped")
-    return passed, failed, error, skipped
+def _report_tests(report: dict, path: Path) -> Iterator[dict]:
+    """Tests of a report, streamed from its file on disk when there is one."""
+    return iter_report_tests(path) if path.exists() else iter(report.get("tests", []))
 
 
 def generate_report(
@@ -227,159 +804,67 @@ def generate_report(
     final_report: dict,
     fix_summary: str,
     run_dir: Path,
+    quarantine: list[dict] | None = None,
 ) -> Path:
-    """Write a Markdown report and return its path."""
-
-    i_pass, i_fail, i_err, i_skip = _outcomes(initial_report)
-    f_pass, f_fail, f_err, f_skip = _outcomes(final_report)
-
-    initial_failures = [
-        t for t in initial_report.get("tests", [])
-        if t.get("outcome") in ("failed", "error")
-    ]
-    final_failures = [
-        t for t in final_report.get("tests", [])
-        if t.get("outcome") in ("failed", "error")
-    ]
-    final_failure_ids = {t["nodeid"] for t in final_failures}
-
-    fixed_count = len(initial_failures) - len(final_failures)
-    still_failing = len(final_failures)
-
-    if still_failing == 0:
-        status_badge = "✅ ALL PASSING"
-    else:
-        status_badge = f"⚠️ {still_failing} STILL FAILING"
-
-    duration = final_report.get("duration", initial_report.get("duration", 0))
-
-    lines: list[str] = [
-        f"# Automated Test Report — {run_id}",
-        "",
-        f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  ",
-        f"**Status:** {status_badge}  ",
-        f"**Duration:** {duration:.1f}s",
-        "",
-        "---",
-        "",
-        "## Summary",
-        "",
-        "| Metric | Before | After |",
-        "|--------|--------|-------|",
-        f"| ✅ Passed  | {i_pass} | {f_pass} |",
-        f"| ❌ Failed  | {i_fail} | {f_fail} |",
-        f"| 💥 Error   | {i_err}  | {f_err}  |",
-        f"| ⏭️ Skipped | {i_skip} | {f_skip} |",
-        f"| 🔧 Fixed   | —      | {fixed_count} |",
-        "",
-    ]
-
-    # ── Collection errors ────────────────────────────────────────────────
-    collection_errors = initial_report.get("errors", [])
-    total_tests = i_pass + i_fail + i_err + i_skip
-    if collection_errors or total_tests == 0:
-        lines += [
-            "---",
-            "",
-            "## Collection Errors / No Tests Found",
-            "",
-        ]
-        if collection_errors:
-            for err in collection_errors:
-                where = err.get("nodeid") or err.get("when") or "unknown"
-                longrepr = err.get("longrepr", "") or ""
-                if len(longrepr) > 1500:
-                    longrepr = longrepr[:1500] + "\n... (truncated)"
-                lines += [f"### `{where}`", "", "```", longrepr, "```", ""]
-        else:
-            stdout = (initial_report.get("_stdout", "") or "").strip()
-            stderr = (initial_report.get("_stderr", "") or "").strip()
-            lines += ["Pytest reported 0 tests. See raw output below:", ""]
-            if stdout:
-                lines += ["**stdout:**", "```", stdout[:2000], "```", ""]
-            if stderr:
-                lines += ["**stderr:**", "```", stderr[:2000], "```", ""]
-
-    # ── Initial failures detail ──────────────────────────────────────────
-    if initial_failures:
-        lines += [
-            "---",
-            "",
-            f"## Initial Failures ({len(initial_failures)})",
-            "",
-        ]
-        for t in initial_failures:
-            was_fixed = t["nodeid"] not in final_failure_ids
-            badge = "FIXED ✅" if was_fixed else "STILL FAILING ❌"
-            lines += [f"### `{t['nodeid']}` — {badge}", ""]
-
-            longrepr = (t.get("call") or {}).get("longrepr", "")
-            if longrepr:
-                if len(longrepr) > 1200:
-                    longrepr = longrepr[:1200] + "\n... (truncated)"
-                lines += ["```", longrepr, "```", ""]
-
-    # ── Agent fix summary ────────────────────────────────────────────────
-    if fix_summary:
-        lines += [
-            "---",
-            "",
-            "## Agent Fix Summary",
-            "",
-            fix_summary.strip(),
-            "",
-        ]
-
-    # ── Remaining failures ───────────────────────────────────────────────
-    if final_failures:
-        lines += [
-            "---",
-            "",
-            f"## Remaining Failures ({len(final_failures)})",
-            "",
-        ]
-        for t in final_failures:
-            lines += [f"### `{t['nodeid']}`", ""]
-            longrepr = (t.get("call") or {}).get("longrepr", "")
-            if longrepr:
-                if len(longrepr) > 1000:
-                    longrepr = longrepr[:1000] + "\n... (truncated)"
-                lines += ["```", longrepr, "```", ""]
-
-    # ── Artifacts ────────────────────────────────────────────────────────
-    lines += [
-        "---",
-        "",
-        "## Artifacts",
-        "",
-        f"- Run directory: `{run_dir}`",
-        f"- Initial JSON report: `{run_dir / 'initial' / 'report.json'}`",
-        f"- Final JSON report:   `{run_dir / 'after_fix' / 'report.json'}`",
-        f"- Screenshots: `{run_dir / 'after_fix' / 'screenshots/'}`",
-        "",
-    ]
-
-    report_text = "\n".join(lines)
-    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-    report_path = REPORTS_DIR / f"report_{run_id}.md"
-    report_path.write_text(report_text, encoding="utf-8")
-    return report_path
+    """
+    Write a Markdown report (plus HTML / JSON summaries per <reportFormats>)
+    and return its path. Results are folded in one pass with per-section
+    caps (<reportMaxFailures>), see utilities/report_writer; they are read
+    one test at a time from initial/ and after_fix/report.json. `quarantine`
+    rows (score + lane outcome per test) get their own section.
+    """
+    cfg = load_config(reload=True)
+    max_failures = int(cfg.get("report_max_failures", 100) or 100)
+    writer = ReportWriter(run_id, run_dir, max_failures=max_failures, max_clusters=max_failures)
+    writer.add_initial(_report_tests(initial_report, run_dir / "initial" / "report.json"))
+    if final_report is not initial_report:
+        writer.add_final(_report_tests(final_report, run_dir / "after_fix" / "report.json"))
+    paths = writer.write(REPORTS_DIR / f"report_{run_id}.md", initial_report, final_report, fix_summary,
+                         formats=cfg.get("report_formats", ["md"]), quarantine=quarantine)
+    for fmt, path in paths.items():
+        if fmt != "md":
+            print(f"   → {path}")
+    return paths["md"]
 
 
 # ---------------------------------------------------------------------------
 # AI report analysis
 # ---------------------------------------------------------------------------
 
-def analyze_report_with_claude(report_path: Path) -> str:
+def _load_analysis_cache() -> AnalysisCache | None:
+    cfg = load_config(reload=True)
+    if not cfg.get("analysis_cache", True):
+        return None
+    return AnalysisCache.load(ttl_days=cfg.get("analysis_cache_ttl_days", 7),
+                              max_entries=cfg.get("analysis_cache_max_entries", 50))
+
+
+def analyze_report_with_claude(report_path: Path, initial_report: dict | None = None,
+                               final_report: dict | None = None, run_id: str = "") -> str:
     """
     Send the test report to Claude Sonnet for analysis.
     Returns the analysis text, or empty string on error / missing key.
+
+    Given the JSON reports, an earlier analysis of a run with the same
+    outcomes and failure signatures (see utilities/analysis_cache) is reused
+    instead of calling the API.
     """
     api_key = os.environ.get("ANTHROPIC_API_KEY", "").strip()
     if not api_key:
         print("   ℹ️  AI analysis: no ANTHROPIC_API_KEY — skipping")
         return ""
 
+    cache = _load_analysis_cache() if initial_report is not None else None
+    key = fingerprint(initial_report, final_report if final_report is not None else initial_report) if cache else ""
+    if cache:
+        entry = cache.get(key)
+        if entry:
+            _save_analysis_cache(cache)
+            print(f"   ♻️  AI analysis: unchanged results — reusing the analysis of run {entry['run_id']} "
+                  f"(saved 1 API call, {entry['seconds']:.1f}s; total saved: {cache.stats['hits']} call(s), "
+                  f"{cache.stats['saved_seconds']:.0f}s)")
+            return entry["analysis"]
+
     report_text = report_path.read_text(encoding="utf-8")
     if len(report_text) > 15_000:
         report_text = report_text[:15_000] + "\n... (truncated)"
@@ -396,6 +881,7 @@ def analyze_report_with_claude(report_path: Path) -> str:
         f"Test Report:\n{report_text}"
     )
 
+    started = time.monotonic()
     try:
         resp = requests.post(
             "https://api.anthropic.com/v1/messages",
@@ -412,22 +898,37 @@ def analyze_report_with_claude(report_path: Path) -> str:
             timeout=30,
         )
         resp.raise_for_status()
-        return resp.json()["content"][0]["text"]
+        analysis = resp.json()["content"][0]["text"]
     except Exception as exc:
         print(f"   ⚠️  AI analysis: API error — {exc}")
         return ""
 
+    if cache and analysis:
+        cache.put(key, analysis, run_id=run_id, seconds=time.monotonic() - started)
+        _save_analysis_cache(cache)
+    return analysis
+
+
+def _save_analysis_cache(cache: AnalysisCache) -> None:
+    try:
+        cache.save()
+    except OSError as exc:
+        print(f"   ⚠️  Could not update analysis cache: {exc}")
+
 
 # ---------------------------------------------------------------------------
 # Telegram notifications
 # ---------------------------------------------------------------------------
 
-def send_telegram(report_path: Path, initial_report: dict, final_report: dict, analysis: str = "") -> None:
+async def send_telegram(report_path: Path, initial_report: dict, final_report: dict, analysis: str = "",
+                        quarantined: int = 0) -> None:
     """
     Send a summary message + the report file to Telegram.
-    Reads TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID from environment.
+    Reads TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID from environment
+    (TELEGRAM_API_URL overrides the Bot API endpoint, e.g. a local fake).
     Silently skips if either value is missing.
     Uses HTML parse mode (simpler and more reliable than MarkdownV2).
+    Undelivered messages are queued and retried on the next run (TelegramNotifier).
     """
     token = os.environ.get("TELEGRAM_BOT_TOKEN", "").strip()
     chat_id = os.environ.get("TELEGRAM_CHAT_ID", "").strip()
@@ -435,8 +936,6 @@ def send_telegram(report_path: Path, initial_report: dict, final_report: dict, a
         print("   ℹ️  Telegram: no credentials — skipping notification")
         return
 
-    base_url = f"https://api.telegram.org/bot{token}"
-
     # ── Build summary text (HTML) ─────────────────────────────────────────
     def counts(report):
         tests = report.get("tests", [])
@@ -463,63 +962,315 @@ def send_telegram(report_path: Path, initial_report: dict, final_report: dict, a
         f"🔧 Fixed:   {fixed}\n"
         f"📊 Total:   {total}"
     )
+    retried = (initial_report.get("retries") or {}).get("passed_on_retry", 0)
+    if retried:
+        message += f"\n🔁 Passed on retry: {retried}"
+    if quarantined:
+        message += f"\n🧪 Quarantined (flaky, see report): {quarantined}"
 
-    # ── 1. Send the summary message ───────────────────────────────────────
-    try:
-        resp = requests.post(
-            f"{base_url}/sendMessage",
-            json={"chat_id": chat_id, "text": message, "parse_mode": "HTML"},
-            timeout=15,
-        )
-        resp.raise_for_status()
-        print("   ✅ Telegram: summary sent")
-    except Exception as exc:
-        print(f"   ⚠️  Telegram: failed to send message — {exc}")
-        return
+    safe_analysis = analysis.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    analysis_msg = f"<b>🧠 AI Analysis</b>\n\n{safe_analysis}" if analysis else ""
 
-    # ── 2. Send the AI analysis (if available) ────────────────────────────
-    if analysis:
-        safe_analysis = analysis.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        analysis_msg = f"<b>🧠 AI Analysis</b>\n\n{safe_analysis}"
-        try:
-            resp = requests.post(
-                f"{base_url}/sendMessage",
-                json={"chat_id": chat_id, "text": analysis_msg, "parse_mode": "HTML"},
-                timeout=15,
-            )
-            resp.raise_for_status()
-            print("   ✅ Telegram: AI analysis sent")
-        except Exception as exc:
-            print(f"   ⚠️  Telegram: failed to send AI analysis — {exc}")
-
-    # ── 3. Send the full report file ──────────────────────────────────────
-    try:
-        with open(report_path, "rb") as fh:
-            resp = requests.post(
-                f"{base_url}/sendDocument",
-                data={"chat_id": chat_id, "caption": "Full report"},
-                files={"document": (report_path.name, fh, "text/markdown")},
-                timeout=30,
-            )
-        resp.raise_for_status()
-        print("   ✅ Telegram: report file sent")
-    except Exception as exc:
-        print(f"   ⚠️  Telegram: failed to send file — {exc}")
+    api_url = os.environ.get("TELEGRAM_API_URL", "").strip()
+    async with TelegramNotifier(token, chat_id, api_url=api_url) as notifier:
+        await notifier.notify(message, analysis_msg, report_path)
 
 
 # ---------------------------------------------------------------------------
 # Main cycle
 # ---------------------------------------------------------------------------
 
-async def run_cycle(marker: str | None = None, ai_fix: bool = False, ai_analysis: bool = False) -> Path:
+def _run_preflight() -> None:
+    """
+    Refresh the environment preflight once per cycle. Every pytest process of
+    this cycle (workers, re-runs) then reads the cached result instead of
+    probing the network itself.
+    """
+    cfg = load_config(reload=True)
+    results = Preflight(cfg, ttl=cfg.get("preflight_ttl", 300)).run(force=True)
+    status = "  ".join(f"{name} {'✅' if r.get('ok') else '❌'}" for name, r in results.items())
+    print(f"\n🩺 Preflight: {status}")
+    for name, r in results.items():
+        if not r.get("ok"):
+            print(f"   ⚠️  {name}: {r.get('detail')}")
+
+
+# ── Impact analysis ──────────────────────────────────────────────────────
+
+def _plan_impact(ref: str) -> list[str] | None:
+    """
+    Nodeids affected by the changes since `ref`, plus the smoke set (see
+    utilities.impact_analysis). None means run everything.
+    """
+    try:
+        plan = ImpactAnalyzer().plan(ref)
+    except (RuntimeError, OSError) as exc:
+        print(f"   ⚠️  Impact analysis failed, running everything: {exc}")
+        return None
+    print(f"\n🎯 Impact since {ref}: {len(plan['changed_files'])} changed file(s), "
+          f"planned in {plan['seconds']:.2f}s")
+    if plan["full_run"]:
+        print(f"   → full run: {plan['full_run']}")
+        return None
+    if not plan["selected"]:
+        print("   → nothing affected and no smoke tests — running everything")
+        return None
+    print(f"   → {len(plan['selected'])}/{plan['total']} test(s): "
+          f"{len(plan['affected'])} affected + {len(plan['smoke'])} smoke")
+    return plan["selected"]
+
+
+# Seconds to keep collecting failures after the first one before a fix agent starts
+PIPELINE_SETTLE_SEC = 10
+
+
+async def _run_pipelined(run_dir: Path, marker: str | None, workers: int,
+                         fix_agents: int | None = None, deselect: list[str] | None = None,
+                         nodeids: list[str] | None = None, peers: int = 0) -> tuple[dict, dict, str]:
+    """
+    Run the suite with the fix agent pipelined on its failures.
+
+    Failures stream in from the reportlog while the suite is still running.
+    The first one opens a batch, which keeps collecting for PIPELINE_SETTLE_SEC
+    and then goes to a fix agent. Failures arriving while that agent works form
+    the next batch (a follow-up agent). As soon as an agent finishes, its
+    batch is re-run in after_fix/batch_N, in the background, while later
+    agents keep working. Re-runs go one at a time as worker "batch<N>" and
+    count as one extra process (besides `peers`) in every TEST_WORKER_COUNT,
+    so they neither share cassette sessions with the suite nor overdraw the
+    rate-limit budget.
+
+    pytest imports test modules and page objects at collection, so edits the
+    agent makes do not change tests that are already running in the
+    initial session; they only affect the re-runs.
+
+    Returns (initial_report, final_report, fix_summary); final_report merges
+    the batch re-runs and is also written to after_fix/report.json.
+    """
+    send, receive = anyio.create_memory_object_stream(math.inf)
+    cache = _load_fix_cache()
+    attempts: list[dict] = []
+    initial: dict = {}
+    batches: list[tuple[int, list[dict], str]] = []
+    reruns: list[dict] = []
+    rerun_lock = anyio.Lock()
+    suite_running = True
+    started = time.monotonic()
+
+    async with BlockingPortal() as portal:
+
+        def on_result(result: dict) -> None:  # reportlog thread
+            if result["outcome"] in ("failed", "error"):
+                portal.call(send.send, result)
+
+        async def run_suite() -> None:
+            nonlocal initial, suite_running
+            async with send:
+                initial = await anyio.to_thread.run_sync(
+                    lambda: run_pytest(run_dir / "initial", nodeids=nodeids, marker=marker, workers=workers,
+                                       on_result=on_result, deselect=deselect, peers=peers + 1))
+            suite_running = False
+
+        async def rerun(index: int, failures: list[dict]) -> None:
+            nodeids = [t["nodeid"] for t in failures]
+            async with rerun_lock:
+                print(f"\n🔄 Re-running batch {index} ({len(nodeids)} test(s)) …")
+                # while the suite runs the re-run is its single extra process; afterwards it may shard
+                shards = 1 if suite_running else workers
+                rerun_peers = peers + (workers if suite_running else 0)
+                report = await anyio.to_thread.run_sync(
+                    lambda: run_pytest(run_dir / "after_fix" / f"batch_{index}", nodeids=nodeids, workers=shards,
+                                       worker_id=f"batch{index}", peers=rerun_peers))
+            reruns.append(report)
+
+        async def fix_batches(tg: anyio.abc.TaskGroup) -> None:
+            index = 0
+            async with receive:
+                async for first in receive:
+                    batch = [first]
+                    with anyio.move_on_after(PIPELINE_SETTLE_SEC):
+                        async for more in receive:
+                            batch.append(more)
+                    # failures already queued while we settled join this batch too
+                    while True:
+                        try:
+                            batch.append(receive.receive_nowait())
+                        except (anyio.WouldBlock, anyio.EndOfStream):
+                            break
+                    index += 1
+                    print(f"\n🔧 Fix agent {index} — {len(batch)} failure(s), suite still running …")
+                    summary, batch_attempts = await _fix_failures(batch, fix_agents, cache, run_dir.name)
+                    attempts.extend(batch_attempts)
+                    batches.append((index, batch, summary))
+                    tg.start_soon(rerun, index, batch)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(run_suite)
+            tg.start_soon(fix_batches, tg)
+
+    # Failures the stream missed (e.g. reportlog unavailable) get one last serial pass
+    seen = {t["nodeid"] for _, batch, _ in batches for t in batch}
+    missed = [t for t in initial.get("tests", [])
+              if t.get("outcome") in ("failed", "error") and t["nodeid"] not in seen]
+    if missed:
+        index = len(batches) + 1
+        print(f"\n🔧 Fix agent {index} — {len(missed)} failure(s) not seen while streaming …")
+        summary, batch_attempts = await _fix_failures(missed, fix_agents, cache, run_dir.name)
+        attempts.extend(batch_attempts)
+        batches.append((index, missed, summary))
+        await rerun(index, missed)
+
+    if not batches:
+        return initial, initial, ""
+
+    final = _merge_reports(reruns, time.monotonic() - started)
+    after_fix = run_dir / "after_fix"
+    after_fix.mkdir(parents=True, exist_ok=True)
+    _write_merged_report(after_fix / "report.json", final,
+                         [after_fix / f"batch_{index}" / "report.json" for index, _, _ in batches])
+
+    fix_summary = "\n\n".join(
+        f"### Agent {index} ({len(batch)} failure(s))\n\n{summary.strip()}" for index, batch, summary in batches
+    )
+    _record_fix_outcomes(cache, attempts, final, run_dir.name, fix_summary)
+    return initial, final, fix_summary
+
+
+# ── Quarantine lane ──────────────────────────────────────────────────────
+
+def _load_flakiness() -> FlakinessEngine | None:
+    """Flakiness scores from the run history, or None when <quarantine> is off."""
+    cfg = load_config(reload=True)
+    if not cfg.get("quarantine", True):
+        return None
+    try:
+        with RunHistory.open() as history:
+            return FlakinessEngine.from_history(history, window=cfg.get("flaky_window", 30),
+                                                threshold=cfg.get("flaky_threshold", 0.6))
+    except sqlite3.Error as exc:
+        print(f"   ⚠️  Could not read run history for flakiness scores: {exc}")
+        return None
+
+
+class _QuarantineLane:
+    """
+    Runs known-flaky tests in their own pytest process next to the main suite.
+    Failures get one immediate retry (run_dir/quarantine/retry); passing there
+    is recorded as flakiness evidence. Nothing here affects the cycle's status,
+    the fix agent or the re-run.
+
+    The lane is worker "quarantine": its own cassette session and auth-state
+    files, and one share of the rate-limit budget next to the main run's
+    `workers` processes.
+    """
+
+    WORKER_ID = "quarantine"
+
+    def __init__(self, run_dir: Path, nodeids: list[str], marker: str | None, workers: int = 1):
+        self.run_dir = run_dir
+        # tests deleted or renamed since they were scored would make pytest abort the lane
+        self.nodeids = [n for n in nodeids if (PROJECT_ROOT / n.split("::")[0]).exists()]
+        self.marker = marker
+        self.workers = max(1, workers)
+        self.report: dict = {}
+        self.retry_report: dict = {}
+        self._thread = threading.Thread(target=self._run, name="quarantine-lane", daemon=True)
+
+    def start(self) -> "_QuarantineLane":
+        if self.nodeids:
+            self._thread.start()
+        return self
+
+    @property
+    def peers(self) -> int:
+        """Pytest processes the lane adds next to the main run (for TEST_WORKER_COUNT)."""
+        return 1 if self.nodeids else 0
+
+    def join(self) -> "_QuarantineLane":
+        if self._thread.is_alive():
+            print("\n⏳ Waiting for the quarantine lane …")
+            self._thread.join()
+        return self
+
+    def _run(self) -> None:
+        try:
+            self.report = run_pytest(self.run_dir / "quarantine", nodeids=self.nodeids, marker=self.marker,
+                                     worker_id=self.WORKER_ID, peers=self.workers)
+            failed = [t["nodeid"] for t in self.report.get("tests", []) if t.get("outcome") in ("failed", "error")]
+            if failed:
+                self.retry_report = run_pytest(self.run_dir / "quarantine" / "retry", nodeids=failed,
+                                               worker_id=self.WORKER_ID, peers=self.workers)
+        except Exception as exc:  # the lane must never break the cycle
+            print(f"   ⚠️  Quarantine lane error: {exc}")
+
+    def rows(self, engine: FlakinessEngine) -> list[dict]:
+        """Per quarantined test: its score and tonight's lane outcome (for the report)."""
+        first = {t["nodeid"]: t.get("outcome") for t in self.report.get("tests", [])}
+        retried = {t["nodeid"] for t in self.report.get("tests", [])
+                   if len((t.get("metadata") or {}).get("attempts") or []) > 1}
+        retry = {t["nodeid"]: t.get("outcome") for t in self.retry_report.get("tests", [])}
+        rows = []
+        for nodeid in self.nodeids:
+            outcome = first.get(nodeid, "not run")
+            if outcome == "passed" and nodeid in retried:
+                outcome = "passed on retry"
+            elif outcome in ("failed", "error") and retry.get(nodeid) == "passed":
+                outcome = "passed on retry"
+            rows.append({"nodeid": nodeid, **engine.scores.get(nodeid, {}), "outcome": outcome})
+        return rows
+
+
+def _record_history(run_id: str, initial_report: dict, final_report: dict, marker: str | None,
+                    extra_phases: dict[str, dict] | None = None) -> None:
+    """Append this cycle to the SQLite run history (python -m utilities.run_history to query it)."""
+    try:
+        with RunHistory.open() as history:
+            history.record_run(run_id, initial_report, final_report, marker=marker, extra_phases=extra_phases)
+    except (sqlite3.Error, OSError) as exc:
+        print(f"   ⚠️  Could not update run history: {exc}")
+
+
+def _record_durations(report: dict) -> None:
+    """Feed per-test durations back into the history used for shard planning."""
+    try:
+        history = DurationHistory.load()
+        if history.record(report):
+            history.save()
+    except OSError as exc:
+        print(f"   ⚠️  Could not update duration history: {exc}")
+
+
+async def run_cycle(
+    marker: str | None = None,
+    ai_fix: bool = False,
+    ai_analysis: bool = False,
+    workers: int | None = None,
+    pipeline: bool = False,
+    fix_agents: int | None = None,
+    quarantine: bool = True,
+    changed_since: str | None = None,
+) -> Path:
     """
     Execute one full cycle:
       run → (fix with AI if failures + ai_fix=True) → re-run → report
 
+    With pipeline=True (and ai_fix) the fix agent starts on the first failures
+    while the suite is still running, and re-runs overlap with later agents
+    (see _run_pipelined).
+
     The report is always generated, regardless of whether AI fixing is enabled
     or whether the API key is present.
+    `workers` overrides <workers> from data.xml (1 = serial), `fix_agents`
+    overrides <fixAgents> (concurrent fix agents). quarantine=False runs
+    known-flaky tests in the main suite like any other test. `changed_since`
+    (a git ref) limits the run to the tests affected since then plus the
+    smoke set.
     Returns the path to the generated Markdown report.
     """
+    if workers is None:
+        workers = int(load_config(reload=True).get("workers", 1) or 1)
+    workers = max(1, workers)
+
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
     run_dir = TEST_RUNS_DIR / run_id
     run_dir.mkdir(parents=True, exist_ok=True)
@@ -529,12 +1280,42 @@ async def run_cycle(marker: str | None = None, ai_fix: bool = False, ai_analysis
     print(f"  🚀  Test Run: {run_id}" + (f"  [-m {marker}]" if marker else ""))
     print(f"  AI fix:      {'enabled' if ai_fix else 'disabled'}")
     print(f"  AI analysis: {'enabled' if ai_analysis else 'disabled'}")
+    print(f"  Workers:     {workers}")
+    if ai_fix and pipeline:
+        print("  Pipeline:    fix agent starts on early failures")
     print(sep)
     check_dependencies()
+    _run_preflight()
+
+    # ── Impact analysis: only tests affected by the changes since a ref ──
+    selected = _plan_impact(changed_since) if changed_since else None
+
+    fix_summary = ""
+    api_key = os.environ.get("ANTHROPIC_API_KEY", "")
+    pipelined = ai_fix and pipeline and bool(api_key)
+
+    # ── Quarantine: known-flaky tests run in their own, non-blocking lane ─
+    flakiness = _load_flakiness() if quarantine else None
+    quarantined = flakiness.quarantined() if flakiness else []
+    if selected is not None:
+        wanted = set(selected)
+        quarantined = [n for n in quarantined if n.split("[")[0] in wanted]
+    lane = _QuarantineLane(run_dir, quarantined, marker, workers).start()
+    if lane.nodeids:
+        print(f"\n🧪 Quarantine — {len(lane.nodeids)} known-flaky test(s) run separately "
+              "(not fixed, not counted in the status)")
 
     # ── Step 1: run tests — always executes ──────────────────────────────
-    print("\n📋 Step 1 — Running tests …")
-    initial_report = run_pytest(run_dir / "initial", marker=marker)
+    if pipelined:
+        print("\n📋 Step 1+2+3 — Running tests with the fix agent pipelined on failures …")
+        initial_report, final_report, fix_summary = await _run_pipelined(run_dir, marker, workers, fix_agents,
+                                                                          quarantined, selected, lane.peers)
+    else:
+        print("\n📋 Step 1 — Running tests …")
+        initial_report = run_pytest(run_dir / "initial", nodeids=selected, marker=marker, workers=workers,
+                                    deselect=quarantined, peers=lane.peers)
+        final_report = initial_report  # default: no re-run needed
+    _record_durations(initial_report)
 
     initial_failures = [
         t for t in initial_report.get("tests", [])
@@ -552,27 +1333,35 @@ async def run_cycle(marker: str | None = None, ai_fix: bool = False, ai_analysis
         print("─" * 50)
         print("   Tip: run  pytest test_cases/ -v  to debug collection errors")
 
-    fix_summary = ""
-    final_report = initial_report  # default: no re-run needed
     (run_dir / "after_fix").mkdir(parents=True, exist_ok=True)
 
     # ── Step 2: AI fix — only if failures exist AND --ai-fix is set ──────
-    if initial_failures and ai_fix:
-        api_key = os.environ.get("ANTHROPIC_API_KEY", "")
+    if pipelined:
+        if final_report is not initial_report:
+            _record_durations(final_report)
+            final_failures = [
+                t for t in final_report.get("tests", [])
+                if t.get("outcome") in ("failed", "error")
+            ]
+            fixed = len(initial_failures) - len(final_failures)
+            print(f"   → Fixed: {fixed}/{len(initial_failures)},  still failing: {len(final_failures)}")
+        elif not initial_failures:
+            print("\n✅ All tests passed — nothing to fix")
+    elif initial_failures and ai_fix:
         if not api_key:
             print("\n⚠️  --ai-fix requested but ANTHROPIC_API_KEY is not set — skipping fix")
         else:
             print(f"\n🔧 Step 2 — Fixing {len(initial_failures)} failure(s) with Claude agent …")
-            try:
-                fix_summary = await run_fix_agent(initial_failures)
-            except Exception as exc:
-                print(f"   ⚠️  Agent error: {exc} — continuing without fixes")
-                fix_summary = f"⚠️ Agent failed: {exc}"
+            fix_cache = _load_fix_cache()
+            fix_summary, fix_attempts = await _fix_failures(initial_failures, fix_agents, fix_cache, run_id)
 
             # ── Step 3: re-run only the tests that failed ─────────────────
             print("\n🔄 Step 3 — Re-running previously failing tests …")
             failed_nodeids = [t["nodeid"] for t in initial_failures]
-            final_report = run_pytest(run_dir / "after_fix", nodeids=failed_nodeids)
+            final_report = run_pytest(run_dir / "after_fix", nodeids=failed_nodeids, workers=workers,
+                                      peers=lane.peers)
+            _record_durations(final_report)
+            _record_fix_outcomes(fix_cache, fix_attempts, final_report, run_id, fix_summary)
             final_failures = [
                 t for t in final_report.get("tests", [])
                 if t.get("outcome") in ("failed", "error")
@@ -585,20 +1374,26 @@ async def run_cycle(marker: str | None = None, ai_fix: bool = False, ai_analysis
     else:
         print("\n✅ All tests passed — nothing to fix")
 
+    lane.join()
+    quarantine_rows = lane.rows(flakiness) if flakiness and lane.nodeids else []
+
     # ── Step 4: generate report ──────────────────────────────────────────
     print("\n📊 Generating report …")
-    report_path = generate_report(run_id, initial_report, final_report, fix_summary, run_dir)
+    report_path = generate_report(run_id, initial_report, final_report, fix_summary, run_dir, quarantine_rows)
     print(f"   → {report_path}")
+    _record_history(run_id, initial_report, final_report, marker,
+                    {"quarantine": lane.report, "retry": lane.retry_report})
 
     # ── Step 5: AI analysis ───────────────────────────────────────────────
     analysis = ""
     if ai_analysis:
         print("\n🧠 Step 5 — Generating AI analysis with Claude Sonnet …")
-        analysis = analyze_report_with_claude(report_path)
+        analysis = analyze_report_with_claude(report_path, initial_report, final_report, run_id)
 
     # ── Step 6: send Telegram notification ───────────────────────────────
     print("\n📨 Sending Telegram notification …")
-    send_telegram(report_path, initial_report, final_report, analysis=analysis)
+    await send_telegram(report_path, initial_report, final_report, analysis=analysis,
+                        quarantined=len(quarantine_rows))
 
     return report_path
 
@@ -643,10 +1438,50 @@ def main() -> None:
         default=False,
         help="Enable Claude Sonnet to analyze the report and send insights to Telegram (requires ANTHROPIC_API_KEY)",
     )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        default=False,
+        help="With --ai-fix: start the fix agent on early failures while the suite is still running",
+    )
+    parser.add_argument(
+        "--fix-agents",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Max fix agents running concurrently, one per independent failure group (default: <fixAgents>)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Number of parallel pytest worker processes (default: <workers> from data.xml)",
+    )
+    parser.add_argument(
+        "--no-quarantine",
+        action="store_true",
+        help="Run known-flaky tests in the main suite instead of the quarantine lane (see <quarantine>)",
+    )
+    parser.add_argument(
+        "--changed-since",
+        default=None,
+        metavar="REF",
+        help="Run only tests affected by the changes since this git ref, plus the smoke set (<impactSmoke>)",
+    )
     args = parser.parse_args()
 
     async def _run() -> Path:
-        return await run_cycle(marker=args.marker, ai_fix=args.ai_fix, ai_analysis=args.ai_analysis)
+        return await run_cycle(
+            marker=args.marker,
+            ai_fix=args.ai_fix,
+            ai_analysis=args.ai_analysis,
+            workers=args.workers,
+            pipeline=args.pipeline,
+            fix_agents=args.fix_agents,
+            quarantine=not args.no_quarantine,
+            changed_since=args.changed_since,
+        )
 
     if args.schedule:
         interval_sec = int(args.interval_hours * 3600)
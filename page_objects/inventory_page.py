@@ -4,6 +4,8 @@ from playwright.sync_api import Page, Locator
 class InventoryPage:
     """Page Object for Saucedemo Inventory/Products Page (https://www.saucedemo.com/inventory.html)"""
 
+    PATH = "inventory.html"
+
     TITLE = '[data-test="title"]'
     SORT_DROPDOWN = '[data-test="product-sort-container"]'
     INVENTORY_ITEM = '[data-test="inventory-item"]'
@@ -7,6 +7,8 @@ import shlex
 
 from mcp.server.fastmcp import FastMCP
 
+from utilities.impact_analysis import ImpactAnalyzer
+
 # "The name that will appear in Claude in the tool list"
 mcp = FastMCP("pytest-runner")
 
@@ -16,6 +18,7 @@ def run_pytest(
     marker: Optional[str] = None,
     test_path: str = "test_cases",
     extra_args: str = "",
+    changed_since: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
    Args:
@@ -28,12 +31,29 @@ def run_pytest(
     extra_args:
         Additional flags for pytest, for example:
         "-vv --maxfail=1".
+    changed_since:
+        A git ref, for example "origin/main" or "HEAD~1". Only the tests
+        affected by the changes since then, plus the smoke set, are run
+        (instead of everything under test_path).
     """
     # "Project root – the directory where this file is located"
     project_root = Path(__file__).resolve().parent
 
     cmd = ["pytest", test_path]
 
+    # "Test impact analysis: replace test_path by the affected tests"
+    impact = None
+    if changed_since:
+        try:
+            plan = ImpactAnalyzer(project_root).plan(changed_since)
+        except RuntimeError as exc:  # unknown ref, not a git checkout
+            impact = {"error": str(exc)}
+        else:
+            impact = {key: plan[key] for key in ("full_run", "affected", "smoke", "changed_files", "seconds")}
+            selected = [n for n in plan["selected"] if n.startswith(test_path.rstrip("/"))]
+            if not plan["full_run"] and selected:
+                cmd = ["pytest", *selected]
+
     if marker:
         cmd.extend(["-m", marker])
 
@@ -62,6 +82,7 @@ def run_pytest(
         "exit_code": proc.returncode,
         "stdout": stdout_trimmed,
         "stderr": stderr_trimmed,
+        "impact": impact,
     }
 
 
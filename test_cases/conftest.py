@@ -3,6 +3,17 @@
 # - Exports Playwright trace on failure when trace=retain-on-failure
 # - CLI overrides for env/base-url/browsers/devices/headless/etc.
 # - Optional tag filtering via <tags> in data.xml
+# - Optional pooled browser contexts via <contextPool> (state reset between tests)
+# - Cached login storage_state for @pytest.mark.authenticated tests via <authCache>
+# - Static-asset cache / request blocking on every context via <network>
+# - HAR record/replay of each test's traffic via --network=record|replay|live
+# - API tests against a local GoRest fake via --api-backend=fake (<api><backend>)
+# - Session pool of pre-created API users via <api><userPoolSize>
+# - Rate-limit-aware API throttling; per-test throttled time in the JSON report
+# - Per-request API latency by endpoint, per test and per run (p50/p95/p99 in the runner report)
+# - Record/replay cassettes of API traffic via --api-cassettes=record|replay (<api><cassettes>)
+# - Cached, non-blocking environment preflight exposed as @pytest.mark.requires(...)
+# - In-session retries of failed tests per <retries>/<retry> (metadata.attempts in the JSON report)
 from __future__ import annotations
 
 from dotenv import load_dotenv
@@ -11,15 +22,29 @@ load_dotenv()
 from utilities.logger import get_logger
 import logging
 import os
+import re
 from pathlib import Path
 from typing import Dict, Any, List
+from urllib.parse import urljoin
 from uuid import uuid4
 
 import pytest
 from playwright.sync_api import Browser, BrowserContext, Page, sync_playwright
 from workflows.web_workflow import WebFlows
 from workflows.api_workflow import APIFlows
-from utilities.config_loader import load_config
+from workflows.user_pool import UserPool
+from api_objects import cassette, latency, rate_limit
+from utilities.config_loader import load_config, cache_dir
+from utilities.context_pool import ContextPool
+from utilities.network_cache import AssetCache
+from utilities.fake_gorest import FakeGoRestServer
+from utilities.preflight import Preflight
+from utilities.auth_state import AuthStateCache
+from utilities.retry_policy import RetryPlugin, RetryPolicy
+from page_objects.inventory_page import InventoryPage
+
+# Session-level data exported into the JSON report (see pytest_json_modifyreport)
+_REPORT_EXTRAS: Dict[str, Any] = {}
 
 @pytest.fixture(scope="session")
 def browser_type_launch_args(pytestconfig: pytest.Config,
@@ -95,6 +120,26 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         parser.addoption("--base-url", action="store", default=None)
     except:
         pass
+    try:
+        parser.addoption("--context-pool", action="store", default=None)
+    except:
+        pass
+    try:
+        parser.addoption("--auth-cache", action="store", default=None)
+    except:
+        pass
+    try:
+        parser.addoption("--network", action="store", default=None, choices=["live", "record", "replay"])
+    except:
+        pass
+    try:
+        parser.addoption("--api-backend", action="store", default=None, choices=["live", "fake"])
+    except:
+        pass
+    try:
+        parser.addoption("--api-cassettes", action="store", default=None, choices=["live", "record", "replay"])
+    except:
+        pass
     try:
         parser.addoption("--lo-trace", action="store", default=None,  choices=["off", "on", "retain-on-failure"], )
     except:
@@ -136,11 +181,27 @@ def _apply_cli_overrides(cfg: Dict[str, Any], pytestconfig: pytest.Config) -> Di
     if hb is not None:
         cfg["headless"] = hb
 
+    cp = _as_bool(opt("context-pool"))
+    if cp is not None:
+        cfg["context_pool"] = cp
+
+    ac = _as_bool(opt("auth-cache"))
+    if ac is not None:
+        cfg["auth_cache"] = ac
+
     if opt("workers"):
         cfg["workers"] = int(opt("workers"))
     if opt("retries"):
         cfg["retries"] = int(opt("retries"))
 
+    if opt("network"):
+        cfg["network"] = {**cfg.get("network", {}), "mode": opt("network")}
+
+    if opt("api-backend"):
+        cfg["api"] = {**cfg.get("api", {}), "backend": opt("api-backend")}
+    if opt("api-cassettes"):
+        cfg["api"] = {**cfg.get("api", {}), "cassettes": opt("api-cassettes")}
+
     if opt("lo-trace"):
         cfg["trace"] = opt("lo-trace")
     if opt("lo-video"):
@@ -187,6 +248,19 @@ def pytest_configure(config: pytest.Config) -> None:
         "video": cfg.get("video"),
         "screenshot": cfg.get("screenshot"),
     }
+    # API client set-up: rate limiter shared by this worker's tests, cassette mode
+    api = cfg.get("api", {})
+    rate_limit.configure(per_minute=api.get("rate_limit_per_min"), max_retries=api.get("max_retries"),
+                         max_window=api.get("max_concurrency"))
+    cassette.configure(mode=api.get("cassettes"), cassette_dir=api.get("cassette_dir"),
+                       match_on=api.get("cassette_match"), ignore=api.get("cassette_ignore"))
+    # traffic outside a test (user pool set-up/refill/clean-up) goes to a per-worker session cassette
+    cassette.open_session(f"_session_{_worker_id()}")
+    config.pluginmanager.register(RetryPlugin(RetryPolicy.from_config(cfg), _count_retries), "retry_policy")
+    # Preflight checks start in the background; collection never waits on them
+    config._preflight = None
+    if not config.option.collectonly:
+        config._preflight = Preflight(cfg, ttl=cfg.get("preflight_ttl", 300)).start()
 
 
 # -----------------------------
@@ -237,13 +311,122 @@ def context_kwargs(device_name: str) -> Dict[str, Any]:
         raise RuntimeError(f"Unknown device: {device_name}")
     return preset
 
-@pytest.fixture(scope="function")
-def context(browser: Browser, context_kwargs: Dict[str, Any], trace_mode: str, video_mode: str) -> BrowserContext:
-    kwargs = dict(context_kwargs)
-    out = _outdir()
-    if video_mode != "off":
-        kwargs["record_video_dir"] = str(out / "videos")
+@pytest.fixture(scope="session")
+def network_mode(test_cfg: Dict[str, Any]) -> str:
+    return test_cfg.get("network", {}).get("mode", "live")
+
+def _har_path(test_cfg: Dict[str, Any], nodeid: str) -> Path:
+    har_dir = Path(test_cfg.get("network", {}).get("har_dir") or cache_dir("har"))
+    har_dir.mkdir(parents=True, exist_ok=True)
+    return har_dir / (re.sub(r"[^\w.\-\[\]]+", "_", nodeid) + ".har")
+
+@pytest.fixture(scope="session")
+def asset_cache(test_cfg: Dict[str, Any], network_mode: str) -> AssetCache | None:
+    """Routing layer from <network>: on-disk static-asset cache and request blocking."""
+    net = test_cfg.get("network", {})
+    if network_mode != "live":
+        # HAR record/replay owns the routing; cached assets would hide real traffic
+        return None
+    cache_types = net.get("cache_types", []) if net.get("asset_cache") else []
+    if not cache_types and not net.get("block_types") and not net.get("block_urls"):
+        return None
+    cache = AssetCache(
+        Path(cache_dir("assets")),
+        cache_types=cache_types,
+        block_types=net.get("block_types", []),
+        block_urls=net.get("block_urls", []),
+        ttl=net.get("cache_ttl", 86400),
+    )
+    _REPORT_EXTRAS["network_cache"] = cache.stats
+    return cache
+
+def _new_context(browser: Browser, asset_cache: AssetCache | None, **kwargs) -> BrowserContext:
     ctx = browser.new_context(**kwargs)
+    if asset_cache is not None:
+        asset_cache.install(ctx)
+    return ctx
+
+@pytest.fixture(scope="session")
+def context_pool(browser: Browser, context_kwargs: Dict[str, Any], test_cfg: Dict[str, Any], video_mode: str,
+                 asset_cache: AssetCache | None, network_mode: str):
+    """
+    Opt-in pool of reusable contexts (<contextPool>true</contextPool> or --context-pool=true).
+    Disabled when video is recorded or HARs are recorded/replayed, since both are
+    bound to a context's lifetime.
+    """
+    if not test_cfg.get("context_pool") or video_mode != "off" or network_mode != "live":
+        yield None
+        return
+    # routes are installed by the factory, before the pool starts tracking context changes
+    pool = ContextPool(lambda: _new_context(browser, asset_cache, **context_kwargs),
+                       size=test_cfg.get("context_pool_size", 2))
+    yield pool
+    pool.close()
+
+def _worker_id() -> str:
+    return os.getenv("TEST_WORKER_ID") or os.getenv("PYTEST_XDIST_WORKER") or "main"
+
+@pytest.fixture(scope="session")
+def auth_cache(test_cfg: Dict[str, Any]) -> AuthStateCache | None:
+    if not test_cfg.get("auth_cache"):
+        return None
+    return AuthStateCache(_outdir() / "auth", ttl=test_cfg.get("auth_cache_ttl", 540))
+
+@pytest.fixture(scope="function")
+def auth_user(request: pytest.FixtureRequest, auth_cache: AuthStateCache | None, network_mode: str) -> str | None:
+    """
+    User whose cached session this test starts from, or None for a logged-out start.
+    Opt in with @pytest.mark.authenticated (optionally user="..."), opt out with @pytest.mark.real_login.
+    Not used with HAR record/replay: the login is part of the recorded traffic.
+    """
+    marker = request.node.get_closest_marker("authenticated")
+    if auth_cache is None or marker is None or request.node.get_closest_marker("real_login"):
+        return None
+    if network_mode != "live":
+        return None
+    return marker.kwargs.get("user", WebFlows.VALID_USER)
+
+def _auth_state(browser: Browser, context_kwargs: Dict[str, Any], auth_cache: AuthStateCache,
+                base_url: str, user: str) -> Path:
+    def _login() -> BrowserContext:
+        ctx = browser.new_context(**context_kwargs)
+        pg = ctx.new_page()
+        pg.goto(base_url)
+        # all saucedemo demo users share the same password
+        WebFlows(pg).login(user, WebFlows.VALID_PASSWORD)
+        pg.wait_for_url(f"**/{InventoryPage.PATH}")
+        return ctx
+
+    return auth_cache.ensure(user, base_url, _worker_id(), _login)
+
+@pytest.fixture(scope="function")
+def context(request: pytest.FixtureRequest, browser: Browser, context_kwargs: Dict[str, Any],
+            trace_mode: str, video_mode: str, context_pool: ContextPool | None,
+            auth_cache: AuthStateCache | None, auth_user: str | None, base_url: str,
+            asset_cache: AssetCache | None, network_mode: str, test_cfg: Dict[str, Any]) -> BrowserContext:
+    har = _har_path(test_cfg, request.node.nodeid) if network_mode != "live" else None
+    if network_mode == "replay" and not har.exists():
+        pytest.skip(f"--network=replay: no HAR recorded for this test ({har.name})")
+    state = _auth_state(browser, context_kwargs, auth_cache, base_url, auth_user) if auth_user else None
+    pooled = context_pool is not None and request.node.get_closest_marker("fresh_context") is None
+    if pooled:
+        ctx = context_pool.acquire()
+        if state:
+            ctx.add_cookies(AuthStateCache.cookies(state))
+    else:
+        kwargs = dict(context_kwargs)
+        out = _outdir()
+        if video_mode != "off":
+            kwargs["record_video_dir"] = str(out / "videos")
+        if state:
+            kwargs["storage_state"] = str(state)
+        ctx = _new_context(browser, asset_cache, **kwargs)
+    if network_mode == "record":
+        # Playwright writes the HAR when the context closes
+        ctx.route_from_har(str(har), update=True, update_content="embed", update_mode="minimal")
+    elif network_mode == "replay":
+        # anything not in the HAR is aborted, so replay never touches the network
+        ctx.route_from_har(str(har), not_found="abort")
     if trace_mode in {"on", "retain-on-failure"}:
         ctx.tracing.start(screenshots=True, snapshots=True, sources=True)
     yield ctx
@@ -252,25 +435,59 @@ def context(browser: Browser, context_kwargs: Dict[str, Any], trace_mode: str, v
             ctx.tracing.stop()
         except Exception:
             pass
-    ctx.close()
+    if pooled:
+        context_pool.release(ctx)
+    else:
+        ctx.close()
 
 @pytest.fixture(scope="function")
-def page(context: BrowserContext, base_url: str) -> Page:
+def page(context: BrowserContext, base_url: str, auth_user: str | None,
+         auth_cache: AuthStateCache | None) -> Page:
     pg = context.new_page()
     if base_url and base_url != "about:blank":
-        pg.goto(base_url)
+        if auth_user:
+            pg.goto(urljoin(base_url, InventoryPage.PATH))
+            # Session rejected → app bounced us to the login page. Drop the cached
+            # state; the test's own login_valid() then falls back to the real form.
+            if not WebFlows(pg).is_logged_in():
+                auth_cache.invalidate(auth_user, base_url, _worker_id())
+        else:
+            pg.goto(base_url)
     return pg
 
 @pytest.fixture
 def web_workflow(page):
     return WebFlows(page)
 
+@pytest.fixture(scope="session")
+def fake_gorest(test_cfg: Dict[str, Any]):
+    """Local stateful GoRest fake; started only when a test needs it."""
+    api = test_cfg.get("api", {})
+    server = FakeGoRestServer(latency=api.get("fake_latency_ms", 0) / 1000,
+                              seed_users=api.get("fake_seed_users", 20))
+    server.start()
+    yield server
+    server.stop()
+
+@pytest.fixture(scope="session")
+def api_url(request: pytest.FixtureRequest, test_cfg: Dict[str, Any]) -> str:
+    if test_cfg.get("api", {}).get("backend") == "fake":
+        return request.getfixturevalue("fake_gorest").url
+    return test_cfg.get("api_url") or "https://gorest.co.in/public/v2"
+
 @pytest.fixture
-def api_workflow(test_cfg):
-    api_url = test_cfg.get("api_url", "https://gorest.co.in/public/v2")
+def api_workflow(api_url: str):
     token = os.getenv("GOREST_TOKEN", "")
     return APIFlows(api_url, token)
 
+@pytest.fixture(scope="session")
+def user_pool(api_url: str, test_cfg: Dict[str, Any]):
+    """Users pre-created once per session: borrow() for read-only tests, checkout() for mutating ones."""
+    pool = UserPool(api_url, os.getenv("GOREST_TOKEN", ""), size=test_cfg.get("api", {}).get("user_pool_size", 4))
+    pool.start()
+    yield pool
+    pool.close()
+
 @pytest.fixture(scope="function")
 def logger(request) -> logging.Logger:
     """
@@ -296,9 +513,67 @@ def capture_console_logs(request, logger: logging.Logger):
     page.on("console", _log_console)
     yield
 
+@pytest.fixture(scope="function", autouse=True)
+def api_metrics(request):
+    """
+    Per-test API metrics in the JSON report: metadata.throttled_s (time spent
+    waiting on rate limits) and metadata.api_latency (request count and summed
+    time per endpoint).
+    """
+    if not {"api_workflow", "user_pool"} & set(request.fixturenames):
+        yield
+        return
+    before = rate_limit.throttled_time()
+    latency.begin_test()
+    yield
+    metadata = {
+        "throttled_s": round(rate_limit.throttled_time() - before, 3),
+        "api_latency": latency.end_test(),
+    }
+    extra = getattr(request.node, "_json_report_extra", None)
+    if extra is None:
+        extra = request.node._json_report_extra = {}
+    extra.setdefault("metadata", {}).update(metadata)
+
+@pytest.fixture(scope="function", autouse=True)
+def api_cassette(request):
+    """Per-test cassette of API traffic when <api><cassettes> is record/replay."""
+    if cassette.mode() == "live" or not {"api_workflow", "user_pool"} & set(request.fixturenames):
+        yield
+        return
+    if cassette.mode() == "replay" and not cassette.path_for(request.node.nodeid).exists():
+        pytest.skip(f"--api-cassettes=replay: nothing recorded for this test "
+                    f"({cassette.path_for(request.node.nodeid).name})")
+    with cassette.use_cassette(request.node.nodeid):
+        yield
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    stats = _REPORT_EXTRAS.get("retries")
+    if stats:
+        terminalreporter.write_line(f"🔁 {stats['retried']} test(s) retried in-session, "
+                                    f"{stats['passed_on_retry']} passed on retry")
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    cassette.close_session()
+
 # -----------------------------
 # Failure hooks
 # -----------------------------
+def pytest_runtest_setup(item: pytest.Item) -> None:
+    """Lazy skip for @pytest.mark.requires(...): only now wait for the preflight result."""
+    preflight: Preflight | None = getattr(item.config, "_preflight", None)
+    marker = item.get_closest_marker("requires")
+    if marker is None or preflight is None:
+        return
+    cfg = item.config._cached_cfg
+    for name in marker.args:
+        if name == "api" and (cfg.get("api", {}).get("backend") == "fake"
+                              or cfg.get("api", {}).get("cassettes") == "replay"):
+            continue  # served in-process / from cassettes
+        result = preflight.result(name)
+        if not result.get("ok"):
+            pytest.skip(f"Preflight '{name}' failed: {result.get('detail')}")
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item: pytest.Item, call: pytest.CallInfo):
     outcome = yield
@@ -306,6 +581,13 @@ def pytest_runtest_makereport(item: pytest.Item, call: pytest.CallInfo):
     if rep.when == "call":
         setattr(item, "_test_failed", rep.failed)
 
+def _count_retries(attempts: List[Dict[str, Any]]) -> None:
+    """Session totals of in-session retries (RetryPlugin), for the terminal summary and the JSON report."""
+    stats = _REPORT_EXTRAS.setdefault("retries", {"retried": 0, "passed_on_retry": 0, "attempts": 0})
+    stats["retried"] += 1
+    stats["attempts"] += len(attempts)
+    stats["passed_on_retry"] += attempts[-1]["outcome"] == "passed"
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_teardown(item: pytest.Item, nextitem):
     outcome = yield
@@ -331,6 +613,15 @@ def pytest_runtest_teardown(item: pytest.Item, nextitem):
             except Exception:
                 pass
 
+@pytest.hookimpl(optionalhook=True)
+def pytest_json_modifyreport(json_report: Dict[str, Any]) -> None:
+    """Attach session-level extras (e.g. network cache counters) to pytest-json-report output."""
+    json_report.update(_REPORT_EXTRAS)
+    throttle = rate_limit.all_stats()
+    if throttle.get("requests"):
+        json_report["api_throttle"] = throttle
+        json_report["api_latency"] = latency.samples()
+
 # -----------------------------
 # Optional: filter by tags from data.xml
 # -----------------------------
@@ -339,10 +630,15 @@ def pytest_collection_modifyitems(config, items):
     tags = cfg.get("tags", [])
     if not tags:
         return
-    selected = []
+    selected, deselected = [], []
     for it in items:
         markers = {m.name for m in it.iter_markers()}
         if markers & set(tags):
             selected.append(it)
+        else:
+            deselected.append(it)
     if selected:
+        # report deselection so reporters (json-report collectors) see it too
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
         items[:] = selected
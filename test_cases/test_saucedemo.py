@@ -43,6 +43,7 @@ class TestLogin:
 
 
 @allure.suite("Saucedemo – Products")
+@pytest.mark.authenticated
 class TestProducts:
 
     @pytest.fixture(autouse=True)
@@ -85,6 +86,7 @@ class TestProducts:
 
 
 @allure.suite("Saucedemo – Cart")
+@pytest.mark.authenticated
 class TestCart:
 
     @pytest.fixture(autouse=True)
@@ -129,6 +131,7 @@ class TestCart:
 
 
 @allure.suite("Saucedemo – Checkout")
+@pytest.mark.authenticated
 class TestCheckout:
 
     @pytest.fixture(autouse=True)
@@ -170,6 +173,7 @@ class TestCheckout:
 
 
 @allure.suite("Saucedemo – Navigation")
+@pytest.mark.authenticated
 class TestNavigation:
 
     @pytest.fixture(autouse=True)
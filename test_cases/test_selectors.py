@@ -32,6 +32,7 @@ class TestLoginSelectors:
 
 
 @allure.suite("Page Object Selectors – Inventory Page")
+@pytest.mark.authenticated
 class TestInventorySelectors:
 
     @pytest.fixture(autouse=True)
@@ -81,6 +82,7 @@ class TestInventorySelectors:
 
 
 @allure.suite("Page Object Selectors – Cart Page")
+@pytest.mark.authenticated
 class TestCartSelectors:
 
     @pytest.fixture(autouse=True)
@@ -121,6 +123,7 @@ class TestCartSelectors:
 
 
 @allure.suite("Page Object Selectors – Checkout Page")
+@pytest.mark.authenticated
 class TestCheckoutSelectors:
 
     @pytest.fixture(autouse=True)
@@ -0,0 +1,39 @@
+import pytest
+
+anyio = pytest.importorskip("anyio")
+pytest.importorskip("httpx")
+pytest.importorskip("requests")
+
+from workflows.api_workflow import AsyncAPIFlows  # noqa: E402
+
+
+async def _ok() -> int:
+    return 1
+
+
+async def _assert() -> None:
+    raise AssertionError("Expected 201, got 429")
+
+
+async def _drop() -> None:
+    raise ConnectionError("reset by peer")
+
+
+def _gather(calls: list):
+    flows = AsyncAPIFlows.__new__(AsyncAPIFlows)  # _gather needs no client
+    return anyio.run(flows._gather, calls)
+
+
+def test_gather_returns_results_in_order():
+    assert _gather([_ok, _ok]) == [1, 1]
+
+
+def test_single_failure_raises_the_original_exception():
+    with pytest.raises(AssertionError, match="got 429"):
+        _gather([_ok, _assert])
+
+
+def test_several_failures_stay_grouped():
+    with pytest.raises(ExceptionGroup) as info:
+        _gather([_assert, _drop])
+    assert {type(e) for e in info.value.exceptions} == {AssertionError, ConnectionError}
@@ -0,0 +1,71 @@
+from utilities.failure_clusters import cluster_failures, failure_scope, partition_failures, signature
+
+
+def _failure(nodeid: str, message: str, line: int = 57) -> dict:
+    longrepr = (
+        f"test_cases/test_api.py:{line}: in test_x\n"
+        f"    assert response.status_code == 200\n"
+        f"E   AssertionError: {message}\n"
+    )
+    return {"nodeid": nodeid, "outcome": "failed", "call": {"longrepr": longrepr}}
+
+
+def test_different_status_codes_are_different_failures() -> None:
+    not_found = signature(_failure("test_cases/test_api.py::TestUsersAPI::test_get_single_user",
+                                   "Expected 200, got 404"))
+    server_error = signature(_failure("test_cases/test_api.py::TestUsersAPI::test_update_user",
+                                      "Expected 200, got 500"))
+
+    assert not_found["key"] != server_error["key"]
+
+
+def test_volatile_tokens_do_not_split_a_cluster() -> None:
+    first = _failure("test_cases/test_api.py::TestUsersAPI::test_get_single_user",
+                     "GET http://localhost:51234/public/v2/users/7312 for jane_1a2b@example.com "
+                     "took 1532 ms, expected 200, got 404", line=57)
+    second = _failure("test_cases/test_api.py::TestUsersAPI::test_delete_user",
+                      "GET http://localhost:40987/public/v2/users/8841 for joe_9f8e@example.com "
+                      "took 20 ms, expected 200, got 404", line=61)
+
+    assert signature(first)["key"] == signature(second)["key"]
+    assert len(cluster_failures([first, second])) == 1
+
+
+def _ui_failure(nodeid: str, frames: list[str], exc: str) -> dict:
+    longrepr = "".join(f"{frame}: in step\n" for frame in frames) + f"E   {exc}\n"
+    return {"nodeid": nodeid, "outcome": "failed", "call": {"longrepr": longrepr}}
+
+
+def test_failure_scope_is_the_test_file_plus_project_frames() -> None:
+    failure = _ui_failure("test_cases/test_cart.py::test_badge",
+                          ["test_cases/test_cart.py:12", "workflows\\web_workflow.py:40",
+                           "/usr/lib/python3.12/site-packages/playwright/sync_api.py:99"],
+                          "TimeoutError: Timeout 30000ms exceeded.")
+    assert failure_scope(failure) == {"test_cases/test_cart.py", "workflows/web_workflow.py"}
+
+
+def test_files_sharing_a_page_object_merge_into_one_group() -> None:
+    cart = _ui_failure("test_cases/test_cart.py::test_badge",
+                       ["test_cases/test_cart.py:12", "page_objects/header.py:30"], "AssertionError: badge")
+    menu = _ui_failure("test_cases/test_menu.py::test_logout",
+                       ["test_cases/test_menu.py:8", "page_objects/header.py:44"], "TimeoutError: logout")
+    api = _ui_failure("test_cases/test_api.py::test_get",
+                      ["test_cases/test_api.py:20"], "AssertionError: Expected 200, got 404")
+
+    groups = partition_failures([api, cart, menu])
+    assert [sorted(t["nodeid"] for t in members) for members, _ in groups] == [
+        ["test_cases/test_cart.py::test_badge", "test_cases/test_menu.py::test_logout"],
+        ["test_cases/test_api.py::test_get"],
+    ]
+    assert groups[0][1] == {"test_cases/test_cart.py", "test_cases/test_menu.py", "page_objects/header.py"}
+
+
+def test_overlap_is_transitive() -> None:
+    # a–b share checkout.py, b–c share cart.py: one group although a and c share nothing
+    a = _ui_failure("test_cases/test_a.py::t", ["page_objects/checkout.py:1"], "AssertionError: a")
+    b = _ui_failure("test_cases/test_b.py::t", ["page_objects/checkout.py:2", "page_objects/cart.py:3"],
+                    "AssertionError: b")
+    c = _ui_failure("test_cases/test_c.py::t", ["page_objects/cart.py:4"], "AssertionError: c")
+    d = _ui_failure("test_cases/test_d.py::t", ["page_objects/menu.py:4"], "AssertionError: d")
+    groups = partition_failures([a, b, c, d])
+    assert [len(members) for members, _ in groups] == [3, 1]
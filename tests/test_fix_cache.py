@@ -0,0 +1,43 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from utilities.fix_cache import FixCache
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=root, check=True,
+                   capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    (tmp_path / "page.py").write_text("A = 1\nB = 2\n")
+    (tmp_path / "other.py").write_text("C = 3\n")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-qm", "base")
+    return tmp_path
+
+
+def test_diff_against_baseline_excludes_earlier_local_edits(repo: Path):
+    cache = FixCache(repo, repo / "cache.json")
+    (repo / "page.py").write_text("A = 10\nB = 2\n")  # already there before the agent ran
+    base = cache.baseline()
+
+    (repo / "page.py").write_text("A = 10\nB = 20\n")  # the agent's fix
+    (repo / "other.py").write_text("C = 30\n")
+
+    diff = cache.diff({"page.py"}, base)
+    assert "+B = 20" in diff
+    assert "+A = 10" not in diff and "-A = 1\n" not in diff
+    assert "other.py" not in diff
+    assert "+A = 10" in cache.diff({"page.py"})  # vs HEAD it would include the earlier edit
+
+
+def test_baseline_is_head_on_a_clean_tree(repo: Path):
+    cache = FixCache(repo, repo / "cache.json")
+    head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True, text=True).stdout.strip()
+    assert cache.baseline() == head
+    assert FixCache(repo.parent, repo / "cache.json").diff({"page.py"}, "") == ""
@@ -0,0 +1,23 @@
+from utilities.flakiness import FlakinessEngine, flakiness_score
+
+
+def test_lone_failure_among_many_passes_is_quarantined():
+    failed = [False] * 4 + [True] + [False] * 5  # newest first
+    score = flakiness_score(failed)
+    assert score >= 0.6
+    engine = FlakinessEngine({"t.py::test": {"score": score}})
+    assert engine.quarantined() == ["t.py::test"]
+
+
+def test_single_retry_pass_with_little_history_is_not_quarantined():
+    assert flakiness_score([True, False], retry_passes=1) < 0.6
+    assert flakiness_score([False, False, True], retry_passes=2) >= 0.6
+
+
+def test_failure_streak_scores_low():
+    assert flakiness_score([False, True, True, True, False, False]) < 0.6
+
+
+def test_failure_in_newest_run_is_not_judged_yet():
+    assert flakiness_score([True] + [False] * 9) == 0.0
+    assert flakiness_score([True, False, True, False, False]) == 1.0
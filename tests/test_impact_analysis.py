@@ -0,0 +1,132 @@
+import subprocess
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from utilities.impact_analysis import ImpactAnalyzer
+
+CART_PAGE = '''\
+class CartPage:
+    TITLE = '[data-test="title"]'
+    CHECKOUT_BTN = '[data-test="checkout"]'
+
+    def __init__(self, page):
+        self.page = page
+
+    def proceed_to_checkout(self):
+        self.page.locator(self.CHECKOUT_BTN).click()
+
+    def title(self):
+        return self.page.locator(self.TITLE)
+'''
+
+FLOWS = '''\
+from page_objects.cart_page import CartPage
+
+
+class WebFlows:
+    def __init__(self, page):
+        self.cart_page = CartPage(page)
+
+    def login(self):
+        pass
+
+    def proceed_to_checkout(self):
+        self.cart_page.proceed_to_checkout()
+
+    def cart_title(self):
+        return self.cart_page.title()
+'''
+
+CONFTEST = '''\
+import pytest
+from workflows.web_workflow import WebFlows
+
+
+@pytest.fixture
+def web_workflow(page):
+    return WebFlows(page)
+'''
+
+TESTS = '''\
+import pytest
+
+
+class TestLogin:
+    def test_login(self, web_workflow):
+        web_workflow.login()
+
+
+class TestCart:
+    def test_title(self, web_workflow):
+        web_workflow.cart_title()
+
+
+class TestCheckout:
+    @pytest.fixture(autouse=True)
+    def go_to_checkout(self, web_workflow):
+        web_workflow.proceed_to_checkout()
+
+    def test_overview(self, web_workflow):
+        pass
+'''
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=root, check=True,
+                   capture_output=True)
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    files = {
+        "page_objects/cart_page.py": CART_PAGE,
+        "workflows/web_workflow.py": FLOWS,
+        "test_cases/conftest.py": CONFTEST,
+        "test_cases/test_shop.py": TESTS,
+    }
+    for rel, text in files.items():
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text(text, encoding="utf-8")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "base")
+    return tmp_path
+
+
+def _plan(root: Path) -> dict:
+    return ImpactAnalyzer(root, cache_path=root / ".cache" / "impact.json", smoke_markers=()).plan("HEAD")
+
+
+def _edit(root: Path, rel: str, old: str, new: str) -> None:
+    path = root / rel
+    path.write_text(path.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+
+
+def test_class_autouse_fixture_only_applies_to_its_class(project: Path) -> None:
+    _edit(project, "page_objects/cart_page.py", 'data-test="checkout"', 'data-test="checkout-btn"')
+
+    plan = _plan(project)
+
+    assert plan["changed_symbols"] == ["page_objects/cart_page.py::CartPage.CHECKOUT_BTN"]
+    assert plan["affected"] == ["test_cases/test_shop.py::TestCheckout::test_overview"]
+
+
+def test_blank_and_comment_lines_in_a_class_change_nothing(project: Path) -> None:
+    _edit(project, "page_objects/cart_page.py", "    def __init__",
+          textwrap.indent("\n# the checkout button moved in 2.3\n", "    ") + "    def __init__")
+
+    plan = _plan(project)
+
+    assert plan["changed_symbols"] == []
+    assert plan["affected"] == []
+
+
+def test_removed_code_next_to_blank_lines_is_still_a_change(project: Path) -> None:
+    _edit(project, "workflows/web_workflow.py", "        self.cart_page.proceed_to_checkout()\n", "        pass\n")
+
+    plan = _plan(project)
+
+    assert plan["changed_symbols"] == ["workflows/web_workflow.py::WebFlows.proceed_to_checkout"]
+    assert plan["affected"] == ["test_cases/test_shop.py::TestCheckout::test_overview"]
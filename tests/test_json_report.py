@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+from utilities.json_report import compact_test, iter_report_tests, load_report
+
+REPORT = {
+    "created": 1.5,
+    "duration": 12.25,
+    "environment": {"Python": "3.12", "tricky": 'a"]}\\'},
+    "collectors": [{"nodeid": "t.py", "result": [{"nodeid": 't.py::test[a]}{"]', "type": "Function"}]}],
+    "tests": [
+        {"nodeid": f"t.py::test_{i}", "outcome": "failed" if i % 3 else "passed",
+         "call": {"duration": 0.1 * i, "stdout": "out\\n" * i, "longrepr": 'E   assert "[{" == -1.5e-3'}}
+        for i in range(40)
+    ],
+    "warnings": [],
+}
+
+
+def test_tests_stream_across_chunk_boundaries(tmp_path: Path):
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps(REPORT, indent=2), encoding="utf-8")
+    for size in (1, 7, 64):
+        assert list(iter_report_tests(path, chunk_size=size)) == REPORT["tests"]
+        assert load_report(path, chunk_size=size) == REPORT
+
+
+def test_load_report_compacts_passing_tests_and_tolerates_corrupt_files(tmp_path: Path):
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps(REPORT), encoding="utf-8")
+    tests = load_report(path, compact_test)["tests"]
+    assert "stdout" not in tests[3]["call"] and tests[3]["outcome"] == "passed"
+    assert tests[4]["call"]["stdout"] == "out\\n" * 4
+
+    path.write_text('{"tests": [{"nodeid": "a"}, {"node', encoding="utf-8")
+    assert load_report(path) == {}
+    assert [t["nodeid"] for t in iter_report_tests(path)] == ["a"]
+    assert list(iter_report_tests(tmp_path / "missing.json")) == []
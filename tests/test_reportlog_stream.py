@@ -0,0 +1,78 @@
+import json
+import time
+from pathlib import Path
+
+from utilities.reportlog_stream import ReportLogStream, longrepr_text
+
+
+def _event(nodeid: str, when: str, outcome: str, **extra) -> str:
+    return json.dumps({"$report_type": "TestReport", "nodeid": nodeid, "when": when, "outcome": outcome,
+                       "duration": 0.5, **extra}) + "\n"
+
+
+def _phases(nodeid: str, setup: str = "passed", call: str | None = "passed", teardown: str = "passed",
+            setup_extra: dict | None = None, **call_extra) -> str:
+    lines = _event(nodeid, "setup", setup, **(setup_extra or {}))
+    if call is not None:
+        lines += _event(nodeid, "call", call, **call_extra)
+    return lines + _event(nodeid, "teardown", teardown)
+
+
+def test_phases_map_to_pytest_json_report_outcomes(tmp_path: Path):
+    log = tmp_path / "reportlog.jsonl"
+    log.write_text(
+        json.dumps({"$report_type": "SessionStart", "pytest_version": "8.3"}) + "\n"
+        + _phases("t.py::ok")
+        + _phases("t.py::broken_fixture", setup="failed", call=None,
+                  setup_extra={"longrepr": {"reprcrash": {"path": "t.py", "lineno": 3, "message": "RuntimeError: db"}}})
+        + _phases("t.py::bad_teardown", teardown="failed")
+        + _phases("t.py::skipped", setup="skipped", call=None)
+        + _phases("t.py::xfail", call="skipped", wasxfail="known bug")
+        + _phases("t.py::xpass", call="passed", wasxfail="")
+        + _phases("t.py::fails", call="failed", longrepr="E   AssertionError: nope"),
+        encoding="utf-8",
+    )
+    results = ReportLogStream(log, poll=0.01).start().stop()
+    assert {r["nodeid"]: r["outcome"] for r in results} == {
+        "t.py::ok": "passed",
+        "t.py::broken_fixture": "error",
+        "t.py::bad_teardown": "error",
+        "t.py::skipped": "skipped",
+        "t.py::xfail": "xfailed",
+        "t.py::xpass": "xpassed",
+        "t.py::fails": "failed",
+    }
+    by_id = {r["nodeid"]: r for r in results}
+    assert by_id["t.py::broken_fixture"]["setup"]["longrepr"] == "t.py:3: RuntimeError: db"
+    assert by_id["t.py::fails"]["call"]["longrepr"] == "E   AssertionError: nope"
+
+
+def test_results_stream_while_the_log_is_written(tmp_path: Path):
+    log = tmp_path / "reportlog.jsonl"
+    seen: list[str] = []
+    stream = ReportLogStream(log, on_result=lambda r: seen.append(r["nodeid"]), poll=0.01).start()
+    with log.open("w", encoding="utf-8") as fh:
+        first = _phases("t.py::one")
+        fh.write(first[:-20])  # pytest mid-write: a partial line is buffered
+        fh.flush()
+        time.sleep(0.05)
+        assert seen == []
+        fh.write(first[-20:] + _phases("t.py::two"))
+        fh.flush()
+        deadline = time.monotonic() + 2
+        while len(seen) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert seen == ["t.py::one", "t.py::two"]
+    assert [r["nodeid"] for r in stream.stop()] == ["t.py::one", "t.py::two"]
+
+
+def test_longrepr_text_flattens_skip_tuples_and_chains():
+    assert longrepr_text(["t.py", 3, "Skipped: no api"]) == "Skipped: no api"
+    chained = {"chain": [({"reprentries": [{"data": {"lines": ["E   KeyError: 'id'"],
+                                                     "reprfileloc": {"path": "w.py", "lineno": 9,
+                                                                     "message": "KeyError"}}}]},
+                          None, "During handling of the above exception, another exception occurred:")]}
+    assert longrepr_text(chained).splitlines() == [
+        "E   KeyError: 'id'", "w.py:9: KeyError",
+        "During handling of the above exception, another exception occurred:",
+    ]
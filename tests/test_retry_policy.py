@@ -0,0 +1,67 @@
+import pytest
+
+from utilities.retry_policy import RetryPlugin, RetryPolicy
+
+pytest_plugins = "pytester"
+
+
+def test_lowest_marker_count_wins_and_zero_opts_out():
+    policy = RetryPolicy(retries=1, markers={"ui": 3, "api": 2, "real_login": 0})
+    assert policy.retries_for([]) == 1
+    assert policy.retries_for(["smoke"]) == 1
+    assert policy.retries_for(["ui"]) == 3
+    assert policy.retries_for(["ui", "api"]) == 2
+    assert policy.retries_for(["ui", "real_login"]) == 0
+
+
+def test_never_beats_on_and_empty_on_means_any_type():
+    policy = RetryPolicy(on=["TimeoutError", "ConnectionError"], never=["AssertionError"])
+    assert policy.should_retry(["TimeoutError", "OSError", "Exception"])
+    assert policy.should_retry(["ConnectionResetError", "ConnectionError", "OSError"])  # matched through the MRO
+    assert not policy.should_retry(["ValueError", "Exception"])
+    assert not policy.should_retry([])
+    assert not RetryPolicy(on=["Flaky"], never=["AssertionError"]).should_retry(["Flaky", "AssertionError"])
+    assert RetryPolicy(never=["AssertionError"]).should_retry(["KeyError", "LookupError"])
+
+
+_SUITE = """
+    import pytest
+
+    calls = {}
+
+    def _nth(name):
+        calls[name] = calls.get(name, 0) + 1
+        return calls[name]
+
+    def test_timeout_then_pass():
+        if _nth("timeout") == 1:
+            raise TimeoutError("slow page")
+
+    def test_assertion():
+        _nth("assertion")
+        assert 1 == 2
+
+    @pytest.mark.ui
+    def test_ui_keeps_timing_out():
+        _nth("ui")
+        raise TimeoutError("still slow")
+
+    def test_calls():
+        assert calls == {"timeout": 2, "assertion": 1, "ui": 2}
+"""
+
+
+def test_protocol_retries_per_policy(pytester: pytest.Pytester):
+    pytester.makepyfile(_SUITE)
+    retried = []
+    plugin = RetryPlugin(RetryPolicy(retries=3, on=["TimeoutError"], never=["AssertionError"], markers={"ui": 1}),
+                         retried.append)
+    result = pytester.runpytest_inprocess("-p", "no:cacheprovider", plugins=[plugin])
+
+    # one report per test: only the last attempt counts
+    result.assert_outcomes(passed=2, failed=2)
+    assert [[a["outcome"] for a in attempts] for attempts in retried] == [
+        ["failed", "passed"],  # timeout retried, then passed
+        ["failed", "failed"],  # @ui: 1 retry, not the default 3
+    ]
+    assert retried[0][0]["exc_type"] == "TimeoutError" and "slow page" in retried[0][0]["longrepr"]
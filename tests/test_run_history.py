@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from utilities.flakiness import FlakinessEngine
+from utilities.run_history import RunHistory
+
+TIMEOUT = {"outcome": "failed", "exc_type": "TimeoutError", "duration": 30.0,
+           "longrepr": "E   TimeoutError: Timeout 30000ms exceeded."}
+
+
+def _test(nodeid: str, outcome: str, *attempts: dict) -> dict:
+    test = {"nodeid": nodeid, "outcome": outcome, "call": {"duration": 1.0, "longrepr": ""}}
+    if attempts:
+        test["metadata"] = {"attempts": [*attempts, {"outcome": outcome, "duration": 1.0}]}
+    return test
+
+
+def _phases(history: RunHistory, run_id: str) -> dict:
+    rows = history.conn.execute("SELECT phase, nodeid, outcome FROM results WHERE run_id = ?", (run_id,))
+    return {(r["phase"], r["nodeid"]): r["outcome"] for r in rows}
+
+
+def test_quarantine_lane_keeps_first_attempt_of_in_session_retries(tmp_path: Path):
+    with RunHistory.open(tmp_path / "history.sqlite") as history:
+        lane = {"tests": [_test("t.py::flaky", "passed", TIMEOUT),
+                          _test("t.py::broken", "failed", TIMEOUT)]}
+        lane_retry = {"tests": [_test("t.py::broken", "passed")]}
+        history.record_run("20260101_000000", {"tests": [_test("t.py::ok", "passed")]},
+                           extra_phases={"quarantine": lane, "retry": lane_retry})
+
+        assert _phases(history, "20260101_000000") == {
+            ("initial", "t.py::ok"): "passed",
+            ("quarantine", "t.py::flaky"): "failed",   # first attempt, not the in-session pass
+            ("retry", "t.py::flaky"): "passed",
+            ("quarantine", "t.py::broken"): "failed",
+            ("retry", "t.py::broken"): "passed",       # the lane's own re-run replaces the in-session retry
+        }
+        scores = FlakinessEngine.from_history(history).scores
+        assert scores["t.py::flaky"]["failures"] == 1
+        assert scores["t.py::flaky"]["retry_passes"] == 1
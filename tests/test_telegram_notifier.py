@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+import pytest
+
+anyio = pytest.importorskip("anyio")
+pytest.importorskip("httpx")
+
+from utilities.fake_telegram import FakeTelegramServer  # noqa: E402
+from utilities.telegram_notifier import TelegramNotifier  # noqa: E402
+
+
+async def _notify(server: FakeTelegramServer, queue: Path, summary: str, report: Path | None = None) -> int:
+    async with TelegramNotifier("token", "chat", api_url=server.url, queue_path=queue) as notifier:
+        return await notifier.notify(summary, report_path=report)
+
+
+def _texts(server: FakeTelegramServer) -> list[str]:
+    return [json.loads(r["body"])["text"] for r in server.received if r["method"] == "sendMessage"]
+
+
+@pytest.mark.parametrize("status", [502, 429])
+def test_transient_failures_are_queued_and_delivered_next_run(tmp_path: Path, status: int):
+    queue = tmp_path / "queue.json"
+    report = tmp_path / "report.md"
+    report.write_text("# Report\n")
+    with FakeTelegramServer() as server:
+        server.fail_next(1, status)
+        assert anyio.run(_notify, server, queue, "run 1", report) == 1
+        assert [r["method"] for r in server.received] == ["sendDocument"]
+
+        assert anyio.run(_notify, server, queue, "run 2") == 0
+        texts = _texts(server)
+        assert "Delayed from" in texts[0] and texts[0].endswith("run 1")
+        assert texts[1] == "run 2"
+    assert json.loads(queue.read_text()) == []
+
+
+def test_other_client_errors_are_dropped(tmp_path: Path):
+    queue = tmp_path / "queue.json"
+    with FakeTelegramServer() as server:
+        server.fail_next(1, 400)
+        assert anyio.run(_notify, server, queue, "too long") == 0
+        assert server.received == []
+    assert not queue.exists()
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("anyio")
+pytest.importorskip("httpx")
+pytest.importorskip("requests")
+
+from api_objects.users_api import UsersAPI  # noqa: E402
+from utilities.fake_gorest import FakeGoRestServer  # noqa: E402
+from workflows import user_pool  # noqa: E402
+from workflows.user_pool import UserPool  # noqa: E402
+
+
+def _pool_users(url: str) -> list[dict]:
+    return [u for u in UsersAPI(url, "t").get_all(params={"per_page": 100}).json() if u["name"].startswith("Pool")]
+
+
+def test_failed_start_falls_back_and_leaks_no_users(monkeypatch):
+    spec = user_pool._pool_spec
+
+    def one_invalid(index: int) -> dict:
+        return {**spec(index), "email": "not-an-email"} if index == 1 else spec(index)
+
+    monkeypatch.setattr(user_pool, "_pool_spec", one_invalid)
+    with FakeGoRestServer() as server:
+        pool = UserPool(server.url, "t", size=3).start()
+        assert pool.size == 0  # on-demand from now on
+        assert len(_pool_users(server.url)) == 3  # the sibling creates went through ...
+
+        shared = pool.borrow()
+        assert pool.borrow() == shared
+        pool.close()
+        assert _pool_users(server.url) == []  # ... and close() still deleted them
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utilities.config_loader import cache_dir
+from utilities.failure_clusters import signature
+
+
+def fingerprint(initial_report: dict, final_report: dict) -> str:
+    """
+    Canonical hash of what an analysis depends on: every test's outcome
+    (before and after fixing) and the normalised signature of every failure.
+    Timestamps, durations, run ids and raw tracebacks are left out, so two
+    all-green runs of the same suite share one fingerprint.
+    """
+    def _canonical(report: dict) -> list:
+        rows = []
+        for test in report.get("tests", []):
+            outcome = test.get("outcome", "")
+            sig = signature(test)["key"] if outcome in ("failed", "error") else ""
+            rows.append([test.get("nodeid", ""), outcome, sig])
+        return sorted(rows)
+
+    material = {"initial": _canonical(initial_report)}
+    if final_report is not initial_report:
+        material["final"] = _canonical(final_report)
+    return hashlib.sha1(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class AnalysisCache:
+    """
+    AI report analyses persisted across runs under .cache/, keyed by fingerprint().
+
+    Stored as JSON: {"entries": {fingerprint: {"analysis", "run_id", "seconds",
+    "created", "used"}}, "stats": {"hits", "saved_seconds"}}. Entries older
+    than the TTL are dropped; beyond `max_entries` the least recently used go.
+    `seconds` is how long the original API call took, i.e. what a hit saves.
+
+    Usage:
+        cache = AnalysisCache.load()
+        entry = cache.get(fp)
+        ...
+        cache.put(fp, analysis, run_id=..., seconds=...)
+        cache.save()
+    """
+
+    def __init__(self, path: Path, data: Optional[Dict[str, Any]] = None, ttl_days: float = 7,
+                 max_entries: int = 50):
+        data = data or {}
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = data.get("entries", {})
+        self.stats: Dict[str, float] = {"hits": 0, "saved_seconds": 0.0, **data.get("stats", {})}
+        self.ttl = ttl_days * 86400
+        self.max_entries = max(1, max_entries)
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None, ttl_days: float = 7, max_entries: int = 50) -> "AnalysisCache":
+        path = path or Path(cache_dir()) / "analyses.json"
+        data: Dict[str, Any] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError):
+                data = {}
+        return cls(path, data, ttl_days, max_entries)
+
+    def save(self) -> None:
+        self._evict()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        payload = {"entries": self.entries, "stats": self.stats}
+        tmp.write_text(json.dumps(payload, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _evict(self) -> None:
+        now = time.time()
+        live = {k: v for k, v in self.entries.items() if now - v.get("created", 0) <= self.ttl}
+        newest = sorted(live.items(), key=lambda kv: kv[1].get("used", 0), reverse=True)[:self.max_entries]
+        self.entries = dict(newest)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached entry (and count it as a hit), or None when missing or expired."""
+        entry = self.entries.get(key)
+        if not entry or time.time() - entry.get("created", 0) > self.ttl:
+            return None
+        entry["used"] = time.time()
+        self.stats["hits"] += 1
+        self.stats["saved_seconds"] = round(self.stats["saved_seconds"] + entry.get("seconds", 0.0), 2)
+        return entry
+
+    def put(self, key: str, analysis: str, *, run_id: str = "", seconds: float = 0.0) -> None:
+        now = time.time()
+        self.entries[key] = {"analysis": analysis, "run_id": run_id, "seconds": round(seconds, 2),
+                             "created": now, "used": now}
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from playwright.sync_api import BrowserContext
+
+# Treat cookies that expire within this many seconds as already expired
+_EXPIRY_MARGIN = 30
+
+
+class AuthStateCache:
+    """
+    Caches Playwright storage_state files of logged-in sessions, one per
+    (user, base_url, worker), so tests can start already authenticated
+    instead of driving the login form.
+
+    An entry is stale when it is older than `ttl` seconds or any of its
+    cookies is about to expire. Callers should also invalidate() an entry
+    when the app bounces an authenticated page back to the login page.
+    """
+
+    def __init__(self, cache_dir: Path, ttl: float = 540):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, user: str, base_url: str, worker: str) -> Path:
+        digest = hashlib.sha1(f"{user}|{base_url}|{worker}".encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"{user}_{digest}.json"
+
+    def get(self, user: str, base_url: str, worker: str) -> Optional[Path]:
+        """Return the cached state file, or None if missing or stale."""
+        path = self._path(user, base_url, worker)
+        if not path.exists():
+            return None
+        now = time.time()
+        if now - path.stat().st_mtime > self.ttl:
+            return None
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return None
+        for cookie in state.get("cookies", []):
+            expires = cookie.get("expires", -1)
+            if expires not in (-1, None) and expires - _EXPIRY_MARGIN <= now:
+                return None
+        return path
+
+    def invalidate(self, user: str, base_url: str, worker: str) -> None:
+        self._path(user, base_url, worker).unlink(missing_ok=True)
+
+    def ensure(self, user: str, base_url: str, worker: str,
+               login: Callable[[], BrowserContext]) -> Path:
+        """
+        Return a fresh state file, logging in through `login` when needed.
+        `login` must return a context whose session is authenticated; it is
+        closed after its storage_state has been saved.
+        """
+        path = self.get(user, base_url, worker)
+        if path is not None:
+            return path
+        path = self._path(user, base_url, worker)
+        ctx = login()
+        try:
+            ctx.storage_state(path=str(path))
+        finally:
+            ctx.close()
+        return path
+
+    @staticmethod
+    def cookies(path: Path) -> list:
+        """Cookies of a cached state, for applying to an existing (pooled) context."""
+        return json.loads(Path(path).read_text(encoding="utf-8")).get("cookies", [])
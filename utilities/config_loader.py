@@ -15,6 +15,17 @@ def _project_root() -> str:
     return os.path.dirname(_module_dir())
 
 
+def cache_dir(*parts: str) -> str:
+    """
+    Directory for state that persists across runs (duration history, caches…).
+    Defaults to <project>/.cache; override with TEST_CACHE_DIR.
+    """
+    base = os.getenv("TEST_CACHE_DIR") or os.path.join(_project_root(), ".cache")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
 def _cfg_path(xml_path: Optional[str]) -> str:
     return xml_path or os.path.join(_project_root(), "configuration", "data.xml")
 
@@ -57,6 +68,71 @@ def _read_credentials(root: ET.Element) -> Dict[str, Dict[str, str]]:
     return creds
 
 
+def _read_network(root: ET.Element) -> Dict[str, Any]:
+    node = root.find("./network")
+    if node is None:
+        node = ET.Element("network")
+    asset_cache = _as_bool(os.getenv("TEST_ASSET_CACHE", node.findtext("assetCache") or "false"))
+    mode = _norm_choice(os.getenv("TEST_NETWORK", node.findtext("mode")), "live", ("live", "record", "replay"))
+    har_dir = (node.findtext("harDir") or "").strip() or os.path.join(cache_dir(), "har")
+    if not os.path.isabs(har_dir):
+        har_dir = os.path.join(_project_root(), har_dir)
+    return {
+        "mode": mode,
+        "har_dir": har_dir,
+        "asset_cache": asset_cache,
+        "cache_types": _split_list(node.findtext("cacheTypes") or "image,font,stylesheet,script"),
+        "cache_ttl": int(node.findtext("cacheTtl") or 86400),
+        "block_types": _split_list(os.getenv("TEST_BLOCK_TYPES", node.findtext("blockTypes") or "")),
+        "block_urls": _split_list(node.findtext("blockUrls")),
+    }
+
+
+def _read_api(root: ET.Element) -> Dict[str, Any]:
+    node = root.find("./api")
+    if node is None:
+        node = ET.Element("api")
+    backend = _norm_choice(os.getenv("TEST_API_BACKEND", node.findtext("backend")), "live", ("live", "fake"))
+    cassettes = _norm_choice(os.getenv("TEST_API_CASSETTES", node.findtext("cassettes")), "live",
+                             ("live", "record", "replay"))
+    cassette_dir = (node.findtext("cassetteDir") or "").strip() or os.path.join(cache_dir(), "cassettes")
+    if not os.path.isabs(cassette_dir):
+        cassette_dir = os.path.join(_project_root(), cassette_dir)
+    return {
+        "backend": backend,
+        "fake_latency_ms": float(node.findtext("fakeLatencyMs") or 0),
+        "fake_seed_users": int(node.findtext("fakeSeedUsers") or 20),
+        "user_pool_size": max(0, int(node.findtext("userPoolSize") or 4)),
+        "rate_limit_per_min": float(node.findtext("rateLimitPerMin") or 0),
+        "max_retries": max(0, int(node.findtext("maxRetries") or 4)),
+        "max_concurrency": max(1, int(node.findtext("maxConcurrency") or 8)),
+        "cassettes": cassettes,
+        "cassette_dir": cassette_dir,
+        "cassette_match": _split_list(node.findtext("cassetteMatch") or "method,path,query,body"),
+        "cassette_ignore": _split_list(node.findtext("cassetteIgnore") or "email"),
+    }
+
+
+# Exception types retried in-session unless <retry><on> says otherwise
+_RETRY_ON = "TimeoutError,TargetClosedError,ConnectionError"
+
+
+def _read_retry(root: ET.Element) -> Dict[str, Any]:
+    node = root.find("./retry")
+    if node is None:
+        node = ET.Element("retry")
+    markers: Dict[str, int] = {}
+    for item in _split_list(node.findtext("markers")):
+        name, _, count = item.partition(":")
+        if name.strip() and count.strip():
+            markers[name.strip()] = int(count)
+    return {
+        "on": _split_list(os.getenv("TEST_RETRY_ON", node.findtext("on") or _RETRY_ON)),
+        "never": _split_list(node.findtext("never") or "AssertionError"),
+        "markers": markers,
+    }
+
+
 def load_config(xml_path: Optional[str] = None, *, reload: bool = False) -> Dict[str, Any]:
     global _CACHE
     if _CACHE is not None and not reload:
@@ -90,6 +166,24 @@ def load_config(xml_path: Optional[str] = None, *, reload: bool = False) -> Dict
     trace = (run.findtext("trace") or "off").strip()
     video = (run.findtext("video") or "off").strip()
     screenshot = (run.findtext("screenshot") or "only-on-failure").strip()
+    context_pool = _as_bool(run.findtext("contextPool"))
+    context_pool_size = int(run.findtext("contextPoolSize") or 2)
+    auth_cache = _as_bool(run.findtext("authCache"))
+    auth_cache_ttl = int(run.findtext("authCacheTtl") or 540)
+    preflight_ttl = int(run.findtext("preflightTtl") or 300)
+    fix_agents = int(run.findtext("fixAgents") or 1)
+    fix_cache = _as_bool(run.findtext("fixCache") or "true")
+    fix_cache_ttl_days = float(run.findtext("fixCacheTtlDays") or 14)
+    analysis_cache = _as_bool(run.findtext("analysisCache") or "true")
+    analysis_cache_ttl_days = float(run.findtext("analysisCacheTtlDays") or 7)
+    analysis_cache_max_entries = int(run.findtext("analysisCacheMaxEntries") or 50)
+    report_formats = [f.lower() for f in _split_list(run.findtext("reportFormats") or "md")]
+    report_max_failures = int(run.findtext("reportMaxFailures") or 100)
+    history_db = (run.findtext("historyDb") or "").strip()
+    quarantine = _as_bool(run.findtext("quarantine") or "true")
+    flaky_threshold = float(run.findtext("flakyThreshold") or 0.6)
+    flaky_window = int(run.findtext("flakyWindow") or 30)
+    impact_smoke = _split_list(run.findtext("impactSmoke") or "smoke")
 
     env_override = os.getenv("TEST_ENV")
     if env_override:
@@ -109,9 +203,16 @@ def load_config(xml_path: Optional[str] = None, *, reload: bool = False) -> Dict
         tags = _split_list(env_tags)
     workers = int(os.getenv("TEST_WORKERS", workers))
     retries = int(os.getenv("TEST_RETRIES", retries))
+    fix_agents = int(os.getenv("TEST_FIX_AGENTS", fix_agents))
+    fix_cache = _as_bool(os.getenv("TEST_FIX_CACHE", str(fix_cache)))
+    analysis_cache = _as_bool(os.getenv("TEST_ANALYSIS_CACHE", str(analysis_cache)))
+    history_db = os.getenv("TEST_HISTORY_DB", history_db)
+    quarantine = _as_bool(os.getenv("TEST_QUARANTINE", str(quarantine)))
     trace = os.getenv("TEST_TRACE", trace)
     video = os.getenv("TEST_VIDEO", video)
     screenshot = os.getenv("TEST_SCREENSHOT", screenshot)
+    context_pool = _as_bool(os.getenv("TEST_CONTEXT_POOL", str(context_pool)))
+    auth_cache = _as_bool(os.getenv("TEST_AUTH_CACHE", str(auth_cache)))
 
     if not browsers:
         browsers = ["chromium"]
@@ -134,6 +235,9 @@ def load_config(xml_path: Optional[str] = None, *, reload: bool = False) -> Dict
         )
 
     credentials = _read_credentials(root)
+    network = _read_network(root)
+    api = _read_api(root)
+    retry = _read_retry(root)
 
     cfg: Dict[str, Any] = {
         "enabled": _as_bool(run.findtext("enabled")),
@@ -149,7 +253,28 @@ def load_config(xml_path: Optional[str] = None, *, reload: bool = False) -> Dict
         "trace": trace,
         "video": video,
         "screenshot": screenshot,
+        "context_pool": bool(context_pool),
+        "context_pool_size": max(1, context_pool_size),
+        "auth_cache": bool(auth_cache),
+        "auth_cache_ttl": auth_cache_ttl,
+        "preflight_ttl": preflight_ttl,
+        "fix_agents": max(1, fix_agents),
+        "fix_cache": bool(fix_cache),
+        "fix_cache_ttl_days": fix_cache_ttl_days,
+        "analysis_cache": bool(analysis_cache),
+        "analysis_cache_ttl_days": analysis_cache_ttl_days,
+        "analysis_cache_max_entries": analysis_cache_max_entries,
+        "report_formats": report_formats,
+        "report_max_failures": max(1, report_max_failures),
+        "history_db": history_db,
+        "quarantine": bool(quarantine),
+        "flaky_threshold": flaky_threshold,
+        "flaky_window": max(2, flaky_window),
+        "impact_smoke": impact_smoke,
         "credentials": credentials,
+        "network": network,
+        "api": api,
+        "retry": retry,
         "_source": path,
     }
 
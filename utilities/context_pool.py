@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Set
+
+from playwright.sync_api import BrowserContext
+
+# BrowserContext methods that change context-level settings which a state
+# reset cannot undo. A context that saw any of them is closed, not reused.
+_MUTATORS = (
+    "add_init_script",
+    "expose_binding",
+    "expose_function",
+    "route",
+    "route_from_har",
+    "route_web_socket",
+    "set_default_navigation_timeout",
+    "set_default_timeout",
+    "set_extra_http_headers",
+    "set_geolocation",
+    "set_http_credentials",
+    "set_offline",
+)
+
+_CLEAR_STORAGE_JS = "() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }"
+
+
+class ContextPool:
+    """
+    Hands out pre-created browser contexts and resets them between tests
+    instead of paying new_context()/close() for every test.
+
+    Between tests a context is wiped: localStorage/sessionStorage of open
+    pages, all pages, cookies and permissions. A context is discarded (and a
+    fresh one created) when:
+      - the test called a context-level setter (see _MUTATORS),
+      - the reset could not be verified via storage_state(),
+      - the caller releases it with reusable=False.
+
+    Playwright's sync API is not thread-safe, so "pre-warming" happens on the
+    test thread: `size` spare contexts are created on first use and every
+    released context is reset immediately, so acquire() is normally a pop.
+    """
+
+    def __init__(self, factory: Callable[[], BrowserContext], size: int = 2):
+        self._factory = factory
+        self.size = max(1, size)
+        self._idle: List[BrowserContext] = []
+        self._dirty: Dict[int, Set[str]] = {}
+        self._warm = False
+        self.stats = {"created": 0, "reused": 0, "discarded": 0}
+
+    # -- lifecycle ---------------------------------------------------------
+    def _create(self) -> BrowserContext:
+        ctx = self._factory()
+        self._instrument(ctx)
+        self.stats["created"] += 1
+        return ctx
+
+    def _instrument(self, ctx: BrowserContext) -> None:
+        """Wrap context-level setters so the pool knows the context was changed."""
+        dirty = self._dirty.setdefault(id(ctx), set())
+        for name in _MUTATORS:
+            original = getattr(ctx, name, None)
+            if original is None:
+                continue
+
+            def _tracked(*args, _name=name, _original=original, **kwargs):
+                dirty.add(_name)
+                return _original(*args, **kwargs)
+
+            setattr(ctx, name, _tracked)
+
+    def warm(self) -> None:
+        while len(self._idle) < self.size:
+            self._idle.append(self._create())
+        self._warm = True
+
+    def acquire(self) -> BrowserContext:
+        if not self._warm:
+            self.warm()
+        if self._idle:
+            self.stats["reused"] += 1
+            return self._idle.pop()
+        return self._create()
+
+    def release(self, ctx: BrowserContext, reusable: bool = True) -> None:
+        dirty = self._dirty.get(id(ctx), set())
+        if reusable and not dirty and len(self._idle) < self.size and self._reset(ctx):
+            self._idle.append(ctx)
+            return
+        self._discard(ctx)
+
+    def close(self) -> None:
+        while self._idle:
+            self._discard(self._idle.pop(), count=False)
+
+    def _discard(self, ctx: BrowserContext, count: bool = True) -> None:
+        self._dirty.pop(id(ctx), None)
+        if count:
+            self.stats["discarded"] += 1
+        try:
+            ctx.close()
+        except Exception:
+            pass
+
+    # -- state reset -------------------------------------------------------
+    @staticmethod
+    def _reset(ctx: BrowserContext) -> bool:
+        """Wipe per-test state; return False if the context is not verifiably clean."""
+        try:
+            for pg in list(ctx.pages):
+                try:
+                    pg.evaluate(_CLEAR_STORAGE_JS)
+                except Exception:
+                    pass
+                pg.close()
+            ctx.clear_cookies()
+            ctx.clear_permissions()
+            state = ctx.storage_state()
+        except Exception:
+            return False
+        if state.get("cookies"):
+            return False
+        return not any(origin.get("localStorage") for origin in state.get("origins", []))
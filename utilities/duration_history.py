@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import statistics
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from utilities.config_loader import cache_dir
+
+# How many recent samples are kept per nodeid
+_MAX_SAMPLES = 10
+# Estimate used when nothing at all is known (seconds)
+_DEFAULT_ESTIMATE = 2.0
+
+
+def _test_duration(test: dict) -> Optional[float]:
+    """Total setup + call + teardown time of one pytest-json-report test entry."""
+    total = 0.0
+    seen = False
+    for phase in ("setup", "call", "teardown"):
+        d = (test.get(phase) or {}).get("duration")
+        if isinstance(d, (int, float)):
+            total += d
+            seen = True
+    return total if seen else None
+
+
+def _class_key(nodeid: str) -> str:
+    """'file.py::Class::test[param]' -> 'file.py::Class' ('file.py' for module-level tests)."""
+    base = nodeid.split("[", 1)[0]
+    return base.rsplit("::", 1)[0]
+
+
+def _module_key(nodeid: str) -> str:
+    return nodeid.split("::", 1)[0]
+
+
+class DurationHistory:
+    """
+    Per-nodeid test duration history persisted across runs.
+
+    Stored as JSON ({nodeid: [recent durations]}) under .cache/. Used by the
+    runner to order and pack tests longest-first across parallel workers.
+
+    Usage:
+        history = DurationHistory.load()
+        shards = history.plan(nodeids, workers=4)
+        ...
+        history.record(report)
+        history.save()
+    """
+
+    def __init__(self, path: Path, samples: Optional[Dict[str, List[float]]] = None):
+        self.path = path
+        self.samples: Dict[str, List[float]] = samples or {}
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "DurationHistory":
+        path = path or Path(cache_dir()) / "durations.json"
+        samples: Dict[str, List[float]] = {}
+        if path.exists():
+            try:
+                samples = json.loads(path.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError):
+                samples = {}
+        return cls(path, samples)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.samples, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def record(self, report: dict) -> int:
+        """Add the durations from a pytest JSON report. Skipped tests are ignored."""
+        added = 0
+        for test in report.get("tests", []):
+            nodeid = test.get("nodeid")
+            duration = _test_duration(test)
+            if not nodeid or duration is None or test.get("outcome") == "skipped":
+                continue
+            bucket = self.samples.setdefault(nodeid, [])
+            bucket.append(round(duration, 3))
+            del bucket[:-_MAX_SAMPLES]
+            added += 1
+        return added
+
+    def _known(self, nodeid: str) -> Optional[float]:
+        bucket = self.samples.get(nodeid)
+        return statistics.median(bucket) if bucket else None
+
+    def estimates(self, nodeids: Iterable[str]) -> Dict[str, float]:
+        """
+        Expected duration per nodeid. Tests without history fall back to the
+        median of their class, then their module, then the whole history.
+        """
+        by_class: Dict[str, List[float]] = {}
+        by_module: Dict[str, List[float]] = {}
+        for nid, bucket in self.samples.items():
+            if not bucket:
+                continue
+            m = statistics.median(bucket)
+            by_class.setdefault(_class_key(nid), []).append(m)
+            by_module.setdefault(_module_key(nid), []).append(m)
+        all_known = [m for values in by_module.values() for m in values]
+        overall = statistics.median(all_known) if all_known else _DEFAULT_ESTIMATE
+
+        out: Dict[str, float] = {}
+        for nid in nodeids:
+            known = self._known(nid)
+            if known is None and by_class.get(_class_key(nid)):
+                known = statistics.median(by_class[_class_key(nid)])
+            if known is None and by_module.get(_module_key(nid)):
+                known = statistics.median(by_module[_module_key(nid)])
+            out[nid] = known if known is not None else overall
+        return out
+
+    def plan(self, nodeids: List[str], workers: int) -> List[List[str]]:
+        """
+        Pack nodeids into at most `workers` shards, longest-first (LPT): each
+        test goes to the currently least-loaded shard. Within a shard, tests
+        keep longest-first order so the slow ones start early.
+        """
+        est = self.estimates(nodeids)
+        ordered = sorted(nodeids, key=lambda n: (-est[n], n))
+        workers = max(1, min(workers, len(ordered)))
+        heap = [(0.0, i) for i in range(workers)]
+        shards: List[List[str]] = [[] for _ in range(workers)]
+        for nid in ordered:
+            load, i = heapq.heappop(heap)
+            shards[i].append(nid)
+            heapq.heappush(heap, (load + est[nid], i))
+        return [s for s in shards if s]
+
+    def expected_load(self, shards: List[List[str]]) -> List[float]:
+        est = self.estimates(n for s in shards for n in s)
+        return [sum(est[n] for n in s) for s in shards]
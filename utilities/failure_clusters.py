@@ -0,0 +1,172 @@
+"""
+Group test failures that fail the same way.
+
+A failure's signature is built from its traceback after normalisation: memory
+addresses, timings, timestamps, ids, ports, uuids, line numbers and test names
+are stripped; other numbers (status codes, expected values) are kept. It is
+keyed by
+  - exception type     e.g. playwright._impl._errors.TimeoutError
+  - failing locator    e.g. locator("[data-test=\"add-to-cart\"]")
+  - innermost frame    e.g. page_objects/inventory_page.py:add_to_cart
+(plus the normalised exception message when there is no locator, so unrelated
+assertion failures in one file do not collapse into one cluster).
+
+partition_failures() then joins clusters whose files overlap (test file, page
+objects, workflows in the traceback) into independent groups for fix agents.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+# Normalisation of volatile tokens only: literal numbers in messages (status
+# codes, counts, expected values) stay, so "expected 200, got 404" and "…got 500"
+# are different failures. Order matters (timestamps and uuids before hex, hex
+# before ids).
+_SUBS = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.I), "<addr>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\s*(?:ms|s|sec|seconds)\b"), "<time>"),
+    (re.compile(r"(\.py):\d+\b"), r"\1:<n>"),                          # traceback line numbers
+    (re.compile(r"\bline \d+\b"), "line <n>"),
+    (re.compile(r"(//[^\s/:'\"]+):\d+\b"), r"\1:<port>"),
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "<email>"),           # generated test users
+    (re.compile(r"(?<=/)\d+\b"), "<id>"),                                # /users/7312
+    (re.compile(r"\b\d{5,}\b"), "<id>"),
+    (re.compile(r"(?:/tmp|/var/folders)/[^\s'\"]*"), "<tmp>"),
+]
+_TEST_NAME_RE = re.compile(r"(?<=: in )test_\w+")  # test functions in traceback frames
+_EXC_RE = re.compile(r"^E\s+((?:[A-Za-z_][\w]*\.)*[A-Z]\w*(?:Error|Exception|Timeout\w*|Failed|Exit))\b(.*)$", re.M)
+_CRASH_RE = re.compile(r"^[^\s:]+\.py:<n>: ((?:[A-Za-z_][\w]*\.)*[A-Z]\w*)\s*$", re.M)
+_LOCATOR_RE = re.compile(r"((?:locator|get_by_\w+)\(.*?\))(?=\s|$|\.|\n)")
+_FRAME_RE = re.compile(r"^([\w./\\:-]+\.py):<n>: in (<test>|\w+)", re.M)
+
+
+def normalize(text: str, test_names: Iterable[str] = ()) -> str:
+    """Strip the volatile parts of a traceback so equal failures compare equal."""
+    for name in test_names:
+        if name:
+            text = text.replace(name, "<test>")
+    text = _TEST_NAME_RE.sub("<test>", text)
+    for pattern, repl in _SUBS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def _longrepr(test: Dict[str, Any]) -> str:
+    for phase in ("call", "setup", "teardown"):
+        text = (test.get(phase) or {}).get("longrepr")
+        if text:
+            return text
+    return ""
+
+
+def signature(test: Dict[str, Any]) -> Dict[str, str]:
+    """{exc_type, locator, frame, message, key} for one pytest-json-report test entry."""
+    nodeid = test.get("nodeid", "")
+    parts = nodeid.split("::")
+    text = normalize(_longrepr(test), [p.split("[")[0] for p in parts[1:]])
+
+    exc_type, message = "", ""
+    match = _EXC_RE.search(text)
+    if match:
+        exc_type, message = match.group(1), match.group(2).strip(" :")
+    else:
+        crash = _CRASH_RE.findall(text)
+        exc_type = crash[-1] if crash else ""
+
+    locator_match = _LOCATOR_RE.search(text)
+    locator = locator_match.group(1) if locator_match else ""
+
+    frames = _FRAME_RE.findall(text)
+    if frames:
+        path, function = frames[-1]
+        frame = path.replace("\\", "/") + ":" + function
+    else:
+        frame = parts[0]
+
+    material = "|".join([exc_type, locator, frame, "" if locator else message[:200]])
+    key = hashlib.sha1(material.encode("utf-8")).hexdigest()[:12]
+    return {"exc_type": exc_type or "unknown", "locator": locator, "frame": frame, "message": message[:200],
+            "key": key}
+
+
+class FailureCluster:
+    """Failures sharing one signature; `representative` is the one shown in prompts and reports."""
+
+    def __init__(self, sig: Dict[str, str]):
+        self.signature = sig
+        self.tests: List[Dict[str, Any]] = []
+
+    @property
+    def key(self) -> str:
+        return self.signature["key"]
+
+    @property
+    def representative(self) -> Dict[str, Any]:
+        return self.tests[0]
+
+    @property
+    def nodeids(self) -> List[str]:
+        return [t.get("nodeid", "") for t in self.tests]
+
+    def title(self) -> str:
+        where = self.signature["locator"] or self.signature["frame"]
+        return f"{self.signature['exc_type']} at {where}"
+
+
+def cluster_failures(failures: Iterable[Dict[str, Any]]) -> List[FailureCluster]:
+    """Clusters, largest first (ties keep first-seen order)."""
+    clusters: Dict[str, FailureCluster] = {}
+    for test in failures:
+        sig = signature(test)
+        clusters.setdefault(sig["key"], FailureCluster(sig)).tests.append(test)
+    return sorted(clusters.values(), key=lambda c: len(c.tests), reverse=True)
+
+
+# Project files that put failures into the same fix group when they show up in
+# a traceback (besides the test file itself)
+_SCOPE_RE = re.compile(r"((?:test_cases|page_objects|workflows|api_objects|utilities)/[\w/]+\.py)")
+
+
+def failure_scope(test: Dict[str, Any]) -> Set[str]:
+    """Files a failure touches: its test file plus project files in its traceback."""
+    files = {test.get("nodeid", "").split("::")[0]}
+    text = "\n".join((test.get(phase) or {}).get("longrepr", "") or "" for phase in ("setup", "call", "teardown"))
+    files.update(_SCOPE_RE.findall(text.replace("\\", "/")))
+    return {f for f in files if f}
+
+
+def partition_failures(failures: Iterable[Dict[str, Any]]) -> List[Tuple[List[Dict[str, Any]], Set[str]]]:
+    """
+    Split failures into independent groups (one fix agent each): two failures
+    share a group when they fail the same way (same cluster) or their scopes
+    (test file, page objects, workflows…) overlap, transitively.
+    Returns [(failures, scope files)] ordered by group size, largest first.
+    """
+    units = [c.tests for c in cluster_failures(failures)]
+    parent = list(range(len(units)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    scopes = [set().union(*(failure_scope(t) for t in unit)) for unit in units]
+    owner: Dict[str, int] = {}
+    for index, scope in enumerate(scopes):
+        for path in scope:
+            if path in owner:
+                parent[find(index)] = find(owner[path])
+            else:
+                owner[path] = index
+
+    groups: Dict[int, Tuple[List[Dict[str, Any]], Set[str]]] = {}
+    for index, unit in enumerate(units):
+        members, files = groups.setdefault(find(index), ([], set()))
+        members.extend(unit)
+        files.update(scopes[index])
+    return sorted(groups.values(), key=lambda group: len(group[0]), reverse=True)
@@ -0,0 +1,309 @@
+"""
+In-process stateful fake of the GoRest v2 /users API.
+
+Mirrors the parts of https://gorest.co.in/public/v2 that UsersAPI uses:
+  GET    /users            → 200, list (newest first), page/per_page + X-Pagination-* headers
+  GET    /users/{id}       → 200 | 404
+  POST   /users            → 201 | 422 | 401
+  PUT    /users/{id}       → 200 | 404 | 422 | 401   (PATCH behaves the same)
+  DELETE /users/{id}       → 204 | 404 | 401
+
+Runs on a ThreadingHTTPServer with HTTP/1.1 keep-alive, so it can also serve
+as a local backend for throughput tests of UsersAPI. Latency can be injected
+per request.
+
+Usage:
+  with FakeGoRestServer(latency=0.05) as server:
+      api = UsersAPI(server.url, token="anything")
+
+  # standalone
+  python -m utilities.fake_gorest --port 8080 --latency-ms 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_PATH_RE = re.compile(r"^(?:/public/v2)?/users(?:/(?P<id>[^/]+))?/?$")
+_FIELDS = ("name", "email", "gender", "status")
+_DEFAULT_PER_PAGE = 10
+_MAX_PER_PAGE = 100
+
+
+class UserStore:
+    """Thread-safe in-memory user table with GoRest's validation rules."""
+
+    def __init__(self, seed_users: int = 20):
+        self._lock = threading.Lock()
+        self._users: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 7_000_000
+        for i in range(seed_users):
+            self.create({
+                "name": f"Seed User {i}",
+                "email": f"seed_{i}@fake-gorest.test",
+                "gender": "female" if i % 2 else "male",
+                "status": "active" if i % 3 else "inactive",
+            })
+
+    def _validate(self, data: Dict[str, Any], partial: bool, user_id: Optional[int] = None) -> List[Dict[str, str]]:
+        errors: List[Dict[str, str]] = []
+        for field in _FIELDS:
+            if partial and field not in data:
+                continue
+            value = data.get(field)
+            if value is None or str(value).strip() == "":
+                msg = "can't be blank, can be male of female" if field == "gender" else "can't be blank"
+                errors.append({"field": field, "message": msg})
+            elif field == "email" and not _EMAIL_RE.match(str(value)):
+                errors.append({"field": "email", "message": "is invalid"})
+            elif field == "email" and any(
+                u["email"] == value and uid != user_id for uid, u in self._users.items()
+            ):
+                errors.append({"field": "email", "message": "has already been taken"})
+            elif field == "gender" and value not in ("male", "female"):
+                errors.append({"field": "gender", "message": "can't be blank, can be male of female"})
+            elif field == "status" and value not in ("active", "inactive"):
+                errors.append({"field": "status", "message": "can't be blank"})
+        return errors
+
+    def list(self, filters: Dict[str, str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            users = sorted(self._users.values(), key=lambda u: u["id"], reverse=True)
+        for field, value in filters.items():
+            users = [u for u in users if value.lower() in str(u.get(field, "")).lower()]
+        return users
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            user = self._users.get(user_id)
+            return dict(user) if user else None
+
+    def create(self, data: Dict[str, Any]) -> Tuple[int, Any]:
+        with self._lock:
+            errors = self._validate(data, partial=False)
+            if errors:
+                return 422, errors
+            user = {"id": self._next_id, **{f: data[f] for f in _FIELDS}}
+            self._next_id += 1
+            self._users[user["id"]] = user
+            return 201, dict(user)
+
+    def update(self, user_id: int, data: Dict[str, Any]) -> Tuple[int, Any]:
+        with self._lock:
+            if user_id not in self._users:
+                return 404, {"message": "Resource not found"}
+            errors = self._validate(data, partial=True, user_id=user_id)
+            if errors:
+                return 422, errors
+            self._users[user_id].update({f: data[f] for f in _FIELDS if f in data})
+            return 200, dict(self._users[user_id])
+
+    def delete(self, user_id: int) -> Tuple[int, Any]:
+        with self._lock:
+            if self._users.pop(user_id, None) is None:
+                return 404, {"message": "Resource not found"}
+            return 204, None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can pool connections
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid delayed-ACK stalls
+    server: "_Server"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+        pass
+
+    # -- helpers -----------------------------------------------------------
+    def _send(self, status: int, body: Any = None, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _authorized(self) -> bool:
+        if not self.server.require_token:
+            return True
+        auth = self.headers.get("Authorization", "")
+        return auth.startswith("Bearer ") and bool(auth[len("Bearer "):].strip())
+
+    def _route(self) -> Tuple[Optional[re.Match], Dict[str, List[str]]]:
+        parts = urlsplit(self.path)
+        return _PATH_RE.match(parts.path), parse_qs(parts.query)
+
+    def _dispatch(self, method: str) -> None:
+        self.server.inject_latency()
+        match, query = self._route()
+        if match is None:
+            self._send(404, {"message": "Resource not found"})
+            return
+        raw_id = match.group("id")
+        if raw_id is not None and not raw_id.isdigit():
+            self._send(404, {"message": "Resource not found"})
+            return
+        user_id = int(raw_id) if raw_id is not None else None
+        store = self.server.store
+
+        if method != "GET" and not self._authorized():
+            self._send(401, {"message": "Authentication failed"})
+            return
+
+        if method == "GET" and user_id is None:
+            self._list(query)
+        elif method == "GET":
+            user = store.get(user_id)
+            if user is None:
+                self._send(404, {"message": "Resource not found"})
+            else:
+                self._send(200, user)
+        elif method == "POST" and user_id is None:
+            self._send(*store.create(self._body()))
+        elif method in ("PUT", "PATCH") and user_id is not None:
+            self._send(*store.update(user_id, self._body()))
+        elif method == "DELETE" and user_id is not None:
+            self._send(*store.delete(user_id))
+        else:
+            self._send(404, {"message": "Resource not found"})
+
+    def _list(self, query: Dict[str, List[str]]) -> None:
+        def _int(name: str, default: int) -> int:
+            try:
+                return max(1, int(query.get(name, [default])[0]))
+            except ValueError:
+                return default
+
+        page = _int("page", 1)
+        per_page = min(_int("per_page", _DEFAULT_PER_PAGE), _MAX_PER_PAGE)
+        filters = {f: query[f][0] for f in _FIELDS if f in query}
+        users = self.server.store.list(filters)
+        total = len(users)
+        pages = max(1, -(-total // per_page))
+        chunk = users[(page - 1) * per_page: page * per_page]
+        self._send(200, chunk, {
+            "X-Pagination-Total": str(total),
+            "X-Pagination-Pages": str(pages),
+            "X-Pagination-Page": str(page),
+            "X-Pagination-Limit": str(per_page),
+        })
+
+    def do_GET(self) -> None:  # noqa: N802 - stdlib naming
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._dispatch("POST")
+
+    def do_PUT(self) -> None:  # noqa: N802
+        self._dispatch("PUT")
+
+    def do_PATCH(self) -> None:  # noqa: N802
+        self._dispatch("PATCH")
+
+    def do_DELETE(self) -> None:  # noqa: N802
+        self._dispatch("DELETE")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address: Tuple[str, int], store: UserStore, latency: float, jitter: float,
+                 require_token: bool):
+        super().__init__(address, _Handler)
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.require_token = require_token
+
+    def inject_latency(self) -> None:
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeGoRestServer:
+    """Runs the fake API on a background thread. `url` is a drop-in for <apiUrl>."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 seed_users: int = 20, require_token: bool = False):
+        self.store = UserStore(seed_users)
+        self._server = _Server((host, port), self.store, latency, jitter, require_token)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/public/v2"
+
+    @property
+    def latency(self) -> float:
+        return self._server.latency
+
+    @latency.setter
+    def latency(self, value: float) -> None:
+        self._server.latency = value
+
+    def start(self) -> "FakeGoRestServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-gorest", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeGoRestServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local fake of the GoRest /users API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed delay added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay (0..N ms)")
+    parser.add_argument("--seed-users", type=int, default=20)
+    parser.add_argument("--require-token", action="store_true", help="Reject writes without a Bearer token (401)")
+    args = parser.parse_args()
+
+    server = FakeGoRestServer(args.host, args.port, args.latency_ms / 1000, args.jitter_ms / 1000,
+                              args.seed_users, args.require_token)
+    print(f"Fake GoRest listening on {server.url}  (Ctrl-C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+In-process fake of the Telegram Bot API endpoints used by the runner.
+
+  POST /bot<token>/sendMessage   (JSON)          → 200 {"ok": true, "result": {...}}
+  POST /bot<token>/sendDocument  (multipart)     → 200 {"ok": true, "result": {...}}
+
+Every accepted call is appended to `server.received` as
+{"method", "token", "body"} (body = raw request bytes). `fail_next(n)` makes
+the next n calls answer 502 (or `status`, e.g. 429 or 400), to exercise
+TelegramNotifier's retry queue.
+
+Usage:
+  with FakeTelegramServer() as server:
+      notifier = TelegramNotifier("token", "chat", api_url=server.url)
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+_PATH_RE = re.compile(r"^/bot(?P<token>[^/]+)/(?P<method>sendMessage|sendDocument)$")
+_DESCRIPTIONS = {400: "Bad Request", 403: "Forbidden", 429: "Too Many Requests", 502: "Bad Gateway"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+        pass
+
+    def _send(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self) -> None:  # noqa: N802 - stdlib naming
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        match = _PATH_RE.match(self.path)
+        if match is None:
+            self._send(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+        status = self.server.take_failure()
+        if status:
+            self._send(status, {"ok": False, "error_code": status, "description": _DESCRIPTIONS.get(status, "Error")})
+            return
+        with self.server.lock:
+            self.server.received.append({"method": match.group("method"), "token": match.group("token"),
+                                         "body": body})
+            message_id = len(self.server.received)
+        self._send(200, {"ok": True, "result": {"message_id": message_id}})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int]):
+        super().__init__(address, _Handler)
+        self.lock = threading.Lock()
+        self.received: List[Dict[str, Any]] = []
+        self.failures: List[int] = []  # statuses for the next calls, in order
+
+    def take_failure(self) -> int:
+        with self.lock:
+            return self.failures.pop(0) if self.failures else 0
+
+
+class FakeTelegramServer:
+    """Runs the fake Bot API on a background thread. `url` is a drop-in for TELEGRAM_API_URL."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = _Server((host, port))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def received(self) -> List[Dict[str, Any]]:
+        with self._server.lock:
+            return list(self._server.received)
+
+    def fail_next(self, count: int, status: int = 502) -> None:
+        with self._server.lock:
+            self._server.failures.extend([status] * count)
+
+    def start(self) -> "FakeTelegramServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-telegram", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeTelegramServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from utilities.config_loader import cache_dir
+
+
+def _file_hash(root: Path, rel: str) -> str:
+    try:
+        return hashlib.sha1((root / rel).read_bytes()).hexdigest()
+    except OSError:
+        return "missing"
+
+
+def git(root: Path, *args: str, stdin: Optional[str] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=root, input=stdin, capture_output=True, text=True)
+
+
+class FixCache:
+    """
+    Outcome of earlier fix attempts, persisted across runs under .cache/.
+
+    Key: a failure cluster's signature plus the content hashes of the files it
+    involves (test file, page objects, workflows). Any edit to those files
+    produces a new key, so stale outcomes are never reused.
+
+    Value: {"outcome": "fixed" | "unfixed", "diff", "summary", "run_id",
+    "nodeids", "created"}. A "fixed" entry holds the verified `git diff` of the
+    agent's edits to the cluster's own files, taken against the baseline()
+    recorded before the agent ran, so the runner can reapply it. An "unfixed" entry lets the
+    runner skip a failure it already could not fix and point to that run.
+
+    Usage:
+        cache = FixCache.load(root)
+        key = cache.key(signature_key, files)
+        entry = cache.get(key)
+        ...
+        cache.put(key, "fixed", diff=..., summary=..., run_id=..., nodeids=[...])
+        cache.save()
+    """
+
+    def __init__(self, root: Path, path: Path, entries: Optional[Dict[str, Dict[str, Any]]] = None,
+                 ttl_days: float = 14):
+        self.root = root
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.ttl = ttl_days * 86400
+
+    @classmethod
+    def load(cls, root: Path, path: Optional[Path] = None, ttl_days: float = 14) -> "FixCache":
+        path = path or Path(cache_dir()) / "fix_outcomes.json"
+        entries: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            try:
+                entries = json.loads(path.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError):
+                entries = {}
+        return cls(root, path, entries, ttl_days)
+
+    def save(self) -> None:
+        now = time.time()
+        self.entries = {k: v for k, v in self.entries.items() if now - v.get("created", 0) <= self.ttl}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def key(self, signature_key: str, files: Iterable[str]) -> str:
+        material = [signature_key] + [f"{f}:{_file_hash(self.root, f)}" for f in sorted(set(files))]
+        return hashlib.sha1("\n".join(material).encode("utf-8")).hexdigest()[:16]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry and time.time() - entry.get("created", 0) > self.ttl:
+            return None
+        return entry
+
+    def put(self, key: str, outcome: str, *, diff: str = "", summary: str = "", run_id: str = "",
+            nodeids: Iterable[str] = ()) -> None:
+        self.entries[key] = {
+            "outcome": outcome,
+            "diff": diff,
+            "summary": summary[-2000:],
+            "run_id": run_id,
+            "nodeids": list(nodeids),
+            "created": time.time(),
+        }
+
+    def invalidate(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    # -- patches -------------------------------------------------------------
+    def baseline(self) -> str:
+        """
+        Commit holding the current working tree (`git stash create`, HEAD when
+        clean), taken before an agent runs so its patch excludes local edits
+        that were already there. "" outside a git checkout.
+        """
+        result = git(self.root, "stash", "create")
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+        result = git(self.root, "rev-parse", "HEAD")
+        return result.stdout.strip() if result.returncode == 0 else ""
+
+    def diff(self, files: Iterable[str], base: str = "HEAD") -> str:
+        """Working-tree diff (vs `base`) of the given files; "" outside a git checkout."""
+        files = sorted(set(files))
+        if not files or not base:
+            return ""
+        result = git(self.root, "diff", base, "--", *files)
+        return result.stdout if result.returncode == 0 else ""
+
+    def apply(self, diff: str) -> bool:
+        """Reapply a cached patch if it still applies cleanly."""
+        if not diff.strip():
+            return False
+        if git(self.root, "apply", "--check", "-", stdin=diff).returncode != 0:
+            return False
+        return git(self.root, "apply", "-", stdin=diff).returncode == 0
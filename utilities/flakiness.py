@@ -0,0 +1,89 @@
+"""
+Flakiness scores from the run history (utilities.run_history).
+
+A test's score (0..1) says how intermittent its failures are over the last
+`window` runs: the share of its failures that the very next run passed.
+  - failures interleaved with passes score high (each failure isolated → 1.0),
+    so one failure among a long run of passes is enough once the test has
+    `min_runs` runs of history
+  - a streak of consecutive failures scores low: that is a broken test, and it
+    belongs with the fix agent
+  - a failure in the newest run has no next run yet and does not count
+  - never failing or always failing scores 0
+Passing on an immediate retry of the same run is supporting evidence: each
+such pass adds 0.3, so one retry pass alone never quarantines a test.
+
+Runs backfilled from Markdown reports only list failures; there a test known
+from other runs counts as passed when the run had passing tests.
+
+Usage:
+  with RunHistory.open() as history:
+      engine = FlakinessEngine.from_history(history, window=30, threshold=0.6)
+  engine.quarantined()              # nodeids at or above the threshold
+  engine.scores["test_x.py::test"]  # {"score", "runs", "failures", "retry_passes"}
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+from utilities.run_history import RunHistory
+
+_FAILED = ("failed", "error")
+
+
+def flakiness_score(failed: Sequence[bool], retry_passes: int = 0, min_runs: int = 5) -> float:
+    """Score one test from its first-attempt outcomes (newest first, True = failed)."""
+    retry_score = min(1.0, 0.3 * retry_passes)
+    runs, failures = len(failed), sum(failed)
+    if runs < min_runs or failures in (0, runs):
+        return retry_score
+    settled = sum(failed[1:])  # failures with a newer run to judge them by
+    recovered = sum(1 for newer, older in zip(failed, failed[1:]) if older and not newer)
+    isolation = recovered / settled if settled else 0.0
+    return round(max(isolation, retry_score), 3)
+
+
+class FlakinessEngine:
+    """Scores for every test seen in the window, and the quarantine decision."""
+
+    def __init__(self, scores: Dict[str, Dict[str, Any]], threshold: float = 0.6):
+        self.scores = scores
+        self.threshold = threshold
+
+    @classmethod
+    def from_history(cls, history: RunHistory, window: int = 30, threshold: float = 0.6,
+                     min_runs: int = 5) -> "FlakinessEngine":
+        runs: List[str] = []
+        first: Dict[str, Dict[str, bool]] = {}  # nodeid → run_id → failed
+        retried: Dict[str, int] = {}
+        partial: Dict[str, bool] = {}  # run_id → Markdown backfill with passing tests
+        for row in history.recent_outcomes(window):
+            if row["run_id"] not in partial:
+                runs.append(row["run_id"])
+                partial[row["run_id"]] = row["source"] == "backfill-md" and (row["run_passed"] or 0) > 0
+            if row["nodeid"] is None or row["outcome"] not in ("passed", *_FAILED):
+                continue
+            if row["phase"] == "retry":
+                if row["outcome"] == "passed":
+                    retried[row["nodeid"]] = retried.get(row["nodeid"], 0) + 1
+            else:
+                first.setdefault(row["nodeid"], {})[row["run_id"]] = row["outcome"] in _FAILED
+
+        scores: Dict[str, Dict[str, Any]] = {}
+        for nodeid, by_run in first.items():
+            failed = [by_run[r] if r in by_run else False for r in runs if r in by_run or partial[r]]
+            scores[nodeid] = {
+                "score": flakiness_score(failed, retried.get(nodeid, 0), min_runs),
+                "runs": len(failed),
+                "failures": sum(failed),
+                "retry_passes": retried.get(nodeid, 0),
+            }
+        return cls(scores, threshold)
+
+    def is_flaky(self, nodeid: str) -> bool:
+        return self.scores.get(nodeid, {}).get("score", 0.0) >= self.threshold
+
+    def quarantined(self) -> List[str]:
+        """Known-flaky nodeids, highest score first."""
+        flaky = [n for n in self.scores if self.is_flaky(n)]
+        return sorted(flaky, key=lambda n: self.scores[n]["score"], reverse=True)
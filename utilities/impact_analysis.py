@@ -0,0 +1,551 @@
+"""
+Test impact analysis: which tests can be affected by a git diff.
+
+Every Python file of the project is summarised from its AST (never imported):
+its symbols — functions, classes, methods, class constants such as
+CartPage.REMOVE_BTN, module-level constants — with their line ranges and the
+names, attributes, fixture arguments and string literals each one uses.
+Summaries are cached per file in .cache/impact_graph.json and re-parsed only
+when the file's hash changes.
+
+From the summaries each test gets the closure of symbols it can reach:
+  test → fixtures (by argument name, nearest conftest first; autouse
+  fixtures, conftest hooks and conftest module code apply to every test
+  below the conftest) → imported classes/functions (WebFlows, APIFlows, Pages,
+  page objects) → the members used by attribute name (a method or selector
+  constant of a class the test already reaches).
+Attribute matching is by name, so the closure errs on the side of too many
+symbols, never too few. Closures are cached too, keyed by the hashes of all
+files.
+
+A diff (`git diff <ref>` plus untracked files) is mapped to changed symbols by
+its hunks' line ranges; a change outside any symbol marks the module itself.
+Selected = tests whose closure contains a changed symbol, plus the smoke set
+(tests marked with one of `smoke_markers`). Changes to configuration, pytest
+or requirement files, or a deleted non-test module, select everything.
+
+Usage:
+    plan = ImpactAnalyzer().plan("origin/main")
+    plan["full_run"]     # reason string when everything must run, else ""
+    plan["selected"]     # nodeids to pass to pytest (affected + smoke)
+
+    python -m utilities.impact_analysis origin/main
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utilities.config_loader import cache_dir, load_config
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_VERSION = 2  # bump when the summary format changes
+# Directories never part of the graph
+_SKIP_DIRS = {".cache", ".git", ".venv", "venv", "__pycache__", "reports", "test_runs", "node_modules"}
+# Changed files that can affect any test
+_FULL_RUN = ("configuration/*", "pytest.ini", "requirements*.txt", "pyproject.toml", "setup.cfg", "tox.ini")
+_MODULE = "<module>"
+_HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+# ---------------------------------------------------------------------------
+# Per-file summaries
+# ---------------------------------------------------------------------------
+
+def _is_code(line: str) -> bool:
+    """False for blank and comment-only source lines, which change no symbol."""
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#")
+
+
+def _is_fixture(decorator: ast.expr) -> Tuple[bool, bool, str]:
+    """(is a pytest fixture, autouse, explicit name) for one decorator."""
+    call = decorator if isinstance(decorator, ast.Call) else None
+    target = call.func if call else decorator
+    name = target.attr if isinstance(target, ast.Attribute) else getattr(target, "id", "")
+    if name != "fixture":
+        return False, False, ""
+    autouse, alias = False, ""
+    for kw in call.keywords if call else []:
+        if kw.arg == "autouse" and isinstance(kw.value, ast.Constant):
+            autouse = bool(kw.value.value)
+        elif kw.arg == "name" and isinstance(kw.value, ast.Constant):
+            alias = str(kw.value.value)
+    return True, autouse, alias
+
+
+def _markers(decorators: Iterable[ast.expr]) -> List[str]:
+    """Names of @pytest.mark.<name>(...) decorators."""
+    out = []
+    for dec in decorators:
+        target = dec.func if isinstance(dec, ast.Call) else dec
+        if (isinstance(target, ast.Attribute) and isinstance(target.value, ast.Attribute)
+                and target.value.attr == "mark"):
+            out.append(target.attr)
+    return out
+
+
+def _uses(nodes: Iterable[ast.AST]) -> Dict[str, List[str]]:
+    names: Set[str] = set()
+    attrs: Set[str] = set()
+    strings: Set[str] = set()
+    for root in nodes:
+        for node in ast.walk(root):
+            if isinstance(node, ast.Name):
+                names.add(node.id)
+            elif isinstance(node, ast.Attribute):
+                attrs.add(node.attr)
+            elif isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value.isidentifier():
+                strings.add(node.value)
+    return {"names": sorted(names), "attrs": sorted(attrs), "strings": sorted(strings)}
+
+
+def _span(node: ast.AST) -> List[int]:
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    return [start, node.end_lineno or node.lineno]
+
+
+def _function(node: ast.AST, kind: str) -> Dict[str, Any]:
+    args = node.args
+    params = [a.arg for a in args.posonlyargs + args.args + args.kwonlyargs]
+    entry = {"kind": kind, "lines": _span(node), "args": params, "markers": _markers(node.decorator_list),
+             **_uses([*node.decorator_list, args, node.returns or ast.Pass(), *node.body])}
+    for dec in node.decorator_list:
+        fixture, autouse, alias = _is_fixture(dec)
+        if fixture:
+            entry.update(kind="fixture", autouse=autouse, fixture=alias or node.name)
+    return entry
+
+
+def _assigned(node: ast.AST) -> List[str]:
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    return [t.id for t in targets if isinstance(t, ast.Name)]
+
+
+def summarize(source: str, module: str) -> Dict[str, Any]:
+    """Symbols of one module and what each of them uses (JSON-serialisable)."""
+    tree = ast.parse(source)
+    imports: Dict[str, str] = {}  # local name → "pkg.module" or "pkg.module:Name"
+    symbols: Dict[str, Dict[str, Any]] = {}
+    package = module.rpartition(".")[0]
+    funcs = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                # "import a.b" binds "a"; "import a.b as c" binds c to a.b
+                if alias.asname:
+                    imports[alias.asname] = alias.name
+                else:
+                    imports[alias.name.split(".")[0]] = alias.name.split(".")[0]
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parent = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                base = f"{parent}.{base}".strip(".")
+            for alias in node.names:
+                imports[alias.asname or alias.name] = f"{base}:{alias.name}"
+        elif isinstance(node, funcs):
+            kind = "hook" if node.name.startswith("pytest_") else "function"
+            symbols[node.name] = _function(node, kind)
+        elif isinstance(node, ast.ClassDef):
+            symbols[node.name] = {"kind": "class", "lines": _span(node), "markers": _markers(node.decorator_list),
+                                  **_uses([*node.decorator_list, *node.bases, *node.keywords])}
+            for member in node.body:
+                qual = None
+                if isinstance(member, funcs):
+                    qual = f"{node.name}.{member.name}"
+                    symbols[qual] = _function(member, "method")
+                elif isinstance(member, (ast.Assign, ast.AnnAssign)):
+                    for name in _assigned(member):
+                        qual = f"{node.name}.{name}"
+                        symbols[qual] = {"kind": "const", "lines": _span(member), **_uses([member])}
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            for name in _assigned(node):
+                symbols[name] = {"kind": "const", "lines": _span(node), **_uses([node])}
+
+    # module code that is not a symbol (imports, top-level statements)
+    rest = [n for n in tree.body if not isinstance(n, (*funcs, ast.ClassDef, ast.Assign, ast.AnnAssign))]
+    symbols[_MODULE] = {"kind": "module", "lines": [0, 0], **_uses(rest)}
+    return {"module": module, "imports": imports, "symbols": symbols}
+
+
+def _module_name(rel: str) -> str:
+    parts = rel[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Graph
+# ---------------------------------------------------------------------------
+
+class ImpactAnalyzer:
+    """
+    Dependency graph of the project's tests, rebuilt incrementally from file
+    hashes (see the module docstring). `test_paths`, `python_files`,
+    `python_classes`, `python_functions` follow pytest.ini; `smoke_markers` defaults to
+    <impactSmoke> from data.xml.
+    """
+
+    def __init__(self, root: Path = _PROJECT_ROOT, cache_path: Optional[Path] = None,
+                 smoke_markers: Optional[Iterable[str]] = None, test_paths: Iterable[str] = ("test_cases",),
+                 python_files: str = "test_*.py", python_classes: str = "Test*",
+                 python_functions: str = "test_*"):
+        self.root = Path(root)
+        self.cache_path = cache_path or Path(cache_dir()) / "impact_graph.json"
+        self.smoke_markers = set(load_config().get("impact_smoke", ["smoke"]) if smoke_markers is None
+                                 else smoke_markers)
+        self.test_paths = [p.strip("/") for p in test_paths]
+        self.python_files = python_files
+        self.python_classes = python_classes
+        self.python_functions = python_functions
+        self.files: Dict[str, Dict[str, Any]] = {}  # rel path → {"hash", "summary"}
+        self.closures: Dict[str, List[str]] = {}    # nodeid → symbol ids ("path::qual")
+        self.markers: Dict[str, List[str]] = {}     # nodeid → static markers
+        self.digest = ""
+        self.parsed = 0                              # files (re-)parsed by the last refresh()
+
+    # -- cache -----------------------------------------------------------------
+    def load(self) -> "ImpactAnalyzer":
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return self
+        if data.get("version") == _VERSION:
+            self.files = data.get("files", {})
+            self.closures = data.get("closures", {})
+            self.markers = data.get("markers", {})
+            self.digest = data.get("digest", "")
+        return self
+
+    def save(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": _VERSION, "digest": self.digest, "files": self.files,
+                                   "closures": self.closures, "markers": self.markers}), encoding="utf-8")
+        os.replace(tmp, self.cache_path)
+
+    # -- building --------------------------------------------------------------
+    def _python_files(self) -> List[str]:
+        out = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS and not d.startswith(".")]
+            for name in filenames:
+                if name.endswith(".py"):
+                    out.append(Path(dirpath, name).relative_to(self.root).as_posix())
+        return sorted(out)
+
+    def refresh(self) -> "ImpactAnalyzer":
+        """Re-parse files whose hash changed; recompute closures if anything did."""
+        current: Dict[str, Dict[str, Any]] = {}
+        self.parsed = 0
+        for rel in self._python_files():
+            data = (self.root / rel).read_bytes()
+            digest = hashlib.sha1(data).hexdigest()
+            cached = self.files.get(rel)
+            if cached and cached["hash"] == digest:
+                current[rel] = cached
+                continue
+            self.parsed += 1
+            try:
+                summary = summarize(data.decode("utf-8"), _module_name(rel))
+            except (SyntaxError, UnicodeDecodeError):
+                summary = {"module": _module_name(rel), "imports": {}, "symbols": {}, "broken": True}
+            current[rel] = {"hash": digest, "summary": summary}
+        self.files = current
+        digest = hashlib.sha1("".join(f"{p}:{f['hash']}" for p, f in sorted(current.items())).encode()).hexdigest()
+        if digest != self.digest:
+            self._build_closures()
+            self.digest = digest
+        return self
+
+    def is_test_file(self, rel: str) -> bool:
+        in_paths = any(rel == p or rel.startswith(p + "/") for p in self.test_paths)
+        return in_paths and fnmatch.fnmatch(rel.rsplit("/", 1)[-1], self.python_files)
+
+    def _tests(self) -> List[Tuple[str, str, str]]:
+        """(nodeid, file, qualname) of every statically visible test."""
+        out = []
+        for rel, entry in self.files.items():
+            if not self.is_test_file(rel):
+                continue
+            symbols = entry["summary"]["symbols"]
+            for qual, sym in symbols.items():
+                head, _, name = qual.rpartition(".")
+                if sym["kind"] not in ("function", "method") or not fnmatch.fnmatch(name, self.python_functions):
+                    continue
+                if head and not fnmatch.fnmatch(head, self.python_classes):
+                    continue
+                out.append((f"{rel}::{qual.replace('.', '::')}", rel, qual))
+        return out
+
+    def _module_file(self, module: str) -> Optional[str]:
+        rel = module.replace(".", "/")
+        for candidate in (f"{rel}.py", f"{rel}/__init__.py"):
+            if candidate in self.files:
+                return candidate
+        return None
+
+    def _resolve_import(self, target: str) -> Optional[Tuple[str, str]]:
+        """"pkg.mod:Name" / "pkg.mod" → (file, qual); a module resolves to its <module> symbol."""
+        module, _, name = target.partition(":")
+        if name:
+            rel = self._module_file(module)
+            if rel and name in self.files[rel]["summary"]["symbols"]:
+                return rel, name
+            rel = self._module_file(f"{module}.{name}")  # from package import module
+            return (rel, _MODULE) if rel else None
+        rel = self._module_file(module)
+        return (rel, _MODULE) if rel else None
+
+    def _fixture_scopes(self, test_file: str, test_class: str = "") -> Tuple[Dict[str, str], List[str]]:
+        """
+        Fixtures visible from a test in `test_file` (inside `test_class`, if
+        any) and its per-test roots. The nearest definition wins: the class,
+        then the module, then conftest.py files upwards. Fixtures defined in
+        another class of the module are not visible.
+        """
+        fixtures: Dict[str, str] = {}
+        roots: List[str] = []
+        parts = test_file.split("/")
+        scopes = [f"{'/'.join(parts[:i])}/conftest.py".lstrip("/") for i in range(len(parts) - 1, -1, -1)]
+        for rel in [test_file] + scopes:
+            entry = self.files.get(rel)
+            if entry is None:
+                continue
+            is_conftest = rel.endswith("conftest.py")
+            # class-level fixtures of the test's own class first, so they shadow module-level ones
+            items = sorted(entry["summary"]["symbols"].items(), key=lambda kv: "." not in kv[0])
+            for qual, sym in items:
+                sid = f"{rel}::{qual}"
+                head = qual.rpartition(".")[0]
+                if head and head != test_class:
+                    continue
+                if sym["kind"] == "fixture":
+                    fixtures.setdefault(sym["fixture"], sid)
+                    if sym.get("autouse"):
+                        roots.append(sid)
+                elif is_conftest and sym["kind"] in ("hook", "module"):
+                    roots.append(sid)
+        return fixtures, roots
+
+    def _build_closures(self) -> None:
+        by_attr: Dict[str, List[Tuple[str, str]]] = {}  # member name → [(container id, symbol id)]
+        members: Dict[str, List[Tuple[str, str]]] = {}  # container id → [(member name, symbol id)]
+        for rel, entry in self.files.items():
+            for qual in entry["summary"]["symbols"]:
+                if qual == _MODULE:
+                    continue
+                head, _, name = qual.rpartition(".")
+                container = f"{rel}::{head or _MODULE}"
+                by_attr.setdefault(name, []).append((container, f"{rel}::{qual}"))
+                members.setdefault(container, []).append((name, f"{rel}::{qual}"))
+
+        self.closures, self.markers = {}, {}
+        scope_cache: Dict[Tuple[str, str], Tuple[Dict[str, str], List[str]]] = {}
+        for nodeid, rel, qual in self._tests():
+            scope = (rel, qual.rpartition(".")[0])
+            if scope not in scope_cache:
+                scope_cache[scope] = self._fixture_scopes(*scope)
+            fixtures, roots = scope_cache[scope]
+            self.closures[nodeid] = sorted(self._closure([f"{rel}::{qual}", *roots], fixtures, by_attr, members))
+            symbols = self.files[rel]["summary"]["symbols"]
+            class_markers = symbols.get(qual.rpartition(".")[0], {}).get("markers", []) if "." in qual else []
+            self.markers[nodeid] = sorted(set(symbols[qual].get("markers", [])) | set(class_markers))
+
+    def _closure(self, roots: List[str], fixtures: Dict[str, str], by_attr: Dict[str, List[Tuple[str, str]]],
+                 members: Dict[str, List[Tuple[str, str]]]) -> Set[str]:
+        seen: Set[str] = set()
+        attrs: Set[str] = set()
+        containers: Set[str] = set()
+        stack = list(roots)
+
+        def reach_container(container: str) -> None:
+            if container in containers:
+                return
+            containers.add(container)
+            for name, sid in members.get(container, []):
+                if name in attrs or name == "__init__":
+                    stack.append(sid)
+
+        while stack:
+            sid = stack.pop()
+            if sid in seen:
+                continue
+            seen.add(sid)
+            rel, _, qual = sid.partition("::")
+            summary = self.files[rel]["summary"]
+            sym = summary["symbols"].get(qual)
+            if sym is None:
+                continue
+            stack.append(f"{rel}::{_MODULE}")
+            head = qual.rpartition(".")[0]
+            if head:
+                stack.append(f"{rel}::{head}")
+            if sym["kind"] == "class":
+                reach_container(sid)
+            elif qual == _MODULE:
+                reach_container(sid)
+
+            for arg in sym.get("args", []) + sym.get("strings", []):
+                if arg in fixtures:
+                    stack.append(fixtures[arg])
+            for name in sym.get("names", []):
+                if name in summary["symbols"] and name != _MODULE:
+                    stack.append(f"{rel}::{name}")
+                elif name in summary["imports"]:
+                    target = self._resolve_import(summary["imports"][name])
+                    if target:
+                        stack.append(f"{target[0]}::{target[1]}")
+            for attr in sym.get("attrs", []):
+                if attr in attrs:
+                    continue
+                attrs.add(attr)
+                for container, member in by_attr.get(attr, []):
+                    if container in containers:
+                        stack.append(member)
+        return seen
+
+    # -- diff ------------------------------------------------------------------
+    def _git(self, *args: str) -> str:
+        result = subprocess.run(["git", *args], cwd=self.root, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+        return result.stdout
+
+    def changed_lines(self, ref: str) -> Dict[str, Optional[Set[int]]]:
+        """
+        {path: changed line numbers in the working tree} since `ref`; None =
+        whole file (new or deleted). Added blank and comment lines are left
+        out; so are hunks that only remove such lines.
+        """
+        changes: Dict[str, Optional[Set[int]]] = {}
+        path = None
+        hunk: Optional[Dict[str, Any]] = None
+
+        def close_hunk() -> None:
+            if hunk is None or changes.get(hunk["path"]) is None:
+                return
+            if hunk["removed_code"]:
+                # code was removed or rewritten here: every new-side line counts, a
+                # pure deletion (count 0) sits between lines start and start + 1
+                start, count = hunk["start"], hunk["count"]
+                changes[hunk["path"]].update(range(start, start + count) if count else (start, start + 1))
+            else:
+                changes[hunk["path"]].update(hunk["added_code"])
+
+        for line in self._git("diff", "--no-renames", "--no-color", "-U0", ref, "--").splitlines():
+            if line.startswith("diff --git "):
+                close_hunk()
+                hunk = None
+                path = line.split(" b/", 1)[-1]
+                changes[path] = set()
+            elif line.startswith(("new file mode", "deleted file mode")) and path:
+                changes[path] = None
+            elif path and (match := _HUNK_RE.match(line)):
+                close_hunk()
+                start = int(match.group(1))
+                hunk = {"path": path, "start": start, "count": int(match.group(2) or 1), "next": start,
+                        "added_code": set(), "removed_code": False}
+            elif hunk is not None and line.startswith("+"):  # file headers come before the first hunk
+                if _is_code(line[1:]):
+                    hunk["added_code"].add(hunk["next"])
+                hunk["next"] += 1
+            elif hunk is not None and line.startswith("-"):
+                hunk["removed_code"] = hunk["removed_code"] or _is_code(line[1:])
+        close_hunk()
+        for rel in self._git("ls-files", "--others", "--exclude-standard").splitlines():
+            changes[rel] = None
+        return changes
+
+    def changed_symbols(self, changes: Dict[str, Optional[Set[int]]]) -> Tuple[Set[str], str]:
+        """(changed symbol ids, full-run reason or "")."""
+        changed: Set[str] = set()
+        for rel, lines in changes.items():
+            if any(fnmatch.fnmatch(rel, pattern) or fnmatch.fnmatch(rel.rsplit("/", 1)[-1], pattern)
+                   for pattern in _FULL_RUN):
+                return changed, f"{rel} changed"
+            if not rel.endswith(".py"):
+                continue
+            entry = self.files.get(rel)
+            if entry is None:
+                if self.is_test_file(rel) or rel.rsplit("/", 1)[-1] == "__init__.py":
+                    continue  # deleted test: nothing left to run
+                if (self.root / rel).exists():
+                    continue  # outside the graph (e.g. under a skipped directory)
+                return changed, f"{rel} was deleted"
+            symbols = entry["summary"]["symbols"]
+            if entry["summary"].get("broken"):
+                return changed, f"{rel} does not parse"
+            if lines is None:
+                changed.update(f"{rel}::{qual}" for qual in symbols)
+                continue
+            for n in lines:
+                # innermost symbol only: a changed method does not change its class
+                spans = [(sym["lines"][1] - sym["lines"][0], qual) for qual, sym in symbols.items()
+                         if sym["lines"][0] <= n <= sym["lines"][1]]
+                changed.add(f"{rel}::{min(spans)[1] if spans else _MODULE}")
+        return changed, ""
+
+    # -- planning --------------------------------------------------------------
+    def plan(self, ref: str) -> Dict[str, Any]:
+        """
+        Tests to run for the changes since `ref`:
+        {"ref", "full_run", "selected", "affected", "smoke", "changed_files", "changed_symbols",
+         "total", "parsed", "seconds"}.
+        """
+        started = time.perf_counter()
+        self.load().refresh()
+        changes = self.changed_lines(ref)
+        changed, full_run = self.changed_symbols(changes)
+        affected = sorted(n for n, closure in self.closures.items() if changed.intersection(closure))
+        smoke = sorted(n for n, marks in self.markers.items() if self.smoke_markers.intersection(marks))
+        self.save()
+        return {
+            "ref": ref,
+            "full_run": full_run,
+            "selected": sorted(set(affected) | set(smoke)),
+            "affected": affected,
+            "smoke": smoke,
+            "changed_files": sorted(changes),
+            "changed_symbols": sorted(changed),
+            "total": len(self.closures),
+            "parsed": self.parsed,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List the tests affected by the changes since a git ref")
+    parser.add_argument("ref", help="Git ref to diff against, e.g. origin/main or HEAD~1")
+    parser.add_argument("--symbols", action="store_true", help="Also list the changed symbols")
+    args = parser.parse_args()
+
+    plan = ImpactAnalyzer().plan(args.ref)
+    print(f"{len(plan['changed_files'])} changed file(s) since {args.ref}; "
+          f"planned in {plan['seconds']:.3f}s ({plan['parsed']} file(s) re-parsed)")
+    if args.symbols:
+        for sid in plan["changed_symbols"]:
+            print(f"  ~ {sid}")
+    if plan["full_run"]:
+        print(f"Full run: {plan['full_run']}")
+        return
+    print(f"{len(plan['selected'])}/{plan['total']} test(s) selected "
+          f"({len(plan['affected'])} affected, {len(plan['smoke'])} smoke)")
+    for nodeid in plan["selected"]:
+        print(f"  {nodeid}" + ("" if nodeid in plan["affected"] else "  [smoke]"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Incremental reading of pytest-json-report files.
+
+The report is parsed a chunk at a time: top-level fields are decoded as they
+come, and the "tests" array is yielded one entry at a time, so reading it
+holds one test (plus one read chunk) in memory instead of the whole file.
+
+Usage:
+    for test in iter_report_tests(run_dir / "initial" / "report.json"):
+        writer.add_initial([test])
+    report = load_report(path, compact_test)   # every field, tests mapped one by one
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO
+
+CHUNK_SIZE = 1 << 16
+
+_FAILED = ("failed", "error")
+_CAPTURED = ("stdout", "stderr", "log")  # per-phase captured output
+
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_IN_STRING = re.compile(r'["\\]')
+_TERMINATOR = re.compile(r"[,\]}\s]")
+_WS = " \t\r\n"
+
+
+class _Cursor:
+    """A position in a JSON text read from `fh` on demand; consumed text is dropped."""
+
+    def __init__(self, fh: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size: int = 0) -> bool:
+        """Append the next chunk (`size` characters, default chunk_size); False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.fh.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos} of the buffered JSON")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next value, reading more chunks until it is complete."""
+        if self.peek() not in '"[{':
+            # a number or literal may continue in the next chunk: read up to its terminator
+            while not _TERMINATOR.search(self.buf, self.pos) and self._fill():
+                pass
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # every retry re-parses the value from its start: grow the reads
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            self.pos = end
+            return value
+
+    def skip(self) -> None:
+        """Step over the next value without building it."""
+        if self.peek() not in "[{":
+            self.value()
+            return
+        depth, in_string = 0, False
+        while True:
+            pattern = _IN_STRING if in_string else _STRUCTURAL
+            match = pattern.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("unexpected end of JSON")
+                continue
+            char, self.pos = match.group(), match.end()
+            if in_string:
+                if char == "\\":
+                    if self.pos >= len(self.buf) and not self._fill():
+                        raise ValueError("unexpected end of JSON")
+                    self.pos += 1
+                else:
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def items(self) -> Iterator[Any]:
+        """Yield the elements of the array at the cursor one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+    def fields(self) -> Iterator[str]:
+        """Yield the keys of the object at the cursor; the caller consumes each value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def iter_report_tests(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield the "tests" entries of a report file one by one (nothing if missing or unreadable)."""
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as fh:
+        cursor = _Cursor(fh, chunk_size)
+        try:
+            for key in cursor.fields():
+                if key == "tests":
+                    yield from cursor.items()
+                    return
+                cursor.skip()
+        except ValueError as exc:  # json.JSONDecodeError included
+            print(f"  ⚠️  Could not parse JSON report {path}: {exc}")
+
+
+def load_report(path: Path, map_test: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Read a whole report, passing each "tests" entry through `map_test` as it
+    is parsed. Returns {} if the file is missing or corrupt.
+    """
+    if not path.exists():
+        return {}
+    report: Dict[str, Any] = {}
+    with open(path, encoding="utf-8") as fh:
+        cursor = _Cursor(fh, chunk_size)
+        try:
+            for key in cursor.fields():
+                if key == "tests" and map_test is not None:
+                    report[key] = [map_test(test) for test in cursor.items()]
+                else:
+                    report[key] = cursor.value()
+        except ValueError as exc:
+            print(f"  ⚠️  Could not parse JSON report: {exc}")
+            return {}
+    return report
+
+
+def compact_test(test: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the captured stdout/stderr/log of a test that did not fail (it stays in the report file)."""
+    if test.get("outcome") in _FAILED:
+        return test
+    for phase in ("setup", "call", "teardown"):
+        data = test.get(phase)
+        if data:
+            for field in _CAPTURED:
+                data.pop(field, None)
+    return test
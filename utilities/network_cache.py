@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from playwright.sync_api import BrowserContext, Route
+
+# Response headers that must not be replayed from the cache
+_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length"}
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class AssetCache:
+    """
+    Routing layer installed on every browser context during UI runs.
+
+    - Requests whose resource type is in `block_types`, or whose URL matches one
+      of `block_urls` (fnmatch globs), are aborted.
+    - GET requests of a type in `cache_types` are served from an on-disk cache
+      shared by all tests, workers and runs. Entries are keyed by URL; stale
+      entries are revalidated with their ETag / Last-Modified validators.
+    - Everything else falls through to the network untouched.
+
+    Counters in `stats` are exported to the JSON report by conftest.
+    """
+
+    def __init__(self, cache_dir: Path, cache_types: Iterable[str] = (), block_types: Iterable[str] = (),
+                 block_urls: Iterable[str] = (), ttl: int = 86400):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_types = set(cache_types)
+        self.block_types = set(block_types)
+        self.block_urls = list(block_urls)
+        self.ttl = ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "revalidated": 0, "blocked": 0, "stored": 0}
+
+    def install(self, context: BrowserContext) -> None:
+        context.route("**/*", self._handle)
+
+    # -- storage -----------------------------------------------------------
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.bin"
+
+    def _load(self, url: str) -> Optional[dict]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta["body"] = body_path.read_bytes()
+        except (OSError, json.JSONDecodeError):
+            return None
+        return meta if meta.get("url") == url else None
+
+    def _store(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            return
+        match = _MAX_AGE_RE.search(cache_control)
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS},
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "stored_at": time.time(),
+            "max_age": int(match.group(1)) if match else self.ttl,
+        }
+        meta_path, body_path = self._paths(url)
+        # write-then-rename so parallel workers never read a half-written entry
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta).encode("utf-8"))):
+            tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        self.stats["stored"] += 1
+
+    def _touch(self, url: str) -> None:
+        meta_path, _ = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            meta["stored_at"] = time.time()
+            meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    # -- routing -----------------------------------------------------------
+    @staticmethod
+    def _fulfill(route: Route, entry: dict) -> None:
+        route.fulfill(status=entry["status"], headers=entry["headers"], body=entry["body"])
+
+    def _handle(self, route: Route) -> None:
+        request = route.request
+        if request.resource_type in self.block_types or any(fnmatch(request.url, p) for p in self.block_urls):
+            self.stats["blocked"] += 1
+            route.abort("blockedbyclient")
+            return
+        if request.method != "GET" or request.resource_type not in self.cache_types:
+            route.fallback()
+            return
+
+        url = request.url
+        entry = self._load(url)
+        if entry and time.time() - entry["stored_at"] < entry["max_age"]:
+            self.stats["hits"] += 1
+            self._fulfill(route, entry)
+            return
+
+        headers = dict(request.headers)
+        if entry and entry.get("etag"):
+            headers["if-none-match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["if-modified-since"] = entry["last_modified"]
+        try:
+            response = route.fetch(headers=headers)
+        except Exception:
+            if entry:  # offline: a stale copy beats a failed request
+                self.stats["hits"] += 1
+                self._fulfill(route, entry)
+            else:
+                route.abort()
+            return
+
+        if response.status == 304 and entry:
+            self.stats["revalidated"] += 1
+            self._touch(url)
+            self._fulfill(route, entry)
+            return
+
+        self.stats["misses"] += 1
+        if response.status == 200:
+            try:
+                self._store(url, response.status, response.headers, response.body())
+            except OSError:
+                pass
+        route.fulfill(response=response)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from utilities.config_loader import cache_dir
+
+# Check names usable with @pytest.mark.requires(...)
+CHECKS = ("base_url", "api", "browser")
+
+_HTTP_TIMEOUT = 5
+
+
+def _check_url(url: Optional[str], path: str = "") -> Dict[str, Any]:
+    if not url or url == "about:blank":
+        return {"ok": False, "detail": "not configured"}
+    target = url.rstrip("/") + path
+    try:
+        resp = requests.get(target, timeout=_HTTP_TIMEOUT)
+    except requests.RequestException as exc:
+        return {"ok": False, "detail": f"{type(exc).__name__}: {exc}"[:200]}
+    # GoRest answers 403 when Cloudflare blocks the runner
+    ok = resp.status_code < 400
+    return {"ok": ok, "detail": f"HTTP {resp.status_code}"}
+
+
+def _browsers_root() -> Path:
+    env = os.getenv("PLAYWRIGHT_BROWSERS_PATH")
+    if env and env != "0":
+        return Path(env)
+    if sys.platform.startswith("win"):
+        return Path(os.getenv("LOCALAPPDATA", Path.home())) / "ms-playwright"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "ms-playwright"
+    return Path.home() / ".cache" / "ms-playwright"
+
+
+def _check_browsers(browsers: List[str]) -> Dict[str, Any]:
+    """Look for installed Playwright browser builds without starting the driver."""
+    root = _browsers_root()
+    missing = [b for b in browsers if not glob.glob(str(root / f"{b}*-*"))]
+    if missing:
+        return {"ok": False, "detail": f"not installed in {root}: {', '.join(missing)} "
+                                       f"(run: python -m playwright install {' '.join(missing)})"}
+    return {"ok": True, "detail": ", ".join(browsers)}
+
+
+class Preflight:
+    """
+    Environment checks (base_url, api, browser) run once per run.
+
+    Checks run concurrently on a background thread and the results are cached
+    on disk (.cache/preflight.json) for `ttl` seconds, so the runner's initial
+    run, its re-runs and MCP-triggered pytest calls reuse one result. Nothing
+    blocks at import or collection: callers wait only in result(), i.e. when a
+    test that actually depends on a check is about to run.
+    """
+
+    def __init__(self, cfg: Dict[str, Any], ttl: int = 300, path: Optional[Path] = None):
+        self.targets = {
+            "base_url": cfg.get("base_url"),
+            "api": cfg.get("api_url") or "https://gorest.co.in/public/v2",
+            "browser": sorted(cfg.get("browsers") or ["chromium"]),
+        }
+        self.ttl = ttl
+        self.path = path or Path(cache_dir()) / "preflight.json"
+        self._key = hashlib.sha1(json.dumps(self.targets, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        self._results: Optional[Dict[str, Dict[str, Any]]] = None
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- cache -------------------------------------------------------------
+    def _load_cached(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        entry = data.get(self._key)
+        if not entry or time.time() - entry.get("checked_at", 0) > self.ttl:
+            return None
+        return entry.get("results")
+
+    def _save(self, results: Dict[str, Dict[str, Any]]) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        data[self._key] = {"checked_at": time.time(), "targets": self.targets, "results": results}
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    # -- running -----------------------------------------------------------
+    def _run_checks(self) -> Dict[str, Dict[str, Any]]:
+        with ThreadPoolExecutor(max_workers=len(CHECKS)) as pool:
+            futures = {
+                "base_url": pool.submit(_check_url, self.targets["base_url"]),
+                "api": pool.submit(_check_url, self.targets["api"], "/users"),
+                "browser": pool.submit(_check_browsers, self.targets["browser"]),
+            }
+            return {name: f.result() for name, f in futures.items()}
+
+    def _worker(self, force: bool) -> None:
+        try:
+            results = None if force else self._load_cached()
+            if results is None:
+                results = self._run_checks()
+                self._save(results)
+            self._results = results
+        finally:
+            self._done.set()
+
+    def start(self, force: bool = False) -> "Preflight":
+        """Begin checking in the background (or load a fresh cached result). Never blocks."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, args=(force,), name="preflight", daemon=True)
+            self._thread.start()
+        return self
+
+    def run(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Blocking variant for the runner: check (or load cache) and return all results."""
+        self.start(force)
+        self._done.wait()
+        return self._results or {}
+
+    def result(self, name: str, timeout: float = 30) -> Dict[str, Any]:
+        """Result of one check, waiting for the background run if needed."""
+        if self._thread is None:
+            self.start()
+        if not self._done.wait(timeout):
+            return {"ok": False, "detail": f"preflight did not finish within {timeout}s"}
+        return (self._results or {}).get(name, {"ok": False, "detail": "unknown check"})
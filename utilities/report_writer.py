@@ -0,0 +1,459 @@
+"""
+Single-pass, bounded-memory test report writer.
+
+Tests are fed one at a time (any iterable of pytest-json-report "tests"
+entries, e.g. utilities.json_report.iter_report_tests reading report.json
+incrementally) and folded into counters, capped failure clusters, a capped
+list of remaining failures and a top-N of throttled tests; besides the ids of
+tests still failing after the re-run, nothing proportional to the suite size
+is kept. The Markdown report is then written section by section straight to
+disk, and can be mirrored as HTML (converted line by line) and a JSON summary.
+
+Usage:
+    writer = ReportWriter(run_id, run_dir)
+    writer.add_initial(iter_report_tests(run_dir / "initial" / "report.json"))
+    writer.add_final(iter_report_tests(run_dir / "after_fix" / "report.json"))
+    paths = writer.write(REPORTS_DIR / f"report_{run_id}.md", initial_meta, final_meta, fix_summary,
+                         formats=("md", "html", "json"))
+"""
+from __future__ import annotations
+
+import heapq
+import html
+import json
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from api_objects.latency import percentile
+from utilities.failure_clusters import FailureCluster, signature
+
+# Per-section caps: how much of each section makes it into the report
+MAX_CLUSTERS = 50           # clusters listed under "Initial Failures"
+MAX_CLUSTER_NODEIDS = 20    # tests listed per cluster
+MAX_REMAINING = 100         # entries under "Remaining Failures"
+MAX_COLLECTION_ERRORS = 20
+MAX_THROTTLED = 10
+MAX_RETRIED = 50            # entries under "Passed on Retry"
+CLUSTER_LONGREPR = 1200     # characters of traceback kept per entry
+REMAINING_LONGREPR = 1000
+
+_FAILED = ("failed", "error")
+
+
+def _call_longrepr(test: Dict[str, Any], limit: int) -> str:
+    longrepr = (test.get("call") or {}).get("longrepr", "") or ""
+    return longrepr[:limit] + "\n... (truncated)" if len(longrepr) > limit else longrepr
+
+
+def _duration_ms(test: Dict[str, Any]) -> float:
+    return 1000 * sum((test.get(p) or {}).get("duration", 0) for p in ("setup", "call", "teardown"))
+
+
+class _Clusters:
+    """Failure clusters with at most MAX_CLUSTERS tracked; later new signatures only count as overflow."""
+
+    def __init__(self, max_clusters: int, max_nodeids: int):
+        self.max_clusters = max_clusters
+        self.max_nodeids = max_nodeids
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.total = 0
+        self.overflow = 0
+
+    def add(self, test: Dict[str, Any]) -> None:
+        self.total += 1
+        sig = signature(test)
+        entry = self.entries.get(sig["key"])
+        if entry is None:
+            if len(self.entries) >= self.max_clusters:
+                self.overflow += 1
+                return
+            entry = self.entries[sig["key"]] = {
+                "title": FailureCluster(sig).title(),
+                "count": 0,
+                "nodeids": [],
+                "longrepr": _call_longrepr(test, CLUSTER_LONGREPR),
+            }
+        entry["count"] += 1
+        if len(entry["nodeids"]) < self.max_nodeids:
+            entry["nodeids"].append(test.get("nodeid", ""))
+
+    def largest_first(self) -> List[Dict[str, Any]]:
+        return sorted(self.entries.values(), key=lambda e: e["count"], reverse=True)
+
+
+class ReportWriter:
+    """Folds test results into a capped summary, then writes the report files."""
+
+    def __init__(self, run_id: str, run_dir: Path, max_failures: int = MAX_REMAINING,
+                 max_clusters: int = MAX_CLUSTERS):
+        self.run_id = run_id
+        self.run_dir = run_dir
+        self.max_failures = max_failures
+        self.initial = Counter()
+        self.final: Optional[Counter] = None
+        self.clusters = _Clusters(max_clusters, MAX_CLUSTER_NODEIDS)
+        self.final_failed_ids: set[str] = set()
+        self.remaining: List[Tuple[str, str]] = []
+        self._initial_remaining: List[Tuple[str, str]] = []  # used when there is no re-run
+        self._throttled: List[Tuple[float, str]] = []  # min-heap of the MAX_THROTTLED slowest
+        self.api_ms = 0.0
+        self.api_test_ms = 0.0
+        self.passed_on_retry = 0
+        self.retried: List[Tuple[str, int, str]] = []  # (nodeid, attempts, first failure's exception type)
+        self.quarantine: List[Dict[str, Any]] = []
+        self.quarantined_total = 0
+
+    # -- folding -------------------------------------------------------------
+    def add_initial(self, tests: Iterable[Dict[str, Any]]) -> None:
+        for test in tests:
+            outcome = test.get("outcome", "")
+            self.initial[outcome] += 1
+            metadata = test.get("metadata") or {}
+            if outcome in _FAILED:
+                self.clusters.add(test)
+                if len(self._initial_remaining) < self.max_failures:
+                    self._initial_remaining.append((test.get("nodeid", ""),
+                                                    _call_longrepr(test, REMAINING_LONGREPR)))
+            attempts = metadata.get("attempts") or []
+            if outcome == "passed" and len(attempts) > 1:
+                self.passed_on_retry += 1
+                if len(self.retried) < MAX_RETRIED:
+                    self.retried.append((test.get("nodeid", ""), len(attempts),
+                                         attempts[0].get("exc_type") or attempts[0].get("outcome", "")))
+            throttled = metadata.get("throttled_s", 0)
+            if throttled > 0:
+                item = (throttled, test.get("nodeid", ""))
+                if len(self._throttled) < MAX_THROTTLED:
+                    heapq.heappush(self._throttled, item)
+                else:
+                    heapq.heappushpop(self._throttled, item)
+            if metadata.get("api_latency"):
+                self.api_ms += sum(e["total_ms"] for e in metadata["api_latency"].values())
+                self.api_test_ms += _duration_ms(test)
+
+    def add_final(self, tests: Iterable[Dict[str, Any]]) -> None:
+        """Results of the after-fix re-run. Without it the initial results are the final ones."""
+        self.final = Counter()
+        for test in tests:
+            outcome = test.get("outcome", "")
+            self.final[outcome] += 1
+            if outcome in _FAILED:
+                self.final_failed_ids.add(test.get("nodeid", ""))
+                if len(self.remaining) < self.max_failures:
+                    self.remaining.append((test.get("nodeid", ""), _call_longrepr(test, REMAINING_LONGREPR)))
+
+    def _final_counts(self) -> Counter:
+        return self.final if self.final is not None else self.initial
+
+    def _still_failing(self) -> int:
+        if self.final is None:
+            return self.clusters.total
+        return self.final["failed"] + self.final["error"]
+
+    def _badge(self, nodeid: str) -> str:
+        still = self.final is None or nodeid in self.final_failed_ids
+        return "STILL FAILING ❌" if still else "FIXED ✅"
+
+    # -- writing -------------------------------------------------------------
+    def write(self, md_path: Path, initial_meta: Dict[str, Any], final_meta: Optional[Dict[str, Any]] = None,
+              fix_summary: str = "", formats: Iterable[str] = ("md",),
+              quarantine: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Path]:
+        """
+        Write the Markdown report (always) plus "html" / "json" siblings if asked.
+        `*_meta` are the pytest JSON reports; only their report-level fields
+        (duration, errors, extras) are read here — tests come from add_*().
+        `quarantine` rows: {"nodeid", "score", "runs", "failures", "retry_passes", "outcome"}.
+        Returns {format: path}.
+        """
+        self.quarantine = (quarantine or [])[:self.max_failures]
+        self.quarantined_total = len(quarantine or [])
+        final_meta = final_meta if final_meta is not None else initial_meta
+        if self.final is None:
+            self.remaining = self._initial_remaining  # no re-run: the remaining failures are the initial ones
+        md_path.parent.mkdir(parents=True, exist_ok=True)
+        with md_path.open("w", encoding="utf-8") as out:
+            self._write_markdown(out, initial_meta, final_meta, fix_summary)
+
+        paths = {"md": md_path}
+        formats = set(formats)
+        if "html" in formats:
+            paths["html"] = md_path.with_suffix(".html")
+            markdown_to_html(md_path, paths["html"], title=f"Automated Test Report — {self.run_id}")
+        if "json" in formats:
+            paths["json"] = md_path.with_suffix(".json")
+            paths["json"].write_text(json.dumps(self.summary(initial_meta, final_meta), indent=2), encoding="utf-8")
+        return paths
+
+    def summary(self, initial_meta: Dict[str, Any], final_meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Machine-readable digest of the run (the JSON report format)."""
+        initial, final = self.initial, self._final_counts()
+        return {
+            "run_id": self.run_id,
+            "duration": final_meta.get("duration", initial_meta.get("duration", 0)),
+            "initial": dict(initial),
+            "final": dict(final),
+            "fixed": self.clusters.total - self._still_failing(),
+            "still_failing": self._still_failing(),
+            "clusters": [{"title": e["title"], "count": e["count"], "nodeids": e["nodeids"]}
+                         for e in self.clusters.largest_first()],
+            "untracked_cluster_failures": self.clusters.overflow,
+            "remaining": [nodeid for nodeid, _ in self.remaining],
+            "passed_on_retry": [{"nodeid": n, "attempts": a, "first_failure": e} for n, a, e in self.retried],
+            "quarantine": self.quarantine,
+            **{key: initial_meta[key] for key in ("network_cache", "api_throttle") if initial_meta.get(key)},
+        }
+
+    def _write_markdown(self, out: TextIO, initial_meta: Dict[str, Any], final_meta: Dict[str, Any],
+                        fix_summary: str) -> None:
+        def emit(*lines: str) -> None:
+            for line in lines:
+                out.write(line + "\n")
+
+        initial, final = self.initial, self._final_counts()
+        still_failing = self._still_failing()
+        status_badge = "✅ ALL PASSING" if still_failing == 0 else f"⚠️ {still_failing} STILL FAILING"
+        duration = final_meta.get("duration", initial_meta.get("duration", 0))
+
+        emit(
+            f"# Automated Test Report — {self.run_id}",
+            "",
+            f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  ",
+            f"**Status:** {status_badge}  ",
+            f"**Duration:** {duration:.1f}s",
+            "",
+            "---",
+            "",
+            "## Summary",
+            "",
+            "| Metric | Before | After |",
+            "|--------|--------|-------|",
+            f"| ✅ Passed  | {initial['passed']} | {final['passed']} |",
+            f"| 🔁 Passed on retry | {self.passed_on_retry} | {self.passed_on_retry if self.final is None else '—'} |",
+            f"| ❌ Failed  | {initial['failed']} | {final['failed']} |",
+            f"| 💥 Error   | {initial['error']}  | {final['error']}  |",
+            f"| ⏭️ Skipped | {initial['skipped']} | {final['skipped']} |",
+            f"| 🔧 Fixed   | —      | {self.clusters.total - still_failing} |",
+            "",
+        )
+
+        self._write_collection_errors(emit, initial_meta)
+        self._write_initial_failures(emit)
+        self._write_passed_on_retry(emit)
+        self._write_quarantine(emit)
+        self._write_extras(emit, initial_meta)
+
+        if fix_summary:
+            emit("---", "", "## Agent Fix Summary", "", fix_summary.strip(), "")
+
+        if still_failing:
+            total = still_failing
+            emit("---", "", f"## Remaining Failures ({total})", "")
+            for nodeid, longrepr in self.remaining:
+                emit(f"### `{nodeid}`", "")
+                if longrepr:
+                    emit("```", longrepr, "```", "")
+            if total > len(self.remaining):
+                emit(f"_… {total - len(self.remaining)} more not shown (see the final JSON report)._", "")
+
+        emit("---", "", "## Artifacts", "",
+             f"- Run directory: `{self.run_dir}`",
+             f"- Initial JSON report: `{self.run_dir / 'initial' / 'report.json'}`",
+             f"- Final JSON report:   `{self.run_dir / 'after_fix' / 'report.json'}`",
+             f"- Screenshots: `{self.run_dir / 'after_fix' / 'screenshots/'}`")
+        if (self.run_dir / "initial" / "workers").exists():
+            emit(f"- Worker artifacts: `{self.run_dir / 'initial' / 'workers/'}`")
+        emit("")
+
+    def _write_collection_errors(self, emit, initial_meta: Dict[str, Any]) -> None:
+        collection_errors = initial_meta.get("errors", [])
+        if not collection_errors and sum(self.initial.values()) > 0:
+            return
+        emit("---", "", "## Collection Errors / No Tests Found", "")
+        if collection_errors:
+            for err in collection_errors[:MAX_COLLECTION_ERRORS]:
+                where = err.get("nodeid") or err.get("when") or "unknown"
+                longrepr = err.get("longrepr", "") or ""
+                if len(longrepr) > 1500:
+                    longrepr = longrepr[:1500] + "\n... (truncated)"
+                emit(f"### `{where}`", "", "```", longrepr, "```", "")
+            if len(collection_errors) > MAX_COLLECTION_ERRORS:
+                emit(f"_… {len(collection_errors) - MAX_COLLECTION_ERRORS} more collection error(s)._", "")
+        else:
+            stdout = (initial_meta.get("_stdout", "") or "").strip()
+            stderr = (initial_meta.get("_stderr", "") or "").strip()
+            emit("Pytest reported 0 tests. See raw output below:", "")
+            if stdout:
+                emit("**stdout:**", "```", stdout[:2000], "```", "")
+            if stderr:
+                emit("**stderr:**", "```", stderr[:2000], "```", "")
+
+    def _write_initial_failures(self, emit) -> None:
+        clusters = self.clusters
+        if not clusters.total:
+            return
+        count = len(clusters.entries) + (1 if clusters.overflow else 0)
+        more = "+" if clusters.overflow else ""
+        emit("---", "", f"## Initial Failures ({clusters.total} in {count}{more} cluster(s))", "")
+        for entry in clusters.largest_first():
+            if entry["count"] > 1:
+                emit(f"### {entry['title']} — {entry['count']} tests", "")
+                for nodeid in entry["nodeids"]:
+                    emit(f"- `{nodeid}` — {self._badge(nodeid)}")
+                if entry["count"] > len(entry["nodeids"]):
+                    emit(f"- … {entry['count'] - len(entry['nodeids'])} more")
+                emit("", f"Representative: `{entry['nodeids'][0]}`", "")
+            else:
+                nodeid = entry["nodeids"][0]
+                emit(f"### `{nodeid}` — {self._badge(nodeid)}", "")
+            if entry["longrepr"]:
+                emit("```", entry["longrepr"], "```", "")
+        if clusters.overflow:
+            emit(f"_… {clusters.overflow} more failure(s) in further clusters not shown._", "")
+
+    def _write_passed_on_retry(self, emit) -> None:
+        if not self.retried:
+            return
+        emit("---", "", f"## Passed on Retry ({self.passed_on_retry})", "",
+             "Failed first, then passed when re-run in the same session. Counted as passed above.", "",
+             "| Test | Attempts | First failure |",
+             "|------|----------|---------------|")
+        for nodeid, attempts, first_failure in self.retried:
+            emit(f"| `{nodeid}` | {attempts} | {first_failure} |")
+        if self.passed_on_retry > len(self.retried):
+            emit(f"| … {self.passed_on_retry - len(self.retried)} more | | |")
+        emit("")
+
+    def _write_quarantine(self, emit) -> None:
+        if not self.quarantine:
+            return
+        emit("---", "", f"## Quarantine ({self.quarantined_total})", "",
+             "Known-flaky tests, run in a separate lane. They are not sent to the fix agent "
+             "and do not count towards the status.", "",
+             "| Test | Score | Failed / runs | Passed on retry | This run |",
+             "|------|-------|---------------|-----------------|----------|")
+        for row in self.quarantine:
+            emit(f"| `{row['nodeid']}` | {row.get('score', 0):.2f} | {row.get('failures', 0)} / {row.get('runs', 0)} "
+                 f"| {row.get('retry_passes', 0)} | {row.get('outcome', '—')} |")
+        if self.quarantined_total > len(self.quarantine):
+            emit(f"| … {self.quarantined_total - len(self.quarantine)} more | | | | |")
+        emit("")
+
+    def _write_extras(self, emit, initial_meta: Dict[str, Any]) -> None:
+        net = initial_meta.get("network_cache")
+        if net:
+            served = net.get("hits", 0) + net.get("revalidated", 0)
+            requests_seen = served + net.get("misses", 0)
+            hit_rate = f"{served / requests_seen:.0%}" if requests_seen else "—"
+            emit("---", "", "## Network Cache", "",
+                 "| Hits | Revalidated | Misses | Blocked | Hit rate |",
+                 "|------|-------------|--------|---------|----------|",
+                 f"| {net.get('hits', 0)} | {net.get('revalidated', 0)} | {net.get('misses', 0)} "
+                 f"| {net.get('blocked', 0)} | {hit_rate} |",
+                 "")
+
+        throttle = initial_meta.get("api_throttle")
+        if throttle:
+            emit("---", "", "## API Throttling", "",
+                 "| Requests | Retries | 429s | 5xx | Throttled |",
+                 "|----------|---------|------|-----|-----------|",
+                 f"| {int(throttle.get('requests', 0))} | {int(throttle.get('retries', 0))} "
+                 f"| {int(throttle.get('rate_limited', 0))} | {int(throttle.get('server_errors', 0))} "
+                 f"| {throttle.get('throttled_s', 0):.1f}s |",
+                 "")
+            if self._throttled:
+                emit("| Test | Throttled |", "|------|-----------|")
+                for seconds, nodeid in sorted(self._throttled, reverse=True):
+                    emit(f"| `{nodeid}` | {seconds:.2f}s |")
+                emit("")
+
+        api_latency = initial_meta.get("api_latency")
+        if api_latency:
+            emit("---", "", "## API Latency", "",
+                 "| Endpoint | Requests | p50 | p95 | p99 | TTFB p50 | Connect p50 |",
+                 "|----------|----------|-----|-----|-----|----------|-------------|")
+            for endpoint, fields in sorted(api_latency.items()):
+                total = fields.get("total_ms", [])
+                ttfb = fields.get("ttfb_ms", [])
+                connect = fields.get("connect_ms", [])
+                emit(
+                    f"| `{endpoint}` | {len(total)} | {percentile(total, 50):.0f} ms | {percentile(total, 95):.0f} ms "
+                    f"| {percentile(total, 99):.0f} ms | {f'{percentile(ttfb, 50):.0f} ms' if ttfb else '—'} "
+                    f"| {f'{percentile(connect, 50):.0f} ms' if connect else '—'} |"
+                )
+            # share of API tests' duration spent waiting on the API vs. in the framework
+            if self.api_test_ms:
+                emit("", f"API tests spent {self.api_ms / 1000:.1f}s of {self.api_test_ms / 1000:.1f}s "
+                         f"({self.api_ms / self.api_test_ms:.0%}) waiting on HTTP responses.")
+            emit("")
+
+
+# ---------------------------------------------------------------------------
+# Markdown → HTML (just the subset the report uses), line by line
+# ---------------------------------------------------------------------------
+
+def _inline(text: str) -> str:
+    text = html.escape(text)
+    parts = text.split("`")
+    for i in range(1, len(parts), 2):
+        parts[i] = f"<code>{parts[i]}</code>"
+    text = "".join(parts)
+    while text.count("**") >= 2:
+        text = text.replace("**", "<b>", 1).replace("**", "</b>", 1)
+    return text
+
+
+def markdown_to_html(md_path: Path, html_path: Path, title: str = "") -> None:
+    """Convert the report's Markdown (headings, tables, lists, code fences) without loading it whole."""
+    with md_path.open(encoding="utf-8") as src, html_path.open("w", encoding="utf-8") as out:
+        out.write(f"<!doctype html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>\n"
+                  "<style>body{font-family:sans-serif;max-width:1100px;margin:auto}"
+                  "table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:2px 8px}"
+                  "pre{background:#f6f8fa;padding:8px;overflow:auto}</style></head><body>\n")
+        block = ""  # "", "pre", "table", "ul"
+        for raw in src:
+            line = raw.rstrip("\n")
+            if block == "pre":
+                if line.startswith("```"):
+                    out.write("</pre>\n")
+                    block = ""
+                else:
+                    out.write(html.escape(line) + "\n")
+                continue
+            if block == "table" and not line.startswith("|"):
+                out.write("</table>\n")
+                block = ""
+            if block == "ul" and not line.startswith("- "):
+                out.write("</ul>\n")
+                block = ""
+
+            if line.startswith("```"):
+                out.write("<pre>")
+                block = "pre"
+            elif line.startswith("|"):
+                cells = [c.strip() for c in line.strip("|").split("|")]
+                if all(set(c) <= {"-", ":"} for c in cells):
+                    continue  # header separator row
+                tag = "th" if block != "table" else "td"
+                if block != "table":
+                    out.write("<table>\n")
+                    block = "table"
+                out.write("<tr>" + "".join(f"<{tag}>{_inline(c)}</{tag}>" for c in cells) + "</tr>\n")
+            elif line.startswith("- "):
+                if block != "ul":
+                    out.write("<ul>\n")
+                    block = "ul"
+                out.write(f"<li>{_inline(line[2:])}</li>\n")
+            elif line.startswith("#"):
+                level = min(len(line) - len(line.lstrip("#")), 6)
+                out.write(f"<h{level}>{_inline(line[level:].strip())}</h{level}>\n")
+            elif line.strip() == "---":
+                out.write("<hr>\n")
+            elif line.strip():
+                out.write(f"<p>{_inline(line.strip())}</p>\n")
+        if block == "pre":
+            out.write("</pre>\n")
+        elif block in ("table", "ul"):
+            out.write(f"</{block}>\n")
+        out.write("</body></html>\n")
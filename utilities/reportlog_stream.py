@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Called with one finished test, shaped like a pytest-json-report "tests" entry:
+# {"nodeid", "outcome", "setup": {...}, "call": {...}, "teardown": {...}}
+ResultCallback = Callable[[Dict[str, Any]], None]
+
+
+def longrepr_text(longrepr: Any) -> str:
+    """Flatten a reportlog-serialized longrepr (str, skip tuple or ReprExceptionInfo dict) to text."""
+    if not longrepr:
+        return ""
+    if isinstance(longrepr, str):
+        return longrepr
+    if isinstance(longrepr, (list, tuple)):  # skip: (path, lineno, reason)
+        return str(longrepr[-1])
+    if not isinstance(longrepr, dict):
+        return str(longrepr)
+
+    lines: List[str] = []
+    chain = longrepr.get("chain") or [(longrepr.get("reprtraceback"), longrepr.get("reprcrash"), None)]
+    for traceback, crash, description in chain:
+        for entry in (traceback or {}).get("reprentries", []):
+            data = entry.get("data") or {}
+            lines.extend(data.get("lines") or [])
+            loc = data.get("reprfileloc")
+            if loc:
+                lines.append(f"{loc.get('path')}:{loc.get('lineno')}: {loc.get('message')}")
+        if crash and not (traceback or {}).get("reprentries"):
+            lines.append(f"{crash.get('path')}:{crash.get('lineno')}: {crash.get('message')}")
+        if description:
+            lines.append(description)
+    for title, content in longrepr.get("sections") or []:
+        lines += [f"{'-' * 10} {title} {'-' * 10}", content]
+    return "\n".join(lines)
+
+
+def _outcome(phases: Dict[str, Dict[str, Any]]) -> str:
+    setup, call, teardown = phases.get("setup", {}), phases.get("call", {}), phases.get("teardown", {})
+    if setup.get("outcome") == "failed":
+        return "error"
+    if setup.get("outcome") == "skipped":
+        return "skipped"
+    if call.get("wasxfail") is not None:
+        return "xfailed" if call.get("outcome") == "skipped" else "xpassed"
+    if call.get("outcome") in ("failed", "skipped"):
+        return call["outcome"]
+    if teardown.get("outcome") == "failed":
+        return "error"
+    return "passed"
+
+
+class ReportLogStream:
+    """
+    Follows a pytest-reportlog JSONL file while pytest is still writing it.
+
+    Every TestReport line updates the test's setup/call/teardown phases; when
+    the teardown report arrives the test is complete and `on_result` is called
+    with it right away, long before report.json exists. Partial lines (pytest
+    mid-write) are buffered until their newline arrives.
+    """
+
+    def __init__(self, path: Path, on_result: Optional[ResultCallback] = None, poll: float = 0.2):
+        self.path = Path(path)
+        self.on_result = on_result
+        self.poll = poll
+        self.results: List[Dict[str, Any]] = []
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ReportLogStream":
+        self._thread = threading.Thread(target=self._follow, name=f"reportlog-{self.path.parent.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10) -> List[Dict[str, Any]]:
+        """Drain whatever is left in the file and return all finished results."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.results
+
+    # -- following -----------------------------------------------------------
+    def _follow(self) -> None:
+        while not self.path.exists():
+            if self._stop.wait(self.poll):
+                if not self.path.exists():
+                    return
+                break
+        buffer = ""
+        with self.path.open(encoding="utf-8") as fh:
+            while True:
+                chunk = fh.readline()
+                if chunk:
+                    buffer += chunk
+                    if buffer.endswith("\n"):
+                        self._handle_line(buffer)
+                        buffer = ""
+                    continue
+                if self._stop.is_set():
+                    break  # EOF after the process exited: fully drained
+                time.sleep(self.poll)
+        if buffer.strip():
+            self._handle_line(buffer)
+
+    def _handle_line(self, line: str) -> None:
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        if event.get("$report_type") == "TestReport":
+            self._handle_test(event)
+
+    def _handle_test(self, event: Dict[str, Any]) -> None:
+        nodeid = event["nodeid"]
+        phases = self._pending.setdefault(nodeid, {})
+        phase = {
+            "outcome": event.get("outcome"),
+            "duration": event.get("duration", 0.0),
+            "longrepr": longrepr_text(event.get("longrepr")),
+        }
+        if "wasxfail" in event:
+            phase["wasxfail"] = event["wasxfail"]
+        phases[event.get("when", "call")] = phase
+        if event.get("when") != "teardown":
+            return
+
+        del self._pending[nodeid]
+        result = {"nodeid": nodeid, "outcome": _outcome(phases), **phases}
+        self.results.append(result)
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception as exc:  # a broken consumer must not stop the stream
+                print(f"  ⚠️  reportlog consumer error: {exc}")
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pytest
+from _pytest.runner import runtestprotocol
+
+# Called with the attempts of a test that ran more than once, each
+# {"outcome", "duration"[, "exc_type", "longrepr"]}
+RetriedCallback = Callable[[List[Dict[str, Any]]], None]
+
+
+class RetryPolicy:
+    """
+    Which failed tests are re-run inside the pytest session, and how often.
+
+    `retries` is the default number of extra attempts (<retries> / --retries).
+    `markers` overrides it per marker, e.g. {"ui": 2, "real_login": 0}; when a
+    test carries several configured markers the lowest count wins, so a 0
+    always opts out.
+
+    A failure is retried when its exception type — any class in its MRO, by
+    name — is listed in `on` (empty = any type) and none is listed in `never`.
+    The defaults retry timeouts and dropped connections, never assertions:
+    a wrong value will not become right on the next attempt.
+    """
+
+    def __init__(self, retries: int = 0, on: Iterable[str] = (), never: Iterable[str] = (),
+                 markers: Optional[Dict[str, int]] = None):
+        self.retries = max(0, retries)
+        self.on = set(on)
+        self.never = set(never)
+        self.markers = dict(markers or {})
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "RetryPolicy":
+        retry = cfg.get("retry", {})
+        return cls(cfg.get("retries", 0), retry.get("on", ()), retry.get("never", ()), retry.get("markers"))
+
+    def retries_for(self, markers: Iterable[str]) -> int:
+        counts = [self.markers[m] for m in set(markers) if m in self.markers]
+        return max(0, min(counts)) if counts else self.retries
+
+    def should_retry(self, exc_types: List[str]) -> bool:
+        """`exc_types`: class names of the exception's MRO, most derived first."""
+        if not exc_types or self.never.intersection(exc_types):
+            return False
+        return not self.on or bool(self.on.intersection(exc_types))
+
+
+
+def _attempt(reports: List[pytest.TestReport], exc_types: List[str]) -> Dict[str, Any]:
+    failed = next((r for r in reports if r.failed), None)
+    entry: Dict[str, Any] = {
+        "outcome": "passed" if failed is None else ("failed" if failed.when == "call" else "error"),
+        "duration": round(sum(r.duration for r in reports), 3),
+    }
+    if failed is not None:
+        entry["exc_type"] = exc_types[0] if exc_types else ""
+        entry["longrepr"] = failed.longreprtext[:2000]
+    return entry
+
+
+class RetryPlugin:
+    """
+    pytest plugin applying a RetryPolicy: a failed test is re-run in the same
+    session (same browser, same session fixtures) while the policy allows it.
+    Only the last attempt is reported; all attempts go to metadata.attempts
+    in the JSON report and to `on_retried`.
+
+    Register it from pytest_configure:
+        config.pluginmanager.register(RetryPlugin(policy, on_retried), "retry_policy")
+    """
+
+    def __init__(self, policy: RetryPolicy, on_retried: Optional[RetriedCallback] = None):
+        self.policy = policy
+        self.on_retried = on_retried
+
+    @pytest.hookimpl(tryfirst=True, hookwrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call: pytest.CallInfo):
+        outcome = yield
+        rep = outcome.get_result()
+        if rep.failed and call.excinfo is not None and not getattr(item, "_retry_exc", None):
+            item._retry_exc = [cls.__name__ for cls in call.excinfo.type.__mro__]
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item: pytest.Item, nextitem: Optional[pytest.Item]):
+        retries = self.policy.retries_for(m.name for m in item.iter_markers())
+        if not retries:
+            return None
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        attempts: List[Dict[str, Any]] = []
+        for _ in range(retries + 1):
+            item._retry_exc = None
+            reports = runtestprotocol(item, nextitem=nextitem, log=False)
+            attempts.append(_attempt(reports, item._retry_exc or []))
+            if attempts[-1]["outcome"] == "passed" or not self.policy.should_retry(item._retry_exc or []):
+                break
+        if len(attempts) > 1:
+            extra = getattr(item, "_json_report_extra", None)
+            if extra is None:
+                extra = item._json_report_extra = {}
+            extra.setdefault("metadata", {})["attempts"] = attempts
+            if self.on_retried:
+                self.on_retried(attempts)
+        for report in reports:
+            item.ihook.pytest_runtest_logreport(report=report)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+        return True
@@ -0,0 +1,397 @@
+"""
+Queryable history of every runner cycle in an embedded SQLite database.
+
+Tables:
+  runs        one row per cycle: when, marker, duration and before/after counts
+  results     one row per (run, phase, test): outcome, duration, failure signature
+  signatures  normalised failure signatures (utilities.failure_clusters) by key
+
+The runner appends each cycle as it finishes. Older runs can be imported once
+with `backfill`, from test_runs/<id>/{initial,after_fix}/report.json where
+they still exist and otherwise from reports/report_<id>.md. Markdown reports
+only list failures, so backfilled passing tests have no rows (run counts are
+still exact).
+
+Usage:
+  with RunHistory.open() as history:
+      history.record_run(run_id, initial_report, final_report)
+      history.slowest(days=30, limit=20)
+
+  python -m utilities.run_history backfill
+  python -m utilities.run_history slowest --days 30 --limit 20
+  python -m utilities.run_history test "test_cases/test_api.py::TestUsersAPI::test_create_user"
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utilities.config_loader import cache_dir, load_config
+from utilities.failure_clusters import signature
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id    TEXT PRIMARY KEY,
+    started   TEXT NOT NULL,
+    marker    TEXT,
+    duration  REAL,
+    passed    INTEGER, failed INTEGER, error INTEGER, skipped INTEGER,
+    after_passed INTEGER, after_failed INTEGER, after_error INTEGER, after_skipped INTEGER,
+    source    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id    TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    phase     TEXT NOT NULL,
+    nodeid    TEXT NOT NULL,
+    outcome   TEXT NOT NULL,
+    duration  REAL,
+    signature TEXT,
+    PRIMARY KEY (run_id, phase, nodeid)
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    key       TEXT PRIMARY KEY,
+    exc_type  TEXT, locator TEXT, frame TEXT, message TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+CREATE INDEX IF NOT EXISTS results_nodeid ON results(nodeid, run_id);
+-- covering index for per-test duration aggregates (slowest)
+CREATE INDEX IF NOT EXISTS results_duration ON results(phase, nodeid, run_id, duration);
+CREATE INDEX IF NOT EXISTS results_signature ON results(signature) WHERE signature IS NOT NULL;
+"""
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_RUN_ID_RE = re.compile(r"(\d{8}_\d{6})")
+_COUNT_ROWS = {"Passed": "passed", "Failed": "failed", "Error": "error", "Skipped": "skipped"}
+_FAILED = ("failed", "error")
+
+
+def started_at(run_id: str) -> str:
+    """ISO timestamp of a YYYYMMDD_HHMMSS run id."""
+    return datetime.strptime(run_id, "%Y%m%d_%H%M%S").isoformat(sep=" ")
+
+
+def _duration(test: Dict[str, Any]) -> Optional[float]:
+    values = [(test.get(p) or {}).get("duration") for p in ("setup", "call", "teardown")]
+    values = [v for v in values if isinstance(v, (int, float))]
+    return sum(values) if values else None
+
+
+def _counts(tests: List[Dict[str, Any]]) -> Tuple[int, int, int, int]:
+    outcomes = [t.get("outcome") for t in tests]
+    return tuple(outcomes.count(o) for o in ("passed", "failed", "error", "skipped"))  # type: ignore[return-value]
+
+
+def _attempt_rows(test: Dict[str, Any], phase: str = "initial") -> List[Tuple[str, Dict[str, Any]]]:
+    """A test retried in-session: its first attempt under `phase`, its final outcome under "retry"."""
+    attempts = (test.get("metadata") or {}).get("attempts") or []
+    if len(attempts) < 2:
+        return [(phase, test)]
+    first = attempts[0]
+    return [(phase, {"nodeid": test.get("nodeid", ""), "outcome": first.get("outcome", ""),
+                         "call": {"duration": first.get("duration"), "longrepr": first.get("longrepr", "")}}),
+            ("retry", test)]
+
+
+class RunHistory:
+    """
+    Thin wrapper around the history database (default .cache/history.sqlite,
+    <historyDb> in data.xml). Writes for one run happen in one transaction, so
+    re-recording a run replaces it atomically.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    @classmethod
+    def open(cls, path: Optional[Path] = None) -> "RunHistory":
+        if path is None:
+            configured = load_config().get("history_db") or ""
+            path = _PROJECT_ROOT / configured if configured else Path(cache_dir()) / "history.sqlite"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(_SCHEMA)
+        return cls(conn)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "RunHistory":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # -- writing ---------------------------------------------------------------
+    def has_run(self, run_id: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def record_run(self, run_id: str, initial_report: dict, final_report: Optional[dict] = None,
+                   marker: Optional[str] = None, source: str = "runner",
+                   extra_phases: Optional[Dict[str, dict]] = None) -> None:
+        """
+        Store one cycle from its pytest JSON reports (final_report = the after-fix
+        re-run, if any). `extra_phases` adds more reports under their own phase
+        name, e.g. {"quarantine": ..., "retry": ...} from the quarantine lane.
+        A test retried in-session (metadata.attempts) is stored as its first
+        attempt under "initial" (or its extra phase, e.g. "quarantine") and its
+        final outcome under "retry". An extra "retry" report (the lane's own
+        re-run of its failures) is the later attempt, so it replaces the
+        in-session "retry" row of the same test.
+        """
+        initial_tests = initial_report.get("tests", [])
+        rerun = final_report is not None and final_report is not initial_report
+        after_tests = final_report.get("tests", []) if rerun else initial_tests
+        duration = (final_report or initial_report).get("duration", initial_report.get("duration"))
+        rows = [row for t in initial_tests for row in _attempt_rows(t)]
+        rows += [("after_fix", t) for t in after_tests] if rerun else []
+        for phase, report in (extra_phases or {}).items():
+            tests = report.get("tests", [])
+            rows += [(phase, t) for t in tests] if phase == "retry" else \
+                [row for t in tests for row in _attempt_rows(t, phase)]
+        # one row per (phase, nodeid): the latest attempt wins
+        rows = list({(phase, t.get("nodeid", "")): (phase, t) for phase, t in rows}.values())
+        with self.conn:
+            self._insert_run(run_id, marker, duration, _counts(initial_tests), _counts(after_tests), source)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id, phase, t.get("nodeid", ""), t.get("outcome", ""), _duration(t), self._signature(t))
+                 for phase, t in rows),
+            )
+
+    def _insert_run(self, run_id: str, marker: Optional[str], duration: Optional[float],
+                    before: Tuple[int, ...], after: Tuple[int, ...], source: str) -> None:
+        self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+        self.conn.execute(
+            "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, started_at(run_id), marker, duration, *before, *after, source),
+        )
+
+    def _signature(self, test: Dict[str, Any]) -> Optional[str]:
+        if test.get("outcome") not in _FAILED:
+            return None
+        sig = signature(test)
+        self.conn.execute(
+            "INSERT OR IGNORE INTO signatures VALUES (?, ?, ?, ?, ?)",
+            (sig["key"], sig["exc_type"], sig["locator"], sig["frame"], sig["message"]),
+        )
+        return sig["key"]
+
+    # -- backfill --------------------------------------------------------------
+    def backfill(self, reports_dir: Path, runs_dir: Path) -> int:
+        """Import every run not stored yet. Returns the number of runs added."""
+        run_ids = {m.group(1) for p in reports_dir.glob("report_*.md") if (m := _RUN_ID_RE.search(p.name))}
+        if runs_dir.exists():
+            run_ids.update(p.name for p in runs_dir.iterdir() if _RUN_ID_RE.fullmatch(p.name))
+        added = 0
+        for run_id in sorted(run_ids):
+            if self.has_run(run_id):
+                continue
+            initial_json = runs_dir / run_id / "initial" / "report.json"
+            md = reports_dir / f"report_{run_id}.md"
+            try:
+                if initial_json.exists():
+                    initial = json.loads(initial_json.read_text(encoding="utf-8"))
+                    final_json = runs_dir / run_id / "after_fix" / "report.json"
+                    final = json.loads(final_json.read_text(encoding="utf-8")) if final_json.exists() else None
+                    self.record_run(run_id, initial, final, source="backfill-json")
+                elif md.exists():
+                    self._record_markdown(run_id, md)
+                else:
+                    continue
+            except (OSError, ValueError) as exc:
+                print(f"   ⚠️  {run_id}: skipped — {exc}")
+                continue
+            added += 1
+        return added
+
+    def _record_markdown(self, run_id: str, md: Path) -> None:
+        parsed = parse_markdown_report(md.read_text(encoding="utf-8"))
+        before = tuple(parsed["before"].get(k, 0) for k in ("passed", "failed", "error", "skipped"))
+        after = tuple(parsed["after"].get(k, 0) for k in ("passed", "failed", "error", "skipped"))
+        rows = [("initial", t) for t in parsed["initial"]]
+        if parsed["remaining"] is not None:
+            rows += [("after_fix", t) for t in parsed["remaining"]]
+        with self.conn:
+            self._insert_run(run_id, None, parsed["duration"], before, after, "backfill-md")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id, phase, t["nodeid"], t["outcome"], None, self._signature(t)) for phase, t in rows),
+            )
+
+    # -- queries ---------------------------------------------------------------
+    def _since(self, days: float) -> str:
+        return (datetime.now() - timedelta(days=days)).isoformat(sep=" ")
+
+    def slowest(self, days: float = 30, limit: int = 20) -> List[sqlite3.Row]:
+        """Tests with the highest mean duration over the last `days` (initial runs only)."""
+        return self.conn.execute(
+            """
+            SELECT r.nodeid, COUNT(*) AS runs, AVG(r.duration) AS mean_s, MAX(r.duration) AS max_s
+            FROM runs JOIN results r USING (run_id)
+            WHERE runs.started >= ? AND r.phase = 'initial' AND r.duration IS NOT NULL
+            GROUP BY r.nodeid ORDER BY mean_s DESC LIMIT ?
+            """,
+            (self._since(days), limit),
+        ).fetchall()
+
+    def recent_outcomes(self, runs: int = 30) -> List[sqlite3.Row]:
+        """
+        First-attempt ("initial" / "quarantine") and "retry" rows of the last
+        `runs` runs, newest run first, with each run's source and pass count.
+        """
+        return self.conn.execute(
+            """
+            WITH recent AS (SELECT run_id, started, source, passed FROM runs ORDER BY started DESC LIMIT ?)
+            SELECT recent.run_id, recent.source, recent.passed AS run_passed, r.nodeid, r.phase, r.outcome
+            FROM recent LEFT JOIN results r
+                 ON r.run_id = recent.run_id AND r.phase IN ('initial', 'quarantine', 'retry')
+            ORDER BY recent.started DESC
+            """,
+            (runs,),
+        ).fetchall()
+
+    def test_history(self, nodeid: str, limit: int = 30) -> List[sqlite3.Row]:
+        """Most recent outcomes of one test, newest first."""
+        return self.conn.execute(
+            """
+            SELECT runs.run_id, runs.started, r.phase, r.outcome, r.duration, s.exc_type, s.locator, s.frame
+            FROM results r JOIN runs USING (run_id) LEFT JOIN signatures s ON s.key = r.signature
+            WHERE r.nodeid = ? ORDER BY runs.started DESC, r.phase LIMIT ?
+            """,
+            (nodeid, limit),
+        ).fetchall()
+
+    def top_signatures(self, days: float = 30, limit: int = 10) -> List[sqlite3.Row]:
+        """Failure signatures hit most often over the last `days`."""
+        return self.conn.execute(
+            """
+            SELECT s.key, s.exc_type, s.locator, s.frame, COUNT(*) AS failures,
+                   COUNT(DISTINCT r.nodeid) AS tests, COUNT(DISTINCT r.run_id) AS runs
+            FROM results r JOIN runs USING (run_id) JOIN signatures s ON s.key = r.signature
+            WHERE runs.started >= ? AND r.phase = 'initial'
+            GROUP BY s.key ORDER BY failures DESC LIMIT ?
+            """,
+            (self._since(days), limit),
+        ).fetchall()
+
+
+# ---------------------------------------------------------------------------
+# Markdown report parsing (backfill)
+# ---------------------------------------------------------------------------
+
+_DURATION_RE = re.compile(r"^\*\*Duration:\*\*\s*([\d.]+)s", re.M)
+_COUNT_RE = re.compile(r"^\|\s*\S+\s+(Passed|Failed|Error|Skipped)\s*\|\s*(\d+)\s*\|\s*(\d+)\s*\|", re.M)
+_TEST_HEADING_RE = re.compile(r"^### `([^`]+)`")
+_CLUSTER_ITEM_RE = re.compile(r"^- `([^`]+)`")
+
+
+def _sections(text: str) -> Iterator[Tuple[str, List[str]]]:
+    title, lines = "", []
+    for line in text.splitlines():
+        if line.startswith("## "):
+            yield title, lines
+            title, lines = line[3:].strip(), []
+        else:
+            lines.append(line)
+    yield title, lines
+
+
+def _failure_entries(lines: List[str]) -> List[Dict[str, Any]]:
+    """
+    Tests under an "Initial/Remaining Failures" section with the traceback
+    shown for them. Clustered sections ("### <title> — N tests" + "- `nodeid`"
+    items) share their representative's traceback.
+    """
+    entries: List[Dict[str, Any]] = []
+    group: List[str] = []
+    code: Optional[List[str]] = None
+
+    def _flush(longrepr: str) -> None:
+        for nodeid in group:
+            entries.append({"nodeid": nodeid, "outcome": "failed", "call": {"longrepr": longrepr}})
+        group.clear()
+
+    for line in lines:
+        if code is not None:
+            if line.startswith("```"):
+                _flush("\n".join(code))
+                code = None
+            else:
+                code.append(line)
+            continue
+        if line.startswith("```"):
+            code = []
+        elif line.startswith("### "):
+            _flush("")
+            heading = _TEST_HEADING_RE.match(line)
+            if heading:
+                group.append(heading.group(1))
+        elif _CLUSTER_ITEM_RE.match(line):
+            group.append(_CLUSTER_ITEM_RE.match(line).group(1))
+    _flush("")
+    return entries
+
+
+def parse_markdown_report(text: str) -> Dict[str, Any]:
+    """{duration, before, after, initial: [failures], remaining: [failures] | None} of one report."""
+    duration = _DURATION_RE.search(text)
+    before: Dict[str, int] = {}
+    after: Dict[str, int] = {}
+    for label, b, a in _COUNT_RE.findall(text):
+        before[_COUNT_ROWS[label]] = int(b)
+        after[_COUNT_ROWS[label]] = int(a)
+    initial: List[Dict[str, Any]] = []
+    remaining: Optional[List[Dict[str, Any]]] = None
+    for title, lines in _sections(text):
+        if title.startswith("Initial Failures"):
+            initial = _failure_entries(lines)
+        elif title.startswith("Remaining Failures"):
+            remaining = _failure_entries(lines)
+    return {"duration": float(duration.group(1)) if duration else None, "before": before, "after": after,
+            "initial": initial, "remaining": remaining}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query or backfill the test run history database")
+    parser.add_argument("--db", type=Path, default=None, help="Database path (default: <historyDb> / .cache)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill = sub.add_parser("backfill", help="Import existing reports/ and test_runs/")
+    backfill.add_argument("--reports", type=Path, default=_PROJECT_ROOT / "reports")
+    backfill.add_argument("--runs", type=Path, default=_PROJECT_ROOT / "test_runs")
+    slowest = sub.add_parser("slowest", help="Slowest tests by mean duration")
+    slowest.add_argument("--days", type=float, default=30)
+    slowest.add_argument("--limit", type=int, default=20)
+    test = sub.add_parser("test", help="Recent outcomes of one test")
+    test.add_argument("nodeid")
+    signatures = sub.add_parser("signatures", help="Most frequent failure signatures")
+    signatures.add_argument("--days", type=float, default=30)
+    args = parser.parse_args()
+
+    with RunHistory.open(args.db) as history:
+        if args.command == "backfill":
+            print(f"Imported {history.backfill(args.reports, args.runs)} run(s)")
+        elif args.command == "slowest":
+            for row in history.slowest(args.days, args.limit):
+                print(f"{row['mean_s']:8.2f}s  (max {row['max_s']:.2f}s, {row['runs']} runs)  {row['nodeid']}")
+        elif args.command == "test":
+            for row in history.test_history(args.nodeid):
+                where = row["locator"] or row["frame"] or ""
+                dur = f"{row['duration']:.2f}s" if row["duration"] is not None else "—"
+                print(f"{row['started']}  {row['phase']:<9} {row['outcome']:<8} {dur:>8}  "
+                      f"{row['exc_type'] or ''} {where}".rstrip())
+        elif args.command == "signatures":
+            for row in history.top_signatures(args.days):
+                print(f"{row['failures']:5} failures  {row['tests']:3} tests  {row['runs']:3} runs  "
+                      f"{row['exc_type']} at {row['locator'] or row['frame']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import anyio
+import httpx
+
+from utilities.config_loader import cache_dir
+
+DEFAULT_API_URL = "https://api.telegram.org"
+# Undelivered items are dropped after this many failed cycles
+_MAX_ATTEMPTS = 10
+
+
+def _description(response: httpx.Response) -> str:
+    """The Bot API's error description, falling back to the raw body."""
+    try:
+        return str(response.json().get("description") or response.text)
+    except ValueError:
+        return response.text[:200]
+
+
+class TelegramNotifier:
+    """
+    Sends run notifications over one pooled keep-alive httpx.AsyncClient.
+
+    The summary goes first; the AI analysis and the report document follow
+    concurrently once it is out. Anything that fails for a transient reason
+    (network error, 429, 5xx) is kept in a durable queue
+    (.cache/telegram_queue.json) and retried, oldest first, at the start of
+    the next notify(). Other 4xx answers (bad token, chat not found, message
+    too long) would fail the same way again, so those items are dropped.
+
+    `api_url` replaces https://api.telegram.org, e.g. to point at
+    utilities.fake_telegram in tests (TELEGRAM_API_URL in the runner).
+
+    Usage:
+        async with TelegramNotifier(token, chat_id) as notifier:
+            await notifier.notify(summary, analysis, report_path)
+    """
+
+    def __init__(self, token: str, chat_id: str, api_url: str = "",
+                 queue_path: Optional[Path] = None, timeout: float = 30.0):
+        self.base_url = f"{(api_url or DEFAULT_API_URL).rstrip('/')}/bot{token}"
+        self.chat_id = chat_id
+        self.queue_path = queue_path or Path(cache_dir()) / "telegram_queue.json"
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+        )
+
+    async def __aenter__(self) -> "TelegramNotifier":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.client.aclose()
+
+    # -- items -----------------------------------------------------------------
+    def message(self, label: str, text: str) -> Dict[str, Any]:
+        return {"label": label, "method": "sendMessage",
+                "data": {"chat_id": self.chat_id, "text": text, "parse_mode": "HTML"}}
+
+    def document(self, label: str, path: Path, caption: str) -> Dict[str, Any]:
+        return {"label": label, "method": "sendDocument",
+                "data": {"chat_id": self.chat_id, "caption": caption}, "file": str(path)}
+
+    async def _deliver(self, item: Dict[str, Any]) -> bool:
+        """True when the item is done with (sent or dropped), False to queue it for a retry."""
+        url = f"{self.base_url}/{item['method']}"
+        try:
+            if item.get("file"):
+                path = Path(item["file"])
+                files = {"document": (path.name, path.read_bytes(), "text/markdown")}
+                resp = await self.client.post(url, data=item["data"], files=files)
+            else:
+                resp = await self.client.post(url, json=item["data"])
+            resp.raise_for_status()
+        except FileNotFoundError:
+            print(f"   ⚠️  Telegram: {item['label']} dropped — {item['file']} no longer exists")
+            return True  # nothing left to deliver
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            if status == 429 or status >= 500:
+                print(f"   ⚠️  Telegram: failed to send {item['label']} — HTTP {status}, will retry")
+                return False
+            print(f"   ⚠️  Telegram: {item['label']} dropped — HTTP {status}: {_description(exc.response)}")
+            return True  # retrying cannot fix a rejected request
+        except httpx.HTTPError as exc:
+            print(f"   ⚠️  Telegram: failed to send {item['label']} — {exc}")
+            return False
+        print(f"   ✅ Telegram: {item['label']} sent")
+        return True
+
+    # -- queue -----------------------------------------------------------------
+    def _load_queue(self) -> List[Dict[str, Any]]:
+        if not self.queue_path.exists():
+            return []
+        try:
+            return json.loads(self.queue_path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return []
+
+    def _save_queue(self, items: List[Dict[str, Any]]) -> None:
+        if not items and not self.queue_path.exists():
+            return
+        self.queue_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.queue_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(items, indent=1), encoding="utf-8")
+        os.replace(tmp, self.queue_path)
+
+    async def _flush(self) -> List[Dict[str, Any]]:
+        """Retry queued items in order; returns the ones still undelivered."""
+        still_pending = []
+        for item in self._load_queue():
+            retry = dict(item)
+            if retry["method"] == "sendMessage":
+                queued = datetime.fromtimestamp(item["queued"]).strftime("%Y-%m-%d %H:%M")
+                retry["data"] = {**item["data"], "text": f"<i>⏳ Delayed from {queued}</i>\n\n{item['data']['text']}"}
+            if await self._deliver(retry):
+                continue
+            item["attempts"] = item.get("attempts", 0) + 1
+            if item["attempts"] < _MAX_ATTEMPTS:
+                still_pending.append(item)
+            else:
+                print(f"   ⚠️  Telegram: giving up on queued {item['label']} after {item['attempts']} attempts")
+        return still_pending
+
+    # -- sending ---------------------------------------------------------------
+    async def notify(self, summary: str, analysis: str = "", report_path: Optional[Path] = None) -> int:
+        """
+        Deliver the queue backlog, then this run's summary, analysis and report.
+        Returns the number of items left in the queue.
+        """
+        pending = await self._flush()
+        failed: List[Dict[str, Any]] = []
+
+        summary_item = self.message("summary", summary)
+        if not await self._deliver(summary_item):
+            failed.append(summary_item)
+
+        followups = []
+        if analysis:
+            followups.append(self.message("AI analysis", analysis))
+        if report_path is not None:
+            followups.append(self.document("report file", report_path, "Full report"))
+        delivered = [False] * len(followups)
+
+        async def _send(index: int) -> None:
+            delivered[index] = await self._deliver(followups[index])
+
+        async with anyio.create_task_group() as tg:
+            for index in range(len(followups)):
+                tg.start_soon(_send, index)
+        failed.extend(item for item, ok in zip(followups, delivered) if not ok)
+
+        now = time.time()
+        pending.extend({**item, "queued": now, "attempts": 0} for item in failed)
+        self._save_queue(pending)
+        if pending:
+            print(f"   ℹ️  Telegram: {len(pending)} item(s) queued for the next run ({self.queue_path})")
+        return len(pending)
@@ -1,9 +1,14 @@
+import anyio
+
+from api_objects.async_users_api import AsyncUsersAPI
 from api_objects.users_api import UsersAPI
 
 
 class APIFlows:
 
     def __init__(self, base_url: str, token: str):
+        self.base_url = base_url
+        self.token = token
         self.users = UsersAPI(base_url, token)
 
     def create_user(self, name: str, email: str, gender: str = "male", status: str = "active") -> dict:
@@ -34,8 +39,10 @@ class APIFlows:
 
     def full_crud_cycle(self, name: str, email: str) -> None:
         user = self.create_user(name, email)
-        user_id = user["id"]
+        self.read_update_delete(user["id"])
 
+    def read_update_delete(self, user_id: int) -> None:
+        """The R/U/D half of full_crud_cycle, for a user that already exists (e.g. from UserPool)."""
         self.get_user(user_id)
         self.update_user(user_id, name="Updated Name")
 
@@ -46,3 +53,122 @@ class APIFlows:
 
         resp = self.users.get_by_id(user_id)
         assert resp.status_code == 404
+
+    # --- Batch helpers (run concurrently through AsyncAPIFlows) ---
+
+    def _run_async(self, method: str, *args):
+        async def _go():
+            async with AsyncAPIFlows(self.base_url, self.token) as flows:
+                return await getattr(flows, method)(*args)
+
+        return anyio.run(_go)
+
+    def create_users(self, specs: list[dict]) -> list[dict]:
+        return self._run_async("create_users", specs)
+
+    def get_users(self, user_ids: list[int]) -> list[dict]:
+        return self._run_async("get_users", user_ids)
+
+    def delete_users(self, user_ids: list[int]) -> None:
+        self._run_async("delete_users", user_ids)
+
+    def full_crud_cycles(self, users: list[tuple[str, str]]) -> None:
+        self._run_async("full_crud_cycles", users)
+
+
+class AsyncAPIFlows:
+    """
+    Async counterpart of APIFlows. Same assertions, plus batch helpers that
+    overlap round-trips instead of serializing them; concurrency is bounded
+    by AsyncUsersAPI's per-host limit.
+    """
+
+    def __init__(self, base_url: str, token: str, per_host_limit: int = 8):
+        self.users = AsyncUsersAPI(base_url, token, per_host_limit=per_host_limit)
+
+    async def __aenter__(self) -> "AsyncAPIFlows":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.users.aclose()
+
+    async def create_user(self, name: str, email: str, gender: str = "male", status: str = "active") -> dict:
+        resp = await self.users.create(name, email, gender, status)
+        assert resp.status_code == 201, f"Expected 201, got {resp.status_code}: {resp.text}"
+        return resp.json()
+
+    async def get_user(self, user_id: int) -> dict:
+        resp = await self.users.get_by_id(user_id)
+        assert resp.status_code == 200, f"Expected 200, got {resp.status_code}"
+        return resp.json()
+
+    async def update_user(self, user_id: int, **fields) -> dict:
+        resp = await self.users.update(user_id, **fields)
+        assert resp.status_code == 200, f"Expected 200, got {resp.status_code}: {resp.text}"
+        return resp.json()
+
+    async def delete_user(self, user_id: int) -> None:
+        resp = await self.users.delete(user_id)
+        assert resp.status_code == 204, f"Expected 204, got {resp.status_code}"
+
+    async def full_crud_cycle(self, name: str, email: str) -> None:
+        user = await self.create_user(name, email)
+        user_id = user["id"]
+
+        await self.get_user(user_id)
+        await self.update_user(user_id, name="Updated Name")
+
+        updated = await self.get_user(user_id)
+        assert updated["name"] == "Updated Name"
+
+        await self.delete_user(user_id)
+
+        resp = await self.users.get_by_id(user_id)
+        assert resp.status_code == 404
+
+    # --- Batch helpers ---
+
+    async def _gather(self, calls: list) -> list:
+        """
+        Run zero-arg coroutine functions concurrently, returning results in input order.
+        A single failing call raises its own exception (so retry policies and
+        failure signatures see e.g. AssertionError); an ExceptionGroup is kept
+        only when several calls failed.
+        """
+        results: list = [None] * len(calls)
+
+        async def _one(index: int, call) -> None:
+            results[index] = await call()
+
+        try:
+            async with anyio.create_task_group() as tg:
+                for index, call in enumerate(calls):
+                    tg.start_soon(_one, index, call)
+        except* Exception as group:
+            if len(group.exceptions) == 1:
+                raise group.exceptions[0]
+            raise
+        return results
+
+    async def create_users(self, specs: list[dict], on_created=None) -> list[dict]:
+        """
+        specs: [{"name": ..., "email": ..., "gender"?: ..., "status"?: ...}, ...]
+        `on_created(user)` is called as soon as each create returns, so callers
+        can track (and later delete) users even when a sibling create fails.
+        """
+        async def _create(spec: dict) -> dict:
+            user = await self.create_user(**spec)
+            if on_created is not None:
+                on_created(user)
+            return user
+
+        return await self._gather([lambda spec=spec: _create(spec) for spec in specs])
+
+    async def get_users(self, user_ids: list[int]) -> list[dict]:
+        return await self._gather([lambda uid=uid: self.get_user(uid) for uid in user_ids])
+
+    async def delete_users(self, user_ids: list[int]) -> None:
+        await self._gather([lambda uid=uid: self.delete_user(uid) for uid in user_ids])
+
+    async def full_crud_cycles(self, users: list[tuple[str, str]]) -> None:
+        await self._gather([lambda u=u: self.full_crud_cycle(*u) for u in users])
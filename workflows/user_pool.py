@@ -0,0 +1,188 @@
+import threading
+import uuid
+from contextlib import contextmanager
+
+import anyio
+
+from api_objects.async_users_api import AsyncUsersAPI
+from api_objects.users_api import UsersAPI
+from workflows.api_workflow import AsyncAPIFlows
+
+
+def _pool_spec(index: int) -> dict:
+    return {
+        "name": f"Pool User {index}",
+        "email": f"pool_{uuid.uuid4().hex[:10]}@testing.com",
+        "gender": "female" if index % 2 else "male",
+        "status": "active",
+    }
+
+
+class Lease:
+    """An exclusively checked-out pool user. Call retire() if the test broke or deleted it."""
+
+    def __init__(self, user: dict):
+        self.user = user
+        self.retired = False
+        self.deleted = False
+
+    def retire(self, deleted: bool = False) -> None:
+        self.retired = True
+        self.deleted = deleted
+
+
+class UserPool:
+    """
+    Session-level pool of pre-created GoRest users.
+
+    - start() bulk-creates `size` users (plus one shared read-only user) concurrently.
+      If that fails the pool falls back to creating users on demand, as with
+      size=0, so one provisioning error does not error every API test.
+    - borrow() returns a shared user for read-only tests; never mutate it.
+    - checkout() hands out a user exclusively. On return the user is reset to its
+      original fields, or dropped from the pool if the lease was retired.
+    - The pool is topped up on a background thread when it runs low.
+    - close() bulk-deletes every user the pool created that still exists.
+
+    Usage:
+        with user_pool.checkout() as lease:
+            api_workflow.update_user(lease.user["id"], name="X")   # reset afterwards
+    """
+
+    def __init__(self, base_url: str, token: str, size: int = 4, low_watermark: int = 1):
+        self.base_url = base_url
+        self.token = token
+        self.size = max(0, size)
+        self.low_watermark = low_watermark
+        self._api = UsersAPI(base_url, token)
+        self._cond = threading.Condition()
+        self._available: list[dict] = []
+        self._originals: dict[int, dict] = {}
+        self._created: set[int] = set()
+        self._gone: set[int] = set()
+        self._shared: dict | None = None
+        self._refill_thread: threading.Thread | None = None
+        self._counter = 0
+
+    # -- provisioning --------------------------------------------------------
+    def _create_batch(self, count: int) -> list[dict]:
+        specs = []
+        with self._cond:
+            for _ in range(count):
+                specs.append(_pool_spec(self._counter))
+                self._counter += 1
+
+        def _record(user: dict) -> None:
+            # recorded per create, so close() deletes it even if a sibling create fails
+            with self._cond:
+                self._created.add(user["id"])
+                self._originals[user["id"]] = {k: user[k] for k in ("name", "email", "gender", "status")}
+
+        async def _go() -> list[dict]:
+            async with AsyncAPIFlows(self.base_url, self.token) as flows:
+                return await flows.create_users(specs, on_created=_record)
+
+        return anyio.run(_go)
+
+    def start(self) -> "UserPool":
+        try:
+            users = self._create_batch(self.size + 1)
+        except Exception as exc:
+            print(f"⚠️  UserPool: could not pre-create users — {exc}; creating them on demand")
+            self.size = 0
+            return self
+        with self._cond:
+            self._shared = users[0]
+            self._available.extend(users[1:])
+        return self
+
+    def _refill(self) -> None:
+        try:
+            with self._cond:
+                missing = self.size - len(self._available)
+            if missing > 0:
+                users = self._create_batch(missing)
+                with self._cond:
+                    self._available.extend(users)
+                    self._cond.notify_all()
+        except Exception as exc:
+            print(f"⚠️  UserPool: background refill failed — {exc}")
+        finally:
+            with self._cond:
+                self._refill_thread = None
+                self._cond.notify_all()
+
+    def _maybe_refill(self) -> None:
+        with self._cond:
+            if not self.size or len(self._available) > self.low_watermark or self._refill_thread is not None:
+                return
+            self._refill_thread = threading.Thread(target=self._refill, name="user-pool-refill", daemon=True)
+            self._refill_thread.start()
+
+    # -- leasing ---------------------------------------------------------------
+    def borrow(self) -> dict:
+        """Shared read-only user (created on first use if start() could not provide it)."""
+        with self._cond:
+            shared = self._shared
+        if shared is None:
+            user = self._create_batch(1)[0]
+            with self._cond:
+                if self._shared is None:
+                    self._shared = user
+                shared = self._shared
+        return dict(shared)
+
+    @contextmanager
+    def checkout(self, timeout: float = 30):
+        with self._cond:
+            if not self._available and self._refill_thread is None:
+                user = None
+            else:
+                self._cond.wait_for(lambda: self._available or self._refill_thread is None, timeout)
+                user = self._available.pop() if self._available else None
+        if user is None:
+            # pool drained and no refill running: provision one on the spot
+            user = self._create_batch(1)[0]
+        self._maybe_refill()
+
+        lease = Lease(dict(user))
+        try:
+            yield lease
+        finally:
+            self._return(lease)
+
+    def _return(self, lease: Lease) -> None:
+        user_id = lease.user["id"]
+        if lease.deleted:
+            with self._cond:
+                self._gone.add(user_id)
+            return
+        if not lease.retired:
+            resp = self._api.update(user_id, **self._originals[user_id])
+            if resp.status_code == 200:
+                with self._cond:
+                    self._available.append(resp.json())
+                    self._cond.notify_all()
+                return
+        # retired (or reset failed): keep it out of the pool; close() deletes it
+
+    # -- teardown --------------------------------------------------------------
+    def close(self) -> None:
+        thread = self._refill_thread
+        if thread is not None:
+            thread.join(timeout=30)
+        with self._cond:
+            ids = sorted(self._created - self._gone)
+        if not ids:
+            return
+
+        async def _go() -> None:
+            async with AsyncUsersAPI(self.base_url, self.token) as api:
+                async with anyio.create_task_group() as tg:
+                    for user_id in ids:
+                        tg.start_soon(api.delete, user_id)
+
+        try:
+            anyio.run(_go)
+        except Exception as exc:
+            print(f"⚠️  UserPool: bulk delete failed — {exc}")
@@ -1,8 +1,12 @@
 from playwright.sync_api import Page
+from page_objects.inventory_page import InventoryPage
 from utilities.manage_pages import Pages
 
 
 class WebFlows:
+    VALID_USER = "standard_user"
+    VALID_PASSWORD = "secret_sauce"
+
     def __init__(self, page: Page):
         self.page = page
         self.pages = Pages(page)
@@ -15,8 +19,14 @@ class WebFlows:
         lp.password_field.fill(password)
         lp.login_button.click()
 
+    def is_logged_in(self) -> bool:
+        return self.page.url.endswith("/" + InventoryPage.PATH)
+
     def login_valid(self):
-        self.login("standard_user", "secret_sauce")
+        # Tests started from a cached session (@pytest.mark.authenticated) are already in
+        if self.is_logged_in():
+            return
+        self.login(self.VALID_USER, self.VALID_PASSWORD)
 
     def login_invalid_user(self):
         self.login("test", "test")